@@ -0,0 +1 @@
+"""Offline benchmarks for the Discord onboarding data paths, see ``benchmarks/run.py``."""
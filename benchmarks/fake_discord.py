@@ -0,0 +1,282 @@
+"""Offline stand-ins for the Discord objects the cog and the bot tasks use.
+
+``FakeDiscord`` plays Discord's REST API: every call a fake object makes
+(DMs, kicks, user fetches, interaction responses, channel messages) goes
+through ``FakeDiscord.request``, which waits a configurable latency, counts
+the call per route and result, and fails it the way Discord would:
+
+* a user with closed DMs gets ``discord.Forbidden`` (403, code 50007), for a
+  ``forbidden_rate`` share of the users;
+* each route is a bucket of ``bucket_limit`` calls per ``bucket_window``
+  seconds, past which calls get a 429 ``discord.HTTPException`` with
+  ``Retry-After`` and ``X-RateLimit-*`` headers and ``retry_after`` in the
+  body. Successful calls carry the same headers, so ``DiscordRateLimiter``
+  learns the buckets as it does from the real API. Interaction responses
+  have a bucket per interaction on Discord, so they are not limited here.
+
+``FakeBot``, ``FakeGuild``, ``FakeMember``, ``FakeUser`` and
+``FakeApplicationContext`` provide the attributes and coroutines that
+``cogs/onboarding.py`` and ``bot_tasks.py`` touch, no more. Nothing here needs
+Django, so tests can use it too.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+# Discord's error code for "Cannot send messages to this user"
+CANNOT_MESSAGE_USER = 50007
+
+# Routes without a shared rate limit bucket
+UNLIMITED_ROUTES = ('interaction',)
+
+
+class FakeResponse:
+    """Stand-in for the aiohttp response attached to discord.HTTPException."""
+
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.reason = {403: "Forbidden", 429: "Too Many Requests"}.get(status, "OK")
+        self.headers = headers or {}
+
+
+class _Bucket:
+    def __init__(self):
+        self.window_start = 0.0
+        self.used = 0
+
+
+class FakeDiscord:
+    """Simulated Discord REST API with latency, closed DMs and rate limit buckets.
+
+    ``bucket_limit=0`` turns rate limiting off. ``seed`` makes the users with
+    closed DMs and the latency jitter repeatable.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, forbidden_rate=0.0, bucket_limit=0, bucket_window=1.0,
+                 seed=0, clock=time.monotonic, sleep=asyncio.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.forbidden_rate = forbidden_rate
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.random = random.Random(seed)
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._dms_closed = {}
+        self.users = {}
+        # Counts of (route, status)
+        self.calls = Counter()
+
+    def dms_closed(self, user_id):
+        """Whether ``user_id`` has DMs from the server disabled, decided once per user."""
+        if user_id not in self._dms_closed:
+            self._dms_closed[user_id] = self.random.random() < self.forbidden_rate
+        return self._dms_closed[user_id]
+
+    def _take(self, route):
+        """Take a call from the route's bucket, returns ``(allowed, headers)``."""
+        if not self.bucket_limit or route in UNLIMITED_ROUTES:
+            return True, {}
+        now = self._clock()
+        bucket = self._buckets.setdefault(route, _Bucket())
+        if now - bucket.window_start >= self.bucket_window:
+            bucket.window_start, bucket.used = now, 0
+        reset_after = max(bucket.window_start + self.bucket_window - now, 0.0)
+        allowed = bucket.used < self.bucket_limit
+        if allowed:
+            bucket.used += 1
+        headers = {
+            'X-RateLimit-Bucket': route,
+            'X-RateLimit-Limit': str(self.bucket_limit),
+            'X-RateLimit-Remaining': str(self.bucket_limit - bucket.used),
+            'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+        }
+        if not allowed:
+            headers['Retry-After'] = f"{reset_after:.3f}"
+        return allowed, headers
+
+    async def request(self, route, forbidden=False):
+        """Make one API call on ``route``; ``forbidden`` fails it with a 403 once it gets through."""
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await self._sleep(delay)
+
+        allowed, headers = self._take(route)
+        if not allowed:
+            self.calls[(route, 429)] += 1
+            retry_after = float(headers['Retry-After'])
+            raise discord.HTTPException(
+                FakeResponse(429, headers),
+                {'message': "You are being rate limited.", 'retry_after': retry_after, 'global': False}
+            )
+        if forbidden:
+            self.calls[(route, 403)] += 1
+            raise discord.Forbidden(
+                FakeResponse(403, headers),
+                {'message': "Cannot send messages to this user", 'code': CANNOT_MESSAGE_USER}
+            )
+        self.calls[(route, 200)] += 1
+        return FakeResponse(200, headers)
+
+    def call_counts(self):
+        """API calls as ``{route: {status: count}}``."""
+        counts = {}
+        for (route, status), count in sorted(self.calls.items()):
+            counts.setdefault(route, {})[str(status)] = count
+        return counts
+
+
+class FakeRole:
+    """A role, compared by position like ``discord.Role``."""
+
+    def __init__(self, id, position=0):
+        self.id = id
+        self.position = position
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+
+class FakeUser:
+    """A Discord user the bot can DM."""
+
+    def __init__(self, api, id, name=None, bot=False):
+        self.api = api
+        self.id = id
+        self.name = name or f"user{id}"
+        self.discriminator = '0'
+        self.bot = bot
+        self.mention = f"<@{id}>"
+        self.sent = []
+
+    def can_send(self):
+        return True
+
+    async def send(self, content=None, embed=None, embeds=None):
+        await self.api.request('dm', forbidden=self.api.dms_closed(self.id))
+        self.sent.append(embed or embeds or content)
+
+
+class FakeMember(FakeUser):
+    """A member of a ``FakeGuild``."""
+
+    def __init__(self, api, guild, id, name=None, bot=False, roles=(), administrator=False, joined_at=None):
+        super().__init__(api, id, name=name, bot=bot)
+        self.guild = guild
+        self.roles = list(roles)
+        self.top_role = max(self.roles, key=lambda role: role.position) if self.roles else guild.default_role
+        self.guild_permissions = SimpleNamespace(
+            administrator=administrator, manage_guild=administrator, kick_members=administrator
+        )
+        self.joined_at = joined_at or datetime.now(timezone.utc)
+
+    async def kick(self, reason=None):
+        await self.api.request(f"kick:{self.guild.id}")
+        self.guild.remove_member(self.id)
+
+
+class FakeGuild:
+    """A guild whose ``me`` is the bot, with kick permissions and the highest role."""
+
+    def __init__(self, api, id, name="Fake Guild", owner_id=None):
+        self.api = api
+        self.id = id
+        self.name = name
+        self.owner_id = owner_id
+        self.default_role = FakeRole(id, position=0)
+        self._members = {}
+        self.me = FakeMember(api, self, id + 1, name="bot", bot=True, roles=[FakeRole(id + 2, position=100)],
+                             administrator=True)
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    def add_member(self, user_id, name=None, bot=False, **kwargs):
+        member = self._members[user_id] = FakeMember(self.api, self, user_id, name=name, bot=bot, **kwargs)
+        return member
+
+    def remove_member(self, user_id):
+        return self._members.pop(user_id, None)
+
+
+class FakeChannel:
+    """A text channel the log digests are posted to."""
+
+    def __init__(self, api, id):
+        self.api = api
+        self.id = id
+        self.sent = []
+
+    async def send(self, content=None, embed=None, embeds=None):
+        await self.api.request(f"channel:{self.id}")
+        self.sent.append(embed or embeds or content)
+
+
+class FakeApplicationContext:
+    """The ``ctx`` of a slash command invoked by ``author`` in ``guild``."""
+
+    def __init__(self, api, author, guild):
+        self.api = api
+        self.author = author
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.responses = []
+
+    async def defer(self, ephemeral=False):
+        await self.api.request('interaction')
+
+    async def respond(self, content=None, embed=None, ephemeral=False):
+        await self.api.request('interaction')
+        self.responses.append(embed or content)
+
+
+class FakeBot:
+    """The bot the cog is loaded into and the bot tasks are run with."""
+
+    def __init__(self, api):
+        self.api = api
+        self.guilds = {}
+        self.channels = {}
+        self.cogs = []
+
+    def add_guild(self, guild_id, **kwargs):
+        guild = self.guilds[guild_id] = FakeGuild(self.api, guild_id, **kwargs)
+        return guild
+
+    def add_cog(self, cog):
+        self.cogs.append(cog)
+
+    def context(self, author, guild):
+        """The context of a slash command ``author`` invokes in ``guild``."""
+        return FakeApplicationContext(self.api, author, guild)
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        await self.api.request('channels')
+        return self.channels.setdefault(channel_id, FakeChannel(self.api, channel_id))
+
+    async def fetch_user(self, user_id):
+        await self.api.request('users')
+        user = self.api.users.get(user_id)
+        if user is None:
+            user = self.api.users[user_id] = FakeUser(self.api, user_id)
+        return user
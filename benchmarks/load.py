@@ -0,0 +1,330 @@
+"""Offline load tests of the bot cog and the bot tasks against a fake Discord.
+
+Run from the repository root::
+
+    python -m benchmarks.load --output load.json
+    python -m benchmarks.load --only join_raid --rate 500 --forbidden-rate 0.3
+    python -m benchmarks.load --only join_raid --trace raid.jsonl
+
+Each scenario starts from an empty SQLite database (``benchmarks/settings.py``)
+and drives the real cog or bot task code on one event loop, as the bot runs
+them, with the Discord objects and REST API replaced by ``fake_discord``.
+Events are dispatched at ``--rate`` per second (0: all at once) and run
+concurrently. Celery dispatch is stubbed out as in ``benchmarks.run``, bot
+task deferrals are counted rather than queued, and each scenario gets its own
+``DiscordRateLimiter``.
+
+``join_raid`` replays a join/leave trace through ``on_member_join``: by
+default ``--leave-ratio`` of ``size`` members joining at ``--rate``, leaving
+again within five seconds, or the JSON lines of ``--trace``, one event per
+line::
+
+    {"at": 0.0, "event": "join", "id": 100000000000000001, "name": "pilot"}
+    {"at": 1.5, "event": "leave", "id": 100000000000000001}
+
+Results are written as JSON: throughput, the API calls per route and status,
+what the handlers returned, deferrals, database queries, and how long the
+event loop stalled, measured by a ticker that sleeps ``STALL_TICK`` seconds
+and records how late it wakes up. The ORM runs on the loop thread, so that
+is where blocking database work shows up.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest.mock import patch
+
+# Sets up Django before the models are imported
+from .run import ADMIN_ID, BASE_ID, GUILD_ID, _schedules, stubs
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from discord_onboarding import bot_tasks
+from discord_onboarding.cogs.onboarding import OnboardingCog
+from discord_onboarding.idempotency import side_effect_key
+from discord_onboarding.models import AutoKickSchedule
+from discord_onboarding.profiling import capture
+from discord_onboarding.ratelimit import DEFERRED, DiscordRateLimiter
+
+from .fake_discord import FakeBot, FakeDiscord
+
+# Seconds between the stall ticker's wake-ups, and the lateness reported as a stall
+STALL_TICK = 0.01
+STALL_THRESHOLD = 0.1
+
+# Seconds within which a member in a generated trace leaves again
+LEAVE_WITHIN = 5.0
+
+SCENARIOS = []
+
+
+def scenario(name, size):
+    """Register ``func(size, bot, options)`` as a load scenario of ``size`` events.
+
+    ``func`` sets up its data untimed and returns the events as a list of
+    ``(at, coroutine function)``, ``at`` in seconds from the start; ``None``
+    spaces them at ``--rate``.
+    """
+    def register(func):
+        SCENARIOS.append((name, size, func))
+        return func
+
+    return register
+
+
+def generate_trace(size, rate, leave_ratio, seed=0):
+    """Join events for ``size`` members at ``rate`` per second, ``leave_ratio`` of them leaving again."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(size):
+        at = i / rate if rate else 0.0
+        member_id = BASE_ID + i
+        events.append({'at': at, 'event': 'join', 'id': member_id, 'name': f"member{i}"})
+        if rng.random() < leave_ratio:
+            events.append({'at': at + rng.uniform(0, LEAVE_WITHIN), 'event': 'leave', 'id': member_id})
+    return sorted(events, key=lambda event: event['at'])
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@scenario('join_raid', 1000)
+def join_raid(size, bot, options):
+    """``on_member_join`` for a raid of joining members, some leaving again."""
+    cog = OnboardingCog(bot)
+    guild = bot.get_guild(GUILD_ID)
+    trace = load_trace(options.trace) if options.trace else generate_trace(size, options.rate, options.leave_ratio)
+
+    def replay(event):
+        async def join():
+            member = guild.add_member(event['id'], name=event.get('name'), joined_at=timezone.now())
+            return await cog.on_member_join(member)
+
+        async def leave():
+            guild.remove_member(event['id'])
+
+        return join if event['event'] == 'join' else leave
+
+    return [(event['at'], replay(event)) for event in trace]
+
+
+@scenario('bind_commands', 1000)
+def bind_commands(size, bot, options):
+    """``/bind`` from members without a link yet."""
+    cog = OnboardingCog(bot)
+    guild = bot.get_guild(GUILD_ID)
+
+    def bind(member):
+        return lambda: OnboardingCog.bind_self.callback(cog, bot.context(member, guild))
+
+    return [(None, bind(guild.add_member(BASE_ID + i, name=f"member{i}"))) for i in range(size)]
+
+
+@scenario('auth_user_commands', 500)
+def auth_user_commands(size, bot, options):
+    """``/auth-user`` from an admin for unlinked members, each DMing the member."""
+    cog = OnboardingCog(bot)
+    guild = bot.get_guild(GUILD_ID)
+    admin = guild.add_member(ADMIN_ID, name="admin", administrator=True)
+
+    def auth_user(member):
+        return lambda: OnboardingCog.auth_user.callback(cog, bot.context(admin, guild), member)
+
+    return [(None, auth_user(guild.add_member(BASE_ID + i, name=f"member{i}"))) for i in range(size)]
+
+
+@scenario('reminder_storm', 1000)
+def reminder_storm(size, bot, options):
+    """``send_reminder_with_guild_context`` for ``size`` schedules, as the processor queues them."""
+    _schedules(size)
+    kick_time = (timezone.now() + timedelta(hours=24)).strftime('%Y-%m-%d %H:%M UTC')
+
+    def remind(schedule_id):
+        return lambda: bot_tasks.send_reminder_with_guild_context(
+            bot, schedule_id, "https://auth.example.com/discord-onboarding/start/token/", 1, kick_time,
+            idempotency_key=side_effect_key(schedule_id, 'reminder', 1)
+        )
+
+    return [(None, remind(schedule_id)) for schedule_id in AutoKickSchedule.objects.values_list('id', flat=True)]
+
+
+@scenario('mass_kick', 1000)
+def mass_kick(size, bot, options):
+    """``kick_user_from_guild`` for ``size`` members past the auto-kick timeout."""
+    guild = bot.get_guild(GUILD_ID)
+
+    def kick(member_id):
+        return lambda: bot_tasks.kick_user_from_guild(
+            bot, GUILD_ID, member_id, "Failed to authenticate within required timeframe",
+            idempotency_key=side_effect_key(member_id, 'kick')
+        )
+
+    return [(None, kick(guild.add_member(BASE_ID + i, name=f"member{i}").id)) for i in range(size)]
+
+
+class StallMeter:
+    """Measure how late a ticker sleeping ``tick`` seconds wakes up on the running loop."""
+
+    def __init__(self, tick=STALL_TICK):
+        self.tick = tick
+        self.lateness = []
+
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.tick
+            await asyncio.sleep(self.tick)
+            self.lateness.append(max(time.monotonic() - expected, 0.0))
+
+    def summary(self):
+        lateness = sorted(self.lateness)
+        p99 = lateness[max(-(-len(lateness) * 99 // 100) - 1, 0)] if lateness else 0.0
+        return {
+            'stalled_seconds': round(sum(lateness), 6),
+            'max_ms': round(lateness[-1] * 1000, 3) if lateness else 0.0,
+            'p99_ms': round(p99 * 1000, 3),
+            'over_threshold': sum(1 for late in lateness if late > STALL_THRESHOLD),
+        }
+
+
+def _outcome(result):
+    if isinstance(result, BaseException):
+        return type(result).__name__
+    if result == DEFERRED:
+        return 'deferred'
+    return str(result)
+
+
+async def replay(events, rate):
+    """Start each event's coroutine at its time and wait for all of them, returns their results."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    running = []
+    for i, (at, func) in enumerate(events):
+        if at is None:
+            at = i / rate if rate else 0.0
+        delay = started + at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        running.append(asyncio.create_task(func()))
+    return await asyncio.gather(*running, return_exceptions=True)
+
+
+def run_scenario(name, size, func, options):
+    call_command('flush', interactive=False, verbosity=0)
+    cache.clear()
+    api = FakeDiscord(
+        latency=options.latency / 1000, jitter=options.jitter / 1000, forbidden_rate=options.forbidden_rate,
+        bucket_limit=options.bucket_limit, bucket_window=options.bucket_window, seed=options.seed,
+    )
+    bot = FakeBot(api)
+    bot.add_guild(GUILD_ID, name="Load Test Guild")
+    queued = {}
+    deferred = Counter()
+
+    def enqueue_bot_task(function, task_args, task_kwargs=None, countdown=None):
+        deferred[function] += 1
+
+    with stubs(queued), \
+            patch.object(bot_tasks, 'discord_limiter', DiscordRateLimiter(publish=False)), \
+            patch.object(bot_tasks, 'enqueue_bot_task', enqueue_bot_task):
+        events = func(size, bot, options)
+        meter = StallMeter()
+
+        async def load():
+            ticker = asyncio.create_task(meter.run())
+            # Database connections are per async context, so capture inside the event loop
+            with capture() as profile:
+                results = await replay(events, options.rate)
+            ticker.cancel()
+            return profile, results
+
+        profile, results = asyncio.run(load())
+
+    return {
+        'name': name,
+        'size': size,
+        'events': len(events),
+        'seconds': round(profile.wall_seconds, 6),
+        'events_per_second': round(len(events) / profile.wall_seconds, 2) if profile.wall_seconds else None,
+        'outcomes': dict(sorted(Counter(_outcome(result) for result in results).items())),
+        'api_calls': api.call_counts(),
+        'deferred': dict(sorted(deferred.items())),
+        'tasks_queued': dict(sorted(queued.items())),
+        'queries': profile.queries,
+        'db_seconds': round(profile.db_seconds, 6),
+        'event_loop_stall': meter.summary(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every scenario size by this factor')
+    parser.add_argument(
+        '--only', nargs='+', metavar='NAME', choices=[name for name, _, _ in SCENARIOS],
+        help='Run only these scenarios'
+    )
+    parser.add_argument('--rate', type=float, default=200.0, help='Events started per second, 0 for all at once')
+    parser.add_argument('--trace', help='JSON lines join/leave trace for join_raid instead of a generated one')
+    parser.add_argument(
+        '--leave-ratio', type=float, default=0.1, help='Share of members in a generated trace that leave again'
+    )
+    parser.add_argument('--latency', type=float, default=50.0, help='Milliseconds every API call takes')
+    parser.add_argument('--jitter', type=float, default=20.0, help='Up to this many milliseconds added at random')
+    parser.add_argument(
+        '--forbidden-rate', type=float, default=0.1, help='Share of users whose DMs are closed (403)'
+    )
+    parser.add_argument(
+        '--bucket-limit', type=int, default=50,
+        help='Calls per route per --bucket-window before Discord answers 429, 0 for no rate limits'
+    )
+    parser.add_argument('--bucket-window', type=float, default=1.0, help='Seconds of a rate limit bucket')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for closed DMs and latency jitter')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help="Keep the cog's and bot tasks' log output")
+    options = parser.parse_args(argv)
+
+    if not options.verbose:
+        # A log line per closed DM or 429 would drown the summary, the results count them
+        logging.disable(logging.ERROR)
+    call_command('migrate', interactive=False, verbosity=0)
+
+    results = []
+    for name, size, func in SCENARIOS:
+        if options.only and name not in options.only:
+            continue
+        size = max(int(size * options.scale), 1)
+        result = run_scenario(name, size, func, options)
+        results.append(result)
+        stall = result['event_loop_stall']
+        print(f"{name:<20} {result['events']:>7} events {result['seconds']:>9.3f}s "
+              f"{result['events_per_second'] or 0:>9.1f}/s  stalled {stall['stalled_seconds']:.3f}s "
+              f"(max {stall['max_ms']:.0f}ms)", file=sys.stderr)
+
+    output = {
+        'django': django.get_version(),
+        'options': {key: value for key, value in vars(options).items() if key != 'output'},
+        'finished_at': timezone.now().isoformat(),
+        'results': results,
+    }
+    text = json.dumps(output, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
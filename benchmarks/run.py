@@ -0,0 +1,362 @@
+"""Offline benchmarks for the onboarding data paths.
+
+Run from the repository root::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scale 0.1 --only token_issue cleanup_expired_tokens_1m
+    python -m benchmarks.run --baseline results.json
+
+Each benchmark starts from an empty SQLite database (``benchmarks/settings.py``),
+sets up its data untimed and then times one hot path. Nothing talks to Discord
+or a broker: Celery dispatch is stubbed out and counted, the bot queue is taken
+to be empty and the bot cog gets a fake guild. ``DiscordUser`` is the real
+model, on the same SQLite database.
+
+Results are written as JSON (seconds, operations per second, database queries
+and time, tasks queued). With ``--baseline`` each result is compared to the
+same benchmark in an earlier run, and the exit status is 1 if any got slower
+than ``--tolerance``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import sqlite3
+import sys
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+# The Discord bot runs its cogs with the ORM on the event loop thread
+os.environ.setdefault('DJANGO_ALLOW_ASYNC_UNSAFE', 'true')
+
+import django  # noqa: E402
+
+django.setup()
+
+from celery.app.task import Task  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from allianceauth.services.modules.discord.models import DiscordUser  # noqa: E402
+
+from discord_onboarding import tasks, views  # noqa: E402
+from discord_onboarding.app_settings import (  # noqa: E402
+    DISCORD_ONBOARDING_AUTO_KICK_TIMEOUT_HOURS,
+    DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH,
+    DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS
+)
+from discord_onboarding.cogs import onboarding as cog_module  # noqa: E402
+from discord_onboarding.models import AutoKickSchedule, OnboardingToken  # noqa: E402
+from discord_onboarding.profiling import capture  # noqa: E402
+
+# Discord IDs of the generated members, and the fake guild and admin
+BASE_ID = 100000000000000000
+GUILD_ID = 900000000000000000
+ADMIN_ID = 800000000000000000
+
+BATCH_SIZE = 5000
+
+# Processor runs timed per schedule count
+PROCESSOR_TICKS = 5
+
+BENCHMARKS = []
+
+
+def benchmark(name, size):
+    """Register ``func(size, measure)`` as a benchmark at ``size`` rows, members or calls.
+
+    ``func`` sets up its data, times the hot path inside ``with measure():``
+    and returns the number of operations it timed.
+    """
+    def register(func):
+        BENCHMARKS.append((name, size, func))
+        return func
+
+    return register
+
+
+def _tokens(count, created_at=None, **fields):
+    """Bulk create ``count`` unused tokens, returns their token strings."""
+    now = timezone.now()
+    tokens = [
+        OnboardingToken(
+            token=secrets.token_urlsafe(48), correlation_id=uuid.uuid4().hex,
+            discord_id=BASE_ID + i, discord_username=f"@member{i}",
+            expires_at=now + timedelta(hours=1), **fields
+        )
+        for i in range(count)
+    ]
+    OnboardingToken.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+    if created_at is not None:
+        # created_at is auto_now_add, so backdating takes an update (of every token so far)
+        OnboardingToken.objects.update(created_at=created_at)
+    return [token.token for token in tokens]
+
+
+def _request(method='get', user=None, **session):
+    request = getattr(RequestFactory(), method)('/')
+    request.session = SessionStore()
+    request.session.update(session)
+    request.user = user
+    return request
+
+
+@benchmark('token_issue', 10000)
+def token_issue(size, measure):
+    """``OnboardingToken.objects.create`` as in ``on_member_join``, with its signals."""
+    with measure():
+        for i in range(size):
+            OnboardingToken.objects.create(discord_id=BASE_ID + i, discord_username=f"@member{i}")
+    return size
+
+
+@benchmark('onboarding_start', 10000)
+def onboarding_start(size, measure):
+    """Onboarding link lookups among ``size`` pending tokens."""
+    tokens = _tokens(size)
+    requests = [_request() for _ in tokens]
+    with measure():
+        for request, token in zip(requests, tokens):
+            views.onboarding_start(request, token)
+    return size
+
+
+@benchmark('onboarding_callback', 2000)
+def onboarding_callback(size, measure):
+    """Token redemptions after SSO, each linking a new Discord user."""
+    tokens = _tokens(size)
+    requests = [
+        _request(user=User.objects.create(username=f"pilot{i}"), onboarding_token=token)
+        for i, token in enumerate(tokens)
+    ]
+    with measure():
+        for request in requests:
+            views.onboarding_callback(request)
+    return size
+
+
+def _schedules(count):
+    """Bulk create ``count`` active schedules: a third due a kick, a third a reminder, a third neither."""
+    now = timezone.now()
+    reminder_due = now - timedelta(hours=DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS + 1)
+    schedules = []
+    for i in range(count):
+        kind = i % 3
+        schedules.append(AutoKickSchedule(
+            discord_id=BASE_ID + i, discord_username=f"@member{i}", guild_id=GUILD_ID,
+            joined_at=reminder_due if kind == 1 else now - timedelta(hours=1),
+            kick_scheduled_at=now - timedelta(minutes=i % 60 + 1) if kind == 0 else now + timedelta(hours=24),
+        ))
+    AutoKickSchedule.objects.bulk_create(schedules, batch_size=BATCH_SIZE)
+
+
+def _processor_ticks(size, measure):
+    _schedules(size)
+    with measure():
+        for _ in range(PROCESSOR_TICKS):
+            # A finished run keeps its lease for a minute to turn away duplicate triggers
+            cache.delete(tasks.PROCESSOR_LEASE_KEY)
+            tasks.process_auto_kick_schedules()
+    return PROCESSOR_TICKS
+
+
+@benchmark('process_auto_kick_schedules_10k', 10000)
+def process_auto_kick_schedules_10k(size, measure):
+    """Processor runs over 10k active schedules, each queueing up to the bot queue target depth."""
+    return _processor_ticks(size, measure)
+
+
+@benchmark('process_auto_kick_schedules_100k', 100000)
+def process_auto_kick_schedules_100k(size, measure):
+    """Processor runs over 100k active schedules."""
+    return _processor_ticks(size, measure)
+
+
+@benchmark('cleanup_expired_tokens_1m', 1000000)
+def cleanup_expired_tokens_1m(size, measure):
+    """Daily cleanup of a token table of which half is past the 24 hour cutoff."""
+    _tokens(size // 2, created_at=timezone.now() - timedelta(days=2))
+    _tokens(size - size // 2)
+    with measure():
+        deleted = tasks.cleanup_expired_tokens()
+    return deleted
+
+
+@benchmark('add_orphans_to_autokick_100k', 100000)
+def add_orphans_to_autokick_100k(size, measure):
+    """``/onboarding-admin add_orphans_to_autokick`` on a guild with ``size`` members.
+
+    1 in 50 members is a bot, 1% is linked and 10% already has a schedule.
+    """
+    members = [
+        SimpleNamespace(id=BASE_ID + i, bot=i % 50 == 0, name=f"member{i}", discriminator='0')
+        for i in range(size)
+    ]
+    linked = [member for member in members if not member.bot][:size // 100]
+    users = User.objects.bulk_create(
+        [User(username=f"pilot{member.id}") for member in linked], batch_size=BATCH_SIZE
+    )
+    DiscordUser.objects.bulk_create(
+        [DiscordUser(user=user, uid=member.id) for user, member in zip(users, linked)], batch_size=BATCH_SIZE
+    )
+    now = timezone.now()
+    AutoKickSchedule.objects.bulk_create([
+        AutoKickSchedule(
+            discord_id=member.id, discord_username=f"@{member.name}", guild_id=GUILD_ID, joined_at=now,
+            kick_scheduled_at=now + timedelta(hours=DISCORD_ONBOARDING_AUTO_KICK_TIMEOUT_HOURS)
+        )
+        for member in members[-(size // 10):]
+    ], batch_size=BATCH_SIZE)
+
+    ctx = SimpleNamespace(
+        author=SimpleNamespace(id=ADMIN_ID),
+        guild=SimpleNamespace(id=GUILD_ID, members=members),
+        defer=AsyncMock(), respond=AsyncMock(),
+    )
+
+    async def command():
+        # Database connections are per async context, so measure inside the event loop
+        with measure():
+            await cog_module.OnboardingCog.add_orphans_to_autokick.callback(None, ctx)
+
+    asyncio.run(command())
+    return size
+
+
+@contextmanager
+def stubs(queued):
+    """Keep everything offline, counting the Celery tasks that would have been queued."""
+
+    def apply_async(task, *args, **kwargs):
+        queued[task.name] = queued.get(task.name, 0) + 1
+
+    def render(request, template_name, context=None):
+        return HttpResponse(template_name)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(Task, 'apply_async', autospec=True, side_effect=apply_async))
+        stack.enter_context(
+            patch.object(tasks, 'available_bot_capacity', return_value=DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH)
+        )
+        stack.enter_context(patch.object(tasks, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True))
+        stack.enter_context(patch.object(cog_module, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True))
+        stack.enter_context(patch.object(cog_module.bot_settings, 'get_admins', return_value=[ADMIN_ID]))
+        # Alliance Auth's templates need its full site setup; the views' data paths are what is measured
+        stack.enter_context(patch.object(views, 'render', render))
+        # The bypass login URL is part of this app's urls, the regular SSO login is not
+        stack.enter_context(patch.object(views, 'DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION', True))
+        yield
+
+
+def run_benchmark(name, size, func):
+    call_command('flush', interactive=False, verbosity=0)
+    cache.clear()
+    profiles = []
+    queued = {}
+
+    @contextmanager
+    def measure():
+        queued.clear()
+        with capture() as profile:
+            yield
+        profiles.append(profile)
+
+    with stubs(queued):
+        ops = func(size, measure)
+
+    profile = profiles[0]
+    return {
+        'name': name,
+        'size': size,
+        'ops': ops,
+        'seconds': round(profile.wall_seconds, 6),
+        'ops_per_second': round(ops / profile.wall_seconds, 2) if profile.wall_seconds else None,
+        'queries': profile.queries,
+        'db_seconds': round(profile.db_seconds, 6),
+        'tasks_queued': dict(sorted(queued.items())),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print each result's change against ``baseline``, returns the names that regressed."""
+    previous = {result['name']: result for result in baseline['results']}
+    regressed = []
+    for result in results:
+        before = previous.get(result['name'])
+        if not before or before['size'] != result['size'] or not before['seconds']:
+            continue
+        change = result['seconds'] / before['seconds'] - 1
+        flag = ''
+        if change > tolerance:
+            regressed.append(result['name'])
+            flag = '  REGRESSION'
+        print(f"{result['name']:<36} {before['seconds']:>10.3f}s -> {result['seconds']:>10.3f}s "
+              f"({change:+.1%}){flag}", file=sys.stderr)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every benchmark size by this factor')
+    parser.add_argument(
+        '--only', nargs='+', metavar='NAME', choices=[name for name, _, _ in BENCHMARKS],
+        help='Run only these benchmarks'
+    )
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='Slowdown against the baseline that counts as a regression (default: 0.2, i.e. 20%%)'
+    )
+    options = parser.parse_args(argv)
+
+    call_command('migrate', interactive=False, verbosity=0)
+
+    results = []
+    for name, size, func in BENCHMARKS:
+        if options.only and name not in options.only:
+            continue
+        size = max(int(size * options.scale), 1)
+        result = run_benchmark(name, size, func)
+        results.append(result)
+        print(f"{name:<36} {size:>9} {result['seconds']:>10.3f}s {result['ops_per_second'] or 0:>12.1f}/s "
+              f"{result['queries']:>8} queries", file=sys.stderr)
+
+    output = {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'scale': options.scale,
+        'finished_at': timezone.now().isoformat(),
+        'results': results,
+    }
+    text = json.dumps(output, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressed = compare(results, json.load(f), options.tolerance)
+        if regressed:
+            print(f"Slower than the baseline: {', '.join(regressed)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""Settings for the offline benchmarks: the test settings on a throwaway SQLite file."""
+
+import os
+import tempfile
+
+from test_settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'DISCORD_ONBOARDING_BENCHMARK_DB',
+            os.path.join(tempfile.gettempdir(), 'discord_onboarding_benchmark.sqlite3')
+        ),
+    }
+}
+
+# Per-action info logging would dominate the timings
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'root': {'level': 'WARNING'},
+}
@@ -1,16 +1,177 @@
 """Admin interface for Discord Onboarding."""
 
+import re
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import OnboardingToken, AutoKickSchedule
+from . import counters
+from .export import streaming_response
+from .forecast import FORECAST_HOURS, forecast
+from .health import report as health_report
+from .jobs import BACKGROUND_THRESHOLD, get_job, start_job
+from .models import (
+    AutoKickDailySummary, AutoKickSchedule, AutoKickScheduleQuerySet, DMDeliveryStatus, OnboardingStageEvent,
+    OnboardingToken, OnboardingTokenQuerySet
+)
 from allianceauth.services.modules.discord.models import DiscordUser
-from .app_settings import DISCORD_ONBOARDING_AUTO_KICK_ENABLED
+from .app_settings import DISCORD_ONBOARDING_AUTO_KICK_ENABLED, DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET
+
+
+class CounterPaginator(Paginator):
+    """Paginator that takes unfiltered totals from the counters table instead of COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            total = counters.get_model_count(self.object_list.model)
+            if total is not None:
+                return total
+        return super().count
+
+
+# Discord snowflakes fit in a signed 64-bit integer, up to 19 digits
+SNOWFLAKE_RE = re.compile(r'^\d{1,19}$')
+
+# secrets.token_urlsafe(48), as generated by OnboardingToken.save()
+TOKEN_RE = re.compile(r'^[A-Za-z0-9_-]{64}$')
+
+# uuid4().hex, as generated by OnboardingToken.save()
+CORRELATION_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ExactSearchMixin:
+    """Search IDs and tokens by exact, indexed matches before any free-text search.
+
+    A Discord ID typed into the search box is matched exactly against
+    ``id_search_fields``, a token against ``token_search_field`` and a
+    correlation ID against ``correlation_search_field``. Other input, and
+    ID-shaped input without an exact match (an all-digit username, say),
+    falls back to Django's ``icontains`` search over ``search_fields``,
+    which should just be the username columns. Admins without text columns
+    leave ``search_fields`` empty and only ever search by exact ID.
+    """
+
+    id_search_fields = ()
+    token_search_field = None
+    correlation_search_field = None
+
+    def _exact_search(self, queryset, term):
+        if self.id_search_fields and SNOWFLAKE_RE.match(term) and int(term) < 2 ** 63:
+            query = Q()
+            for field in self.id_search_fields:
+                query |= Q(**{field: int(term)})
+            return queryset.filter(query)
+        if self.token_search_field and TOKEN_RE.match(term):
+            return queryset.filter(**{self.token_search_field: term})
+        if self.correlation_search_field and CORRELATION_ID_RE.match(term):
+            return queryset.filter(**{self.correlation_search_field: term})
+        return None
+
+    def get_search_fields(self, request):
+        # Keep the search box on admins that only search by ID
+        return super().get_search_fields(request) or self.id_search_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        exact = self._exact_search(queryset, term)
+        if not self.search_fields:
+            # Never cast the ID columns to text for an icontains scan
+            if not term:
+                return queryset, False
+            return (exact if exact is not None else queryset.none()), False
+        if exact is not None and exact.exists():
+            return exact, False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class CountedDeleteMixin:
+    """Admin deletes that keep the running counters current without per-row delete signals."""
+
+    def delete_model(self, request, obj):
+        counters.delete_instance(obj)
+
+    def delete_queryset(self, request, queryset):
+        counters.delete_counted(queryset)
+
+
+def export_csv(modeladmin, request, queryset):
+    """Stream the selected rows as a CSV download."""
+    return streaming_response(queryset, 'csv')
+
+
+export_csv.short_description = _('Export selected as CSV')
+
+
+def export_ndjson(modeladmin, request, queryset):
+    """Stream the selected rows as an NDJSON download."""
+    return streaming_response(queryset, 'ndjson')
+
+
+export_ndjson.short_description = _('Export selected as NDJSON')
+
+
+class TokenStatusFilter(admin.SimpleListFilter):
+    """Token status as indexed predicates rather than a filter on the annotation."""
+
+    title = _('status')
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (
+            (OnboardingTokenQuerySet.STATUS_PENDING, _('Pending')),
+            (OnboardingTokenQuerySet.STATUS_EXPIRED, _('Expired')),
+            (OnboardingTokenQuerySet.STATUS_USED, _('Used')),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == OnboardingTokenQuerySet.STATUS_PENDING:
+            return queryset.pending()
+        if self.value() == OnboardingTokenQuerySet.STATUS_EXPIRED:
+            return queryset.expired()
+        if self.value() == OnboardingTokenQuerySet.STATUS_USED:
+            return queryset.used()
+        return queryset
+
+
+class ScheduleStatusFilter(admin.SimpleListFilter):
+    """Schedule status as indexed predicates rather than a filter on the annotation."""
+
+    title = _('status')
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (
+            (AutoKickScheduleQuerySet.STATUS_SCHEDULED, _('Scheduled')),
+            (AutoKickScheduleQuerySet.STATUS_DUE_FOR_REMINDER, _('Due for Reminder')),
+            (AutoKickScheduleQuerySet.STATUS_DUE_FOR_KICK, _('Due for Kick')),
+            (AutoKickScheduleQuerySet.STATUS_INACTIVE, _('Inactive')),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == AutoKickScheduleQuerySet.STATUS_SCHEDULED:
+            return queryset.scheduled()
+        if self.value() == AutoKickScheduleQuerySet.STATUS_DUE_FOR_REMINDER:
+            return queryset.due_for_reminder()
+        if self.value() == AutoKickScheduleQuerySet.STATUS_DUE_FOR_KICK:
+            return queryset.due_for_kick()
+        if self.value() == AutoKickScheduleQuerySet.STATUS_INACTIVE:
+            return queryset.filter(is_active=False)
+        return queryset
 
 
 @admin.register(OnboardingToken)
-class OnboardingTokenAdmin(admin.ModelAdmin):
+class OnboardingTokenAdmin(CountedDeleteMixin, ExactSearchMixin, admin.ModelAdmin):
+    paginator = CounterPaginator
+    show_full_result_count = False
     list_display = (
         'discord_username',
         'discord_id',
@@ -19,18 +180,25 @@ class OnboardingTokenAdmin(admin.ModelAdmin):
         'created_at',
         'expires_at'
     )
-    list_filter = ('used', 'created_at', 'expires_at')
-    search_fields = ('discord_username', 'discord_id', 'user__username', 'token')
-    readonly_fields = ('token', 'created_at', 'expires_at', 'status_display')
+    list_filter = (TokenStatusFilter, 'created_at', 'expires_at')
+    search_fields = ('discord_username', 'user__username')
+    id_search_fields = ('discord_id',)
+    token_search_field = 'token'
+    correlation_search_field = 'correlation_id'
+    readonly_fields = ('token', 'correlation_id', 'created_at', 'expires_at', 'status_display')
     ordering = ('-created_at',)
+    actions = [export_csv, export_ndjson]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_status()
 
     def status_display(self, obj):
-        if obj.used:
+        if obj.status == OnboardingTokenQuerySet.STATUS_USED:
             return format_html(
                 '<span style="color: green;"><i class="fas fa-check"></i> {}</span>',
                 _('Used')
             )
-        elif obj.is_expired():
+        elif obj.status == OnboardingTokenQuerySet.STATUS_EXPIRED:
             return format_html(
                 '<span style="color: red;"><i class="fas fa-times"></i> {}</span>',
                 _('Expired')
@@ -42,6 +210,7 @@ class OnboardingTokenAdmin(admin.ModelAdmin):
             )
 
     status_display.short_description = _('Status')
+    status_display.admin_order_field = 'status'
 
     def has_add_permission(self, request):
         # Tokens should be created by the bot, not manually
@@ -49,7 +218,9 @@ class OnboardingTokenAdmin(admin.ModelAdmin):
 
 
 @admin.register(AutoKickSchedule)
-class AutoKickScheduleAdmin(admin.ModelAdmin):
+class AutoKickScheduleAdmin(CountedDeleteMixin, ExactSearchMixin, admin.ModelAdmin):
+    paginator = CounterPaginator
+    show_full_result_count = False
     list_display = (
         'discord_username',
         'discord_id',
@@ -60,24 +231,31 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
         'reminder_count',
         'last_reminder_sent'
     )
-    list_filter = ('is_active', 'joined_at', 'kick_scheduled_at', 'reminder_count')
-    search_fields = ('discord_username', 'discord_id', 'guild_id')
-    readonly_fields = ('joined_at', 'status_display', 'time_until_kick')
+    list_filter = (ScheduleStatusFilter, 'outcome', 'joined_at', 'kick_scheduled_at', 'reminder_count')
+    search_fields = ('discord_username',)
+    id_search_fields = ('discord_id', 'guild_id')
+    readonly_fields = ('joined_at', 'status_display', 'time_until_kick', 'deactivated_at', 'outcome')
     ordering = ('-joined_at',)
-    actions = ['deactivate_schedules', 'delete_schedules', 'send_reminder_now', 'add_all_orphaned_users', 'clear_all_schedules']
+    actions = [
+        'deactivate_schedules', 'delete_schedules', 'send_reminder_now', 'add_all_orphaned_users',
+        'clear_all_schedules', export_csv, export_ndjson
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_status()
 
     def status_display(self, obj):
-        if not obj.is_active:
+        if obj.status == AutoKickScheduleQuerySet.STATUS_INACTIVE:
             return format_html(
                 '<span style="color: gray;"><i class="fas fa-pause"></i> {}</span>',
                 _('Inactive')
             )
-        elif obj.is_due_for_kick():
+        elif obj.status == AutoKickScheduleQuerySet.STATUS_DUE_FOR_KICK:
             return format_html(
                 '<span style="color: red;"><i class="fas fa-exclamation-triangle"></i> {}</span>',
                 _('Due for Kick')
             )
-        elif obj.is_due_for_reminder():
+        elif obj.status == AutoKickScheduleQuerySet.STATUS_DUE_FOR_REMINDER:
             return format_html(
                 '<span style="color: orange;"><i class="fas fa-bell"></i> {}</span>',
                 _('Due for Reminder')
@@ -89,20 +267,19 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
             )
 
     status_display.short_description = _('Status')
+    status_display.admin_order_field = 'status'
 
     def time_until_kick(self, obj):
-        if not obj.is_active:
+        time_left = obj.time_left
+        if time_left is None:
             return _('N/A - Inactive')
-        
-        from django.utils import timezone
-        time_left = obj.kick_scheduled_at - timezone.now()
-        
+
         if time_left.total_seconds() <= 0:
             return _('Overdue')
         
         days = time_left.days
         hours, remainder = divmod(time_left.seconds, 3600)
-        minutes, _ = divmod(remainder, 60)
+        minutes = remainder // 60
         
         if days > 0:
             return f"{days}d {hours}h {minutes}m"
@@ -112,15 +289,93 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
             return f"{minutes}m"
 
     time_until_kick.short_description = _('Time Until Kick')
+    time_until_kick.admin_order_field = 'kick_scheduled_at'
+
+    def get_urls(self):
+        urls = [
+            path(
+                'jobs/<str:job_id>/', self.admin_site.admin_view(self.job_progress_view),
+                name='discord_onboarding_autokickschedule_job'
+            ),
+            path(
+                'forecast/', self.admin_site.admin_view(self.forecast_view),
+                name='discord_onboarding_autokickschedule_forecast'
+            ),
+            path(
+                'health/', self.admin_site.admin_view(self.health_view),
+                name='discord_onboarding_autokickschedule_health'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def job_progress_view(self, request, job_id):
+        """Progress of a background admin job, refreshed until it finishes."""
+        job = get_job(job_id)
+        if job is None:
+            raise Http404(_('Job not found or expired'))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': job['description'],
+            'job': job,
+            'percent': int(job['done'] * 100 / job['total']) if job['total'] else 100,
+        }
+        return TemplateResponse(request, 'admin/discord_onboarding/job_progress.html', context)
+
+    def forecast_view(self, request):
+        """Expected reminders and kicks per hour and guild over the coming week."""
+        rows = forecast()
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _('Auto-kick load forecast'),
+            'rows': rows,
+            'hours': FORECAST_HOURS,
+            'budget': DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET,
+            'over_budget': sum(1 for row in rows if row['over_budget']),
+            'total_reminders': sum(row['reminders'] for row in rows),
+            'total_kicks': sum(row['kicks'] for row in rows),
+        }
+        return TemplateResponse(request, 'admin/discord_onboarding/forecast.html', context)
+
+    def health_view(self, request):
+        """Last run of each periodic task, scheduling lag and any warnings."""
+        result = health_report()
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _('Auto-kick processor health'),
+            'health': result,
+            'lag_minutes': int(result['scheduling_lag_seconds'] // 60),
+            'tasks': sorted(result['tasks'].items()),
+        }
+        return TemplateResponse(request, 'admin/discord_onboarding/health.html', context)
+
+    def _start_job(self, request, task, description, schedule_ids):
+        """Hand ``schedule_ids`` to ``task`` as a background job and link its progress page."""
+        job_id = start_job(description, len(schedule_ids))
+        task.delay(schedule_ids, job_id=job_id)
+        self.message_user(request, format_html(
+            '{} <a href="{}">{}</a>',
+            _(f'{description}: {len(schedule_ids)} schedules queued in the background.'),
+            reverse('admin:discord_onboarding_autokickschedule_job', args=[job_id]),
+            _('View progress')
+        ))
 
     def deactivate_schedules(self, request, queryset):
         """Deactivate selected auto-kick schedules."""
-        count = 0
-        for schedule in queryset:
-            if schedule.is_active:
-                schedule.deactivate()
-                count += 1
-        
+        active = queryset.filter(is_active=True)
+        count = active.count()
+
+        if count > BACKGROUND_THRESHOLD:
+            from .tasks import deactivate_schedules
+            self._start_job(
+                request, deactivate_schedules, _('Deactivating auto-kick schedules'),
+                list(active.values_list('id', flat=True))
+            )
+            return
+
+        count = active.deactivate()
         self.message_user(request, _(f'Deactivated {count} auto-kick schedules.'))
 
     deactivate_schedules.short_description = _('Deactivate selected schedules')
@@ -135,7 +390,7 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
         
         try:
             # Delete the selected schedules
-            deleted_count, _ = queryset.delete()
+            deleted_count = counters.delete_counted(queryset)
             
             import logging
             logger = logging.getLogger(__name__)
@@ -153,14 +408,18 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
 
     def send_reminder_now(self, request, queryset):
         """Send reminder DM to selected users immediately."""
-        from .tasks import send_onboarding_reminder
-        
-        count = 0
-        for schedule in queryset.filter(is_active=True):
-            send_onboarding_reminder.delay(schedule.id)
-            count += 1
-        
-        self.message_user(request, _(f'Queued {count} reminder messages.'))
+        from .tasks import send_onboarding_reminders
+
+        schedule_ids = list(queryset.filter(is_active=True).values_list('id', flat=True))
+
+        if len(schedule_ids) > BACKGROUND_THRESHOLD:
+            self._start_job(request, send_onboarding_reminders, _('Sending reminders'), schedule_ids)
+            return
+
+        # One task for the whole selection instead of one per schedule
+        if schedule_ids:
+            send_onboarding_reminders.delay(schedule_ids)
+        self.message_user(request, _(f'Queued {len(schedule_ids)} reminder messages.'))
 
     send_reminder_now.short_description = _('Send reminder now')
 
@@ -215,7 +474,7 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
         try:
             # Get all active schedules, not just the queryset
             all_active_schedules = AutoKickSchedule.objects.filter(is_active=True)
-            total_count = all_active_schedules.count()
+            total_count = counters.get_count(counters.ACTIVE_SCHEDULES)
 
             if total_count == 0:
                 self.message_user(request, _('No active auto-kick schedules found to clear.'))
@@ -224,7 +483,7 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
             # Delete all active schedules permanently
             try:
                 # Use bulk delete for efficiency
-                deleted_count, _ = AutoKickSchedule.objects.filter(is_active=True).delete()
+                deleted_count = counters.delete_counted(AutoKickSchedule.objects.filter(is_active=True))
                 
                 import logging
                 logger = logging.getLogger(__name__)
@@ -246,7 +505,7 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
                 
                 for schedule in all_active_schedules:
                     try:
-                        schedule.delete()
+                        counters.delete_instance(schedule)
                         deleted_count += 1
                     except Exception as individual_error:
                         failed_count += 1
@@ -271,3 +530,56 @@ class AutoKickScheduleAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Schedules should be created by the bot, not manually
         return False
+
+
+@admin.register(DMDeliveryStatus)
+class DMDeliveryStatusAdmin(ExactSearchMixin, admin.ModelAdmin):
+    list_display = (
+        'discord_id',
+        'guild_id',
+        'last_failure_reason',
+        'last_failure_at',
+        'failure_count',
+        'fallback_pending'
+    )
+    list_filter = ('last_failure_reason', 'fallback_pending')
+    search_fields = ()
+    id_search_fields = ('discord_id',)
+    ordering = ('-last_failure_at',)
+
+    def has_add_permission(self, request):
+        # Statuses are recorded by the bot when DMs fail
+        return False
+
+
+@admin.register(AutoKickDailySummary)
+class AutoKickDailySummaryAdmin(ExactSearchMixin, admin.ModelAdmin):
+    list_display = ('date', 'guild_id', 'authenticated', 'kicked', 'cancelled', 'reminders_sent')
+    list_filter = ('date',)
+    search_fields = ()
+    id_search_fields = ('guild_id',)
+    ordering = ('-date', 'guild_id')
+
+    def has_add_permission(self, request):
+        # Summaries are written by the compaction task
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OnboardingStageEvent)
+class OnboardingStageEventAdmin(ExactSearchMixin, admin.ModelAdmin):
+    list_display = ('correlation_id', 'discord_id', 'stage', 'seconds', 'at')
+    list_filter = ('stage', 'at')
+    search_fields = ('correlation_id',)
+    id_search_fields = ('discord_id',)
+    correlation_search_field = 'correlation_id'
+    ordering = ('-at',)
+
+    def has_add_permission(self, request):
+        # Stage events are recorded as onboardings progress
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
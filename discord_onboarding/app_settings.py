@@ -37,3 +37,76 @@ DISCORD_ONBOARDING_KICK_GOODBYE_MESSAGE = getattr(settings, 'DISCORD_ONBOARDING_
 
 # Enable/disable reminder DMs
 DISCORD_ONBOARDING_REMINDERS_ENABLED = getattr(settings, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+
+# Embed template overrides, merged over the defaults in embeds.py
+# e.g. {'reminder': {'color': 0x3498DB, 'footer': {'text': 'Reminder #{reminder_number}'}}}
+DISCORD_ONBOARDING_EMBED_TEMPLATES = getattr(settings, 'DISCORD_ONBOARDING_EMBED_TEMPLATES', {})
+
+# Per-guild embed template overrides, keyed by guild ID
+# e.g. {123456789012345678: {'welcome': {'title': 'Welcome, pilot!'}}}
+DISCORD_ONBOARDING_GUILD_EMBED_TEMPLATES = getattr(settings, 'DISCORD_ONBOARDING_GUILD_EMBED_TEMPLATES', {})
+
+# Log channel digests
+# Events for the log channel are collected and posted at most once per interval (seconds).
+# A single event arriving while the log channel is quiet is still posted straight away.
+DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL = getattr(settings, 'DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL', 60)
+
+# Above this many pending events a single summary embed is posted instead of the individual embeds
+DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD = getattr(
+    settings, 'DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD', 30
+)
+
+# Discord webhook URL for log channel output
+# When set, log digests are posted through this webhook instead of the bot's task queue
+DISCORD_ONBOARDING_LOG_WEBHOOK_URL = getattr(settings, 'DISCORD_ONBOARDING_LOG_WEBHOOK_URL', None)
+
+# Maximum webhook requests per minute (Discord allows 30 per minute per webhook)
+DISCORD_ONBOARDING_LOG_WEBHOOK_RATE_LIMIT = getattr(settings, 'DISCORD_ONBOARDING_LOG_WEBHOOK_RATE_LIMIT', 30)
+
+# Hours to stop sending DMs to a user after a DM to them failed (e.g. DMs disabled)
+DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS = getattr(settings, 'DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS', 72)
+
+# Channel for mentioning users who can't receive DMs, either one channel ID
+# or a dict of {guild_id: channel_id}. Mentions are batched into one message per guild.
+DISCORD_ONBOARDING_WELCOME_CHANNEL_ID = getattr(settings, 'DISCORD_ONBOARDING_WELCOME_CHANNEL_ID', None)
+
+# Circuit breaker for bot tasks: consecutive Discord 5xx/429 responses before calls are deferred
+DISCORD_ONBOARDING_CIRCUIT_FAILURE_THRESHOLD = getattr(settings, 'DISCORD_ONBOARDING_CIRCUIT_FAILURE_THRESHOLD', 5)
+
+# Seconds the circuit stays open before a single probe call is let through
+DISCORD_ONBOARDING_CIRCUIT_OPEN_SECONDS = getattr(settings, 'DISCORD_ONBOARDING_CIRCUIT_OPEN_SECONDS', 300)
+
+# Target number of outstanding onboarding tasks on the aadiscordbot queue.
+# The auto-kick processor only queues as many reminders and kicks per run as fit under it.
+DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH = getattr(settings, 'DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH', 500)
+
+# Route onboarding tasks to the dedicated discord_onboarding_high/bulk/low Celery queues.
+# Only enable this once workers consume those queues (see README), otherwise the tasks are never run.
+DISCORD_ONBOARDING_TASK_QUEUES = getattr(settings, 'DISCORD_ONBOARDING_TASK_QUEUES', False)
+
+# Split each auto-kick processor run into this many shard tasks (by schedule ID) that run in parallel
+DISCORD_ONBOARDING_PROCESSOR_SHARDS = getattr(settings, 'DISCORD_ONBOARDING_PROCESSOR_SHARDS', 1)
+
+# Days to keep deactivated auto-kick schedules before they are folded into daily summaries and deleted
+DISCORD_ONBOARDING_SCHEDULE_RETENTION_DAYS = getattr(settings, 'DISCORD_ONBOARDING_SCHEDULE_RETENTION_DAYS', 30)
+
+# Discord actions (reminder DMs, goodbye DMs and kicks) per guild and hour the forecast treats as safe.
+# Forecast hours above it are flagged; 0 disables the check.
+DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET = getattr(
+    settings, 'DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET', 500
+)
+
+# Bearer token for scraping /discord-onboarding/metrics/ (superusers can always view it)
+DISCORD_ONBOARDING_METRICS_TOKEN = getattr(settings, 'DISCORD_ONBOARDING_METRICS_TOKEN', None)
+
+# Days to keep onboarding stage events (per-stage timings of each onboarding)
+DISCORD_ONBOARDING_STAGE_EVENT_RETENTION_DAYS = getattr(settings, 'DISCORD_ONBOARDING_STAGE_EVENT_RETENTION_DAYS', 30)
+
+# Health warnings: minutes the oldest due reminder or kick may be behind,
+# and seconds a periodic task run may take. 0 disables the check.
+DISCORD_ONBOARDING_LAG_WARNING_MINUTES = getattr(settings, 'DISCORD_ONBOARDING_LAG_WARNING_MINUTES', 30)
+DISCORD_ONBOARDING_TICK_WARNING_SECONDS = getattr(settings, 'DISCORD_ONBOARDING_TICK_WARNING_SECONDS', 900)
+
+# Share of requests to the onboarding views profiled for query count, database time and wall time,
+# from 0 (off) to 1 (every request). Profiles are logged and exposed as metrics.
+DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE = getattr(settings, 'DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE', 0)
@@ -0,0 +1,105 @@
+"""Backpressure on the aadiscordbot task queue.
+
+Every onboarding bot task is queued through ``enqueue_bot_task``, which bumps
+an in-cache counter of outstanding ``run_task_function`` calls; the bot task
+decrements it again when it finishes (see ``tracks_outstanding``).  The
+auto-kick processor reads the counter, together with the broker queue length
+where the broker exposes it, and only queues as much work per run as fits
+under ``DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH``.  Whatever doesn't fit is
+picked up on the next run, so interactive bot work never waits behind
+thousands of reminders.
+"""
+
+import functools
+import logging
+
+from django.core.cache import cache
+
+from . import metrics
+from .app_settings import DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH
+
+logger = logging.getLogger(__name__)
+
+OUTSTANDING_KEY = 'discord_onboarding_bot_outstanding'
+
+# The counter expires if nothing is queued for this long, so a bot restart
+# that dropped in-flight tasks can't leave it stuck high forever.
+OUTSTANDING_TIMEOUT = 60 * 60
+
+# Redis keys aadiscordbot's queue is spread over (one per priority)
+BOT_QUEUE_KEYS = ["aadiscordbot"] + [f"aadiscordbot\x06\x16{priority}" for priority in range(1, 10)]
+
+
+def enqueue_bot_task(function, task_args, task_kwargs=None, countdown=None):
+    """Queue ``discord_onboarding.bot_tasks.<function>`` on the bot and count it as outstanding."""
+
+    from aadiscordbot import tasks as discord_tasks
+
+    try:
+        cache.add(OUTSTANDING_KEY, 0, timeout=OUTSTANDING_TIMEOUT)
+        cache.incr(OUTSTANDING_KEY)
+        cache.touch(OUTSTANDING_KEY, OUTSTANDING_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"Unable to count outstanding bot task: {e}")
+
+    kwargs = {
+        'function': f'discord_onboarding.bot_tasks.{function}',
+        'task_args': task_args,
+        'task_kwargs': task_kwargs or {},
+    }
+    if countdown:
+        discord_tasks.run_task_function.apply_async(kwargs=kwargs, countdown=countdown)
+    else:
+        discord_tasks.run_task_function.delay(**kwargs)
+
+
+def task_finished():
+    """Mark one outstanding bot task as done."""
+    try:
+        if cache.decr(OUTSTANDING_KEY) < 0:
+            cache.set(OUTSTANDING_KEY, 0, timeout=OUTSTANDING_TIMEOUT)
+    except ValueError:
+        # Counter expired, nothing to decrement
+        pass
+    except Exception as e:
+        logger.debug(f"Unable to update outstanding bot task count: {e}")
+
+
+def tracks_outstanding(func):
+    """Decorate a bot task so it decrements the outstanding counter when done."""
+
+    @functools.wraps(func)
+    async def wrapper(bot, *args, **kwargs):
+        try:
+            with metrics.BOT_TASK_SECONDS.time(task=func.__name__):
+                return await func(bot, *args, **kwargs)
+        finally:
+            task_finished()
+
+    return wrapper
+
+
+def broker_queue_depth():
+    """Messages waiting in the bot's broker queue, or None if the broker can't tell us."""
+    try:
+        from celery import current_app
+        with current_app.connection_for_read() as connection:
+            client = getattr(connection.default_channel, 'client', None)
+            if client is None or not hasattr(client, 'llen'):
+                return None
+            return sum(client.llen(key) for key in BOT_QUEUE_KEYS)
+    except Exception as e:
+        logger.debug(f"Unable to read broker queue depth: {e}")
+        return None
+
+
+def outstanding_bot_tasks():
+    """Best estimate of bot tasks queued or running right now."""
+    counted = max(cache.get(OUTSTANDING_KEY) or 0, 0)
+    broker = broker_queue_depth()
+    return max(counted, broker or 0)
+
+
+def available_bot_capacity():
+    """How many more bot tasks can be queued without passing the target depth."""
+    return max(DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH - outstanding_bot_tasks(), 0)
@@ -2,12 +2,43 @@
 
 import logging
 
+from .backpressure import enqueue_bot_task, tracks_outstanding
+from .delivery import queue_dm_fallback, record_dm_failure
+from .embeds import DEFAULT_GUILD_NAME, render_embed
+from .idempotency import claim_side_effect, release_side_effect
+from .models import DMDeliveryStatus
+from .ratelimit import DEFERRED, discord_limiter
+
 logger = logging.getLogger(__name__)
 
+# Times a bot task is rescheduled while Discord is unavailable before giving up
+MAX_DEFERRALS = 5
+
+
+def _defer(function, task_args, attempt, route=None, idempotency_key=None):
+    """Reschedule a bot task once the rate limiter or circuit lets traffic through again."""
+
+    # The side effect didn't happen, let the rescheduled task (or a redelivery) claim it again
+    release_side_effect(idempotency_key)
 
-async def kick_user_from_guild(bot, guild_id, user_id, reason):
+    if attempt >= MAX_DEFERRALS:
+        logger.error(f"Giving up on {function} {task_args} after {attempt} deferrals")
+        return DEFERRED
+
+    countdown = max(discord_limiter.retry_after(route), 1)
+    task_kwargs = {'attempt': attempt + 1, 'idempotency_key': idempotency_key}
+    enqueue_bot_task(function, task_args, task_kwargs, countdown=countdown)
+    logger.info(f"Deferred {function} {task_args} for {countdown:.0f}s (attempt {attempt + 1})")
+    return DEFERRED
+
+
+@tracks_outstanding
+async def kick_user_from_guild(bot, guild_id, user_id, reason, attempt=0, idempotency_key=None):
     """Bot task to kick a user from a Discord guild."""
-    
+
+    if not claim_side_effect(idempotency_key):
+        return False
+
     try:
         guild = bot.get_guild(int(guild_id))
         if not guild:
@@ -34,7 +65,9 @@ async def kick_user_from_guild(bot, guild_id, user_id, reason):
             return False
 
         # Perform the kick
-        await member.kick(reason=reason)
+        route = f"kick:{guild_id}"
+        if await discord_limiter.call(route, lambda: member.kick(reason=reason)) == DEFERRED:
+            return _defer('kick_user_from_guild', [guild_id, user_id, reason], attempt, route, idempotency_key)
         logger.info(f"Successfully kicked user {user_id} from guild {guild_id}: {reason}")
         return True
 
@@ -59,58 +92,50 @@ async def check_user_in_guild(bot, guild_id, user_id):
         return False
 
 
-async def send_reminder_with_guild_context(bot, schedule_id, onboarding_url, reminder_number, kick_time):
+@tracks_outstanding
+async def send_reminder_with_guild_context(bot, schedule_id, onboarding_url, reminder_number, kick_time, attempt=0,
+                                           idempotency_key=None):
     """Send reminder DM with guild name context."""
-    
+
+    if not claim_side_effect(idempotency_key):
+        return False
+
     try:
         from discord_onboarding.models import AutoKickSchedule
         schedule = AutoKickSchedule.objects.get(id=schedule_id)
         
         # Get guild name
         guild = bot.get_guild(int(schedule.guild_id))
-        guild_name = guild.name if guild else "the Discord server"
+        guild_name = guild.name if guild else DEFAULT_GUILD_NAME
         
-        embed_data = {
-            "title": f"{guild_name} Authentication Reminder #{reminder_number}",
-            "description": (
-                f"# **ACTION REQUIRED**\n\n"
-                f"You still need to authenticate your Discord account to maintain access to **{guild_name}**.\n\n"
-                f"**Time remaining:** You have until **{kick_time}** "
-                f"to complete authentication, or you will be automatically removed from the server.\n\n"
-            ),
-            "color": 0xFF6B35,  # Orange color for warning
-            "fields": [
-                {
-                    "name": "**CLICK THE LINK BELOW TO AUTHENTICATE NOW**",
-                    "value": f"[**AUTHENTICATE NOW**]({onboarding_url})\n\n",
-                    "inline": False
-                },
-                {
-                    "name": "What happens if I don't authenticate?",
-                    "value": (
-                        f"• You will be automatically removed from **{guild_name}**\n"
-                        "• You can rejoin anytime and authenticate then\n"
-                        "• No penalties - just complete the process when ready"
-                    ),
-                    "inline": False
-                }
-            ],
-            "footer": {
-                "text": f"This is reminder #{reminder_number}. Link expires in 1 hour."
-            }
-        }
+        embed_data = render_embed('reminder', {
+            'onboarding_url': onboarding_url,
+            'reminder_number': reminder_number,
+            'kick_time': kick_time,
+        }, guild_id=schedule.guild_id, guild_name=guild_name)
 
         # Send the DM
-        user_object = await bot.fetch_user(schedule.discord_id)
+        from discord import Embed, Forbidden
+        task_args = [schedule_id, onboarding_url, reminder_number, kick_time]
+        user_object = await discord_limiter.call('users', lambda: bot.fetch_user(schedule.discord_id))
+        if user_object == DEFERRED:
+            return _defer('send_reminder_with_guild_context', task_args, attempt, 'users', idempotency_key)
         if user_object.can_send():
-            await user_object.create_dm()
-            from discord import Embed
             embed = Embed.from_dict(embed_data)
-            await user_object.send("", embed=embed)
+            try:
+                if await discord_limiter.call('dm', lambda: user_object.send("", embed=embed)) == DEFERRED:
+                    return _defer('send_reminder_with_guild_context', task_args, attempt, 'dm', idempotency_key)
+            except Forbidden:
+                logger.warning(f"Reminder DM to {schedule.discord_id} forbidden - DMs disabled")
+                record_dm_failure(schedule.discord_id, DMDeliveryStatus.REASON_FORBIDDEN, schedule.guild_id)
+                queue_dm_fallback(schedule.discord_id, schedule.guild_id)
+                return False
             logger.info(f"Sent reminder #{reminder_number} to {schedule.discord_username} with {guild_name} context")
             return True
         else:
             logger.error(f"Unable to DM user {schedule.discord_id}")
+            record_dm_failure(schedule.discord_id, DMDeliveryStatus.REASON_CANNOT_SEND, schedule.guild_id)
+            queue_dm_fallback(schedule.discord_id, schedule.guild_id)
             return False
 
     except Exception as e:
@@ -118,39 +143,69 @@ async def send_reminder_with_guild_context(bot, schedule_id, onboarding_url, rem
         return False
 
 
-async def send_goodbye_with_guild_context(bot, schedule_id, goodbye_message):
+@tracks_outstanding
+async def send_goodbye_with_guild_context(bot, schedule_id, goodbye_message, attempt=0, idempotency_key=None):
     """Send goodbye DM with guild name context."""
-    
+
+    if not claim_side_effect(idempotency_key):
+        return False
+
     try:
         from discord_onboarding.models import AutoKickSchedule
         schedule = AutoKickSchedule.objects.get(id=schedule_id)
         
         # Get guild name
         guild = bot.get_guild(int(schedule.guild_id))
-        guild_name = guild.name if guild else "the Discord server"
+        guild_name = guild.name if guild else DEFAULT_GUILD_NAME
         
-        goodbye_embed = {
-            "title": f"Goodbye from {guild_name}",
-            "description": goodbye_message,
-            "color": 0xFF0000,  # Red color
-            "footer": {
-                "text": f"You're welcome to rejoin {guild_name} anytime and complete authentication then!"
-            }
-        }
+        goodbye_embed = render_embed(
+            'goodbye',
+            {'goodbye_message': goodbye_message},
+            guild_id=schedule.guild_id,
+            guild_name=guild_name
+        )
 
         # Send the DM
-        user_object = await bot.fetch_user(schedule.discord_id)
+        from discord import Embed, Forbidden
+        task_args = [schedule_id, goodbye_message]
+        user_object = await discord_limiter.call('users', lambda: bot.fetch_user(schedule.discord_id))
+        if user_object == DEFERRED:
+            return _defer('send_goodbye_with_guild_context', task_args, attempt, 'users', idempotency_key)
         if user_object.can_send():
-            await user_object.create_dm()
-            from discord import Embed
             embed = Embed.from_dict(goodbye_embed)
-            await user_object.send("", embed=embed)
+            try:
+                if await discord_limiter.call('dm', lambda: user_object.send("", embed=embed)) == DEFERRED:
+                    return _defer('send_goodbye_with_guild_context', task_args, attempt, 'dm', idempotency_key)
+            except Forbidden:
+                logger.warning(f"Goodbye DM to {schedule.discord_id} forbidden - DMs disabled")
+                record_dm_failure(schedule.discord_id, DMDeliveryStatus.REASON_FORBIDDEN, schedule.guild_id)
+                return False
             logger.info(f"Sent goodbye message to {schedule.discord_username} from {guild_name}")
             return True
         else:
             logger.error(f"Unable to send goodbye DM to user {schedule.discord_id}")
+            record_dm_failure(schedule.discord_id, DMDeliveryStatus.REASON_CANNOT_SEND, schedule.guild_id)
             return False
 
     except Exception as e:
         logger.error(f"Error sending goodbye with guild context: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+@tracks_outstanding
+async def send_channel_embeds(bot, channel_id, embeds):
+    """Send a list of embeds (at most 10) to a channel as a single message."""
+
+    try:
+        channel = bot.get_channel(int(channel_id))
+        if not channel:
+            channel = await bot.fetch_channel(int(channel_id))
+
+        from discord import Embed
+        await channel.send(embeds=[Embed.from_dict(embed) for embed in embeds])
+        logger.info(f"Sent {len(embeds)} log embeds to channel {channel_id}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error sending log embeds to channel {channel_id}: {e}")
+        return False
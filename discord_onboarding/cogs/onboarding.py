@@ -12,12 +12,15 @@ from aadiscordbot.app_settings import get_site_url
 from aadiscordbot import app_settings as bot_settings
 from allianceauth.services.modules.discord.models import DiscordUser
 
+from .. import counters, metrics, tracing
 from ..app_settings import (
     DISCORD_ONBOARDING_ADMIN_ROLES, 
     DISCORD_ONBOARDING_BASE_URL,
     DISCORD_ONBOARDING_AUTO_KICK_ENABLED
 )
-from ..models import OnboardingToken, AutoKickSchedule
+from ..delivery import is_dm_undeliverable, queue_dm_fallback, record_dm_failure
+from ..embeds import render_embed
+from ..models import OnboardingToken, OnboardingStageEvent, AutoKickSchedule, DMDeliveryStatus
 
 logger = logging.getLogger(__name__)
 
@@ -45,16 +48,11 @@ class OnboardingCog(commands.Cog):
             return  # Don't send DMs to bots
 
         try:
-            # Create onboarding token
             username = (
                 f"{member.name}#{member.discriminator}"
                 if member.discriminator != '0'
                 else f"@{member.name}"
             )
-            token = OnboardingToken.objects.create(
-                discord_id=member.id,
-                discord_username=username
-            )
 
             # Create auto-kick schedule if enabled
             if DISCORD_ONBOARDING_AUTO_KICK_ENABLED:
@@ -70,68 +68,58 @@ class OnboardingCog(commands.Cog):
                 except Exception as e:
                     logger.error(f"Failed to create auto-kick schedule for {username}: {e}")
 
+            # Skip the DM for users whose DMs failed recently, mention them instead.
+            # They get their link from /bind, so no token or embed is needed.
+            if is_dm_undeliverable(member.id):
+                queue_dm_fallback(member.id, member.guild.id)
+                logger.info(
+                    f"Skipped onboarding DM to {member.name}#{member.discriminator} "
+                    f"(ID: {member.id}) - DMs recently undeliverable"
+                )
+                return
+
+            # Create onboarding token
+            token = OnboardingToken.objects.create(
+                discord_id=member.id,
+                discord_username=username
+            )
+
             # Create onboarding URL
             base_url = DISCORD_ONBOARDING_BASE_URL or get_site_url()
             onboarding_url = f"{base_url}/discord-onboarding/start/{token.token}/"
 
             # Create embed for DM
-            embed = Embed(
-                title=f"Welcome to {member.guild.name}",
-                description=(
-                    "**AUTHENTICATION REQUIRED**\n\n"
-                    f"To gain access to all channels and features in **{member.guild.name}**, you need to link "
-                    "your Discord account with our Alliance Auth system.\n\n"
-                ),
-                color=Color.gold()
-            )
-
-            embed.add_field(
-                name="**CLICK THE LINK BELOW TO GET STARTED**",
-                value=(
-                    f"\n\n[**START AUTHENTICATION NOW**]({onboarding_url})\n\n"
-                ),
-                inline=False
-            )
-
-            embed.add_field(
-                name="What happens next?",
-                value=(
-                    "• You'll be redirected to EVE Online SSO to verify your identity\n"
-		    "• **No Private EVE Data is gathered, only public data**\n"
-                    "• Your Discord account will be linked to your EVE character\n"
-                    "• You'll automatically receive appropriate roles and access"
-                ),
-                inline=False
-            )
-
-            embed.add_field(
-                name="Need Help?",
-                value=(
-                    f"If you have any issues with {member.guild.name} authentication, please contact an administrator or use the "
-                    "`/bind` command to get a new authentication link."
-                ),
-                inline=False
-            )
-
-            embed.set_footer(text="This link will expire in 1 hour for security reasons.")
+            embed = Embed.from_dict(render_embed(
+                'welcome',
+                {'onboarding_url': onboarding_url},
+                guild_id=member.guild.id,
+                guild_name=member.guild.name
+            ))
 
             # Send DM to the user
             try:
                 await member.send(embed=embed)
+                if member.joined_at:
+                    metrics.JOIN_TO_DM_SECONDS.observe((discord.utils.utcnow() - member.joined_at).total_seconds())
+                tracing.record_stage(token, OnboardingStageEvent.STAGE_DM_SENT)
                 logger.info(
-                    f"Sent onboarding DM to {member.name}#{member.discriminator} (ID: {member.id})"
+                    f"Sent onboarding DM to {member.name}#{member.discriminator} (ID: {member.id}, "
+                    f"correlation ID: {token.correlation_id})"
                 )
             except discord.Forbidden:
                 logger.warning(
                     f"Could not send DM to {member.name}#{member.discriminator} "
                     f"(ID: {member.id}) - DMs disabled"
                 )
-                # TODO: Maybe send a message in a welcome channel instead?
+                record_dm_failure(member.id, DMDeliveryStatus.REASON_FORBIDDEN, member.guild.id)
+                queue_dm_fallback(member.id, member.guild.id)
             except discord.HTTPException as e:
                 logger.error(
                     f"Failed to send DM to {member.name}#{member.discriminator} "
                     f"(ID: {member.id}): {e}"
                 )
+                record_dm_failure(member.id, DMDeliveryStatus.REASON_HTTP_ERROR, member.guild.id)
+                queue_dm_fallback(member.id, member.guild.id)
 
         except Exception as e:
             logger.error(
@@ -183,25 +171,12 @@ class OnboardingCog(commands.Cog):
             onboarding_url = f"{base_url}/discord-onboarding/start/{token.token}/"
 
             # Create embed for response
-            embed = Embed(
-                title="Your Personal Authentication Link",
-                description=(
-                    "**AUTHENTICATION LINK READY**\n\n"
-                ),
-                color=Color.green()
-            )
-
-            embed.add_field(
-                name="**CLICK THE LINK BELOW TO AUTHENTICATE**",
-                value=(
-                    f"[**CLICK HERE TO AUTHENTICATE**]({onboarding_url})\n\n"
-                ),
-                inline=False
-            )
-
-            embed.set_footer(
-                text="This link will expire in 1 hour. Only you can see this message."
-            )
+            embed = Embed.from_dict(render_embed(
+                'bind',
+                {'onboarding_url': onboarding_url},
+                guild_id=ctx.guild_id,
+                guild_name=ctx.guild.name if ctx.guild else None
+            ))
 
             await ctx.respond(embed=embed, ephemeral=True)
             logger.info(
@@ -235,6 +210,14 @@ class OnboardingCog(commands.Cog):
             )
             return
 
+        if is_dm_undeliverable(user.id):
+            await ctx.respond(
+                f"Could not send DM to {user.mention} - their DMs were disabled on a recent attempt. "
+                "Ask them to use `/bind` instead.",
+                ephemeral=True
+            )
+            return
+
         try:
             # Create onboarding token
             username = (
@@ -252,30 +235,17 @@ class OnboardingCog(commands.Cog):
             onboarding_url = f"{base_url}/discord-onboarding/start/{token.token}/"
 
             # Create embed for DM to target user
-            embed = Embed(
-                title=f"{ctx.guild.name} Admin Authentication Request",
-                description=(
-                    f"**AUTHENTICATION REQUIRED**\n\n"
-                    f"An administrator ({ctx.author.mention}) from **{ctx.guild.name}** has sent you an authentication "
-                    f"link to link your Discord account with Alliance Auth.\n\n"
-                ),
-                color=Color.orange()
-            )
-
-            embed.add_field(
-                name="**CLICK THE LINK BELOW TO GET STARTED**",
-                value=(
-                    f"[**CLICK HERE TO AUTHENTICATE**]({onboarding_url})\n\n"
-                    f"**Click the blue link above to get started**"
-                ),
-                inline=False
-            )
-
-            embed.set_footer(text="This link will expire in 1 hour.")
+            embed = Embed.from_dict(render_embed(
+                'auth_request',
+                {'onboarding_url': onboarding_url, 'admin_mention': ctx.author.mention},
+                guild_id=ctx.guild.id,
+                guild_name=ctx.guild.name
+            ))
 
             # Send DM to target user
             try:
                 await user.send(embed=embed)
+                tracing.record_stage(token, OnboardingStageEvent.STAGE_DM_SENT)
 
                 # Confirm to admin
                 await ctx.respond(
@@ -288,6 +258,7 @@ class OnboardingCog(commands.Cog):
                 )
 
             except discord.Forbidden:
+                record_dm_failure(user.id, DMDeliveryStatus.REASON_FORBIDDEN, ctx.guild.id)
                 await ctx.respond(
                     f"Could not send DM to {user.mention} - their DMs might be disabled.",
                     ephemeral=True
@@ -391,6 +362,7 @@ class OnboardingCog(commands.Cog):
                     # Use bulk_create for efficiency with large datasets
                     AutoKickSchedule.objects.bulk_create(schedules_to_create, batch_size=1000)
                     added_count = len(schedules_to_create)
+                    counters.adjust(counters.ACTIVE_SCHEDULES, added_count)
                     logger.info(f"Batch created {added_count} auto-kick schedules")
                 except Exception as e:
                     logger.error(f"Failed to batch create auto-kick schedules: {e}")
@@ -436,7 +408,7 @@ class OnboardingCog(commands.Cog):
         try:
             # Get count of active schedules before clearing
             active_schedules = AutoKickSchedule.objects.filter(is_active=True)
-            total_count = active_schedules.count()
+            total_count = counters.get_count(counters.ACTIVE_SCHEDULES)
 
             if total_count == 0:
                 embed = Embed(
@@ -449,7 +421,7 @@ class OnboardingCog(commands.Cog):
             # Delete all active schedules from database
             try:
                 # Use bulk delete for efficiency
-                deleted_count, _ = AutoKickSchedule.objects.filter(is_active=True).delete()
+                deleted_count = counters.delete_counted(AutoKickSchedule.objects.filter(is_active=True))
                 logger.info(f"Bulk deleted {deleted_count} auto-kick schedules from database")
             except Exception as e:
                 logger.error(f"Failed to bulk delete schedules: {e}")
@@ -457,7 +429,7 @@ class OnboardingCog(commands.Cog):
                 deleted_count = 0
                 for schedule in active_schedules:
                     try:
-                        schedule.delete()
+                        counters.delete_instance(schedule)
                         deleted_count += 1
                         logger.info(f"Deleted auto-kick schedule for {schedule.discord_username} (ID: {schedule.discord_id})")
                     except Exception as individual_error:
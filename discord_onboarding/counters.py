@@ -0,0 +1,130 @@
+"""Running counts of schedules and tokens.
+
+``OnboardingCounter`` holds one row per count. The ``post_save`` receivers in
+``signals.py`` keep them up to date row by row. Paths that bypass signals
+(``bulk_create``, ``update``) call ``adjust()`` themselves, and inside
+``batched()`` their changes are summed and written once. Deletes go through
+``delete_counted()`` or ``delete_instance()``: a ``post_delete`` receiver
+would turn off Django's fast delete and send a signal per row, so bulk
+deletes count the rows they remove from one aggregate instead. Deletes that
+bypass both, like a cascade from a deleted user, leave the counters off until
+``recount()``, which rebuilds every counter from the tables daily.
+"""
+
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.models import F
+
+from .models import AutoKickSchedule, OnboardingCounter, OnboardingToken
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_SCHEDULES = OnboardingCounter.ACTIVE_SCHEDULES
+INACTIVE_SCHEDULES = OnboardingCounter.INACTIVE_SCHEDULES
+PENDING_TOKENS = OnboardingCounter.PENDING_TOKENS
+USED_TOKENS = OnboardingCounter.USED_TOKENS
+
+# Counters that add up to the size of each table
+MODEL_COUNTERS = {
+    AutoKickSchedule: (ACTIVE_SCHEDULES, INACTIVE_SCHEDULES),
+    OnboardingToken: (PENDING_TOKENS, USED_TOKENS),
+}
+
+# The flag that splits each counted model between its counters, and the counters for True and False
+COUNTED_FLAGS = {
+    AutoKickSchedule: ('is_active', ACTIVE_SCHEDULES, INACTIVE_SCHEDULES),
+    OnboardingToken: ('used', USED_TOKENS, PENDING_TOKENS),
+}
+
+_local = threading.local()
+
+
+def recount():
+    """Rebuild all counters from the tables."""
+    values = {
+        ACTIVE_SCHEDULES: AutoKickSchedule.objects.filter(is_active=True).count(),
+        INACTIVE_SCHEDULES: AutoKickSchedule.objects.filter(is_active=False).count(),
+        PENDING_TOKENS: OnboardingToken.objects.filter(used=False).count(),
+        USED_TOKENS: OnboardingToken.objects.filter(used=True).count(),
+    }
+    for name, value in values.items():
+        OnboardingCounter.objects.update_or_create(name=name, defaults={'value': value})
+    return values
+
+
+def _write(deltas):
+    for name, delta in deltas.items():
+        if delta and not OnboardingCounter.objects.filter(name=name).update(value=F('value') + delta):
+            # Missing counter row, rebuild them all from scratch
+            recount()
+            return
+
+
+def adjust(name, delta):
+    """Add ``delta`` to a counter."""
+    deltas = getattr(_local, 'deltas', None)
+    if deltas is not None:
+        deltas[name] += delta
+    else:
+        _write({name: delta})
+
+
+@contextmanager
+def batched():
+    """Collect counter changes and write them once when the block ends."""
+    outer = getattr(_local, 'deltas', None)
+    _local.deltas = Counter()
+    try:
+        yield
+    finally:
+        deltas, _local.deltas = _local.deltas, outer
+        if outer is not None:
+            outer.update(deltas)
+        else:
+            _write(deltas)
+
+
+def delete_counted(queryset):
+    """Delete ``queryset`` of a counted model and take its rows off the counters.
+
+    The rows with the flag set are counted before the delete, the total comes
+    from what ``delete()`` reports. Returns the number of rows of the model deleted.
+    """
+    flag, true_counter, false_counter = COUNTED_FLAGS[queryset.model]
+    flagged = queryset.filter(**{flag: True}).count()
+    _, deleted = queryset.delete()
+    total = deleted.get(queryset.model._meta.label, 0)
+    flagged = min(flagged, total)
+    with batched():
+        adjust(true_counter, -flagged)
+        adjust(false_counter, flagged - total)
+    return total
+
+
+def delete_instance(instance):
+    """Delete one row of a counted model and take it off its counter."""
+    flag, true_counter, false_counter = COUNTED_FLAGS[type(instance)]
+    _, deleted = instance.delete()
+    if deleted.get(instance._meta.label):
+        adjust(true_counter if getattr(instance, flag) else false_counter, -1)
+
+
+def get_count(name):
+    counter = OnboardingCounter.objects.filter(name=name).values_list('value', flat=True).first()
+    if counter is None:
+        return recount()[name]
+    return max(counter, 0)
+
+
+def get_model_count(model):
+    """Total rows of a counted model, or None if it isn't counted."""
+    names = MODEL_COUNTERS.get(model)
+    if names is None:
+        return None
+    values = dict(OnboardingCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    if len(values) < len(names):
+        values = recount()
+    return sum(max(values[name], 0) for name in names)
@@ -0,0 +1,128 @@
+"""DM delivery tracking for Discord Onboarding.
+
+Users with DMs closed make every onboarding DM, reminder and goodbye fail with
+``Forbidden``.  Failures are recorded per Discord user in ``DMDeliveryStatus``
+and DM paths skip those users for ``DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS``.
+Instead, the user is mentioned in the configured welcome channel; mentions are
+batched into one message per guild by ``send_dm_fallback_digest``.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .app_settings import (
+    DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS,
+    DISCORD_ONBOARDING_WELCOME_CHANNEL_ID
+)
+from .models import DMDeliveryStatus
+
+logger = logging.getLogger(__name__)
+
+# Discord's message length limit
+MAX_MESSAGE_LENGTH = 2000
+
+FALLBACK_MESSAGE_HEADER = (
+    "Welcome! We couldn't send you a direct message. "
+    "Please use the `/bind` command to get your authentication link:\n"
+)
+
+
+def get_welcome_channel_id(guild_id):
+    """Return the fallback channel configured for a guild, if any."""
+    if isinstance(DISCORD_ONBOARDING_WELCOME_CHANNEL_ID, dict):
+        return DISCORD_ONBOARDING_WELCOME_CHANNEL_ID.get(guild_id) or \
+            DISCORD_ONBOARDING_WELCOME_CHANNEL_ID.get(str(guild_id))
+    return DISCORD_ONBOARDING_WELCOME_CHANNEL_ID
+
+
+def is_dm_undeliverable(discord_id):
+    """Whether a DM to this user failed recently enough to skip another attempt."""
+    cutoff = timezone.now() - timedelta(hours=DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS)
+    return DMDeliveryStatus.objects.filter(discord_id=discord_id, last_failure_at__gte=cutoff).exists()
+
+
+def record_dm_failure(discord_id, reason, guild_id=None):
+    """Record a failed DM attempt."""
+    now = timezone.now()
+    updated = DMDeliveryStatus.objects.filter(discord_id=discord_id).update(
+        last_failure_reason=reason,
+        last_failure_at=now,
+        failure_count=F('failure_count') + 1,
+    )
+    if not updated:
+        DMDeliveryStatus.objects.bulk_create([
+            DMDeliveryStatus(
+                discord_id=discord_id,
+                guild_id=guild_id,
+                last_failure_reason=reason,
+                last_failure_at=now,
+                failure_count=1,
+            )
+        ], ignore_conflicts=True)
+    metrics.DM_FAILURES.inc(reason=reason)
+    logger.debug(f"Recorded DM failure ({reason}) for Discord user {discord_id}")
+
+
+def cleanup_delivery_statuses():
+    """Delete failure records whose backoff has expired, returns the number deleted."""
+    cutoff = timezone.now() - timedelta(hours=DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS)
+    deleted, _ = DMDeliveryStatus.objects.filter(last_failure_at__lt=cutoff, fallback_pending=False).delete()
+    return deleted
+
+
+def queue_dm_fallback(discord_id, guild_id):
+    """Mention the user in the welcome channel with the next fallback digest."""
+    if not get_welcome_channel_id(guild_id):
+        return False
+    DMDeliveryStatus.objects.filter(discord_id=discord_id).update(guild_id=guild_id, fallback_pending=True)
+    return True
+
+
+def build_fallback_messages(discord_ids):
+    """Pack mentions for the given users into as few messages as possible."""
+    messages = []
+    current = FALLBACK_MESSAGE_HEADER
+    for discord_id in discord_ids:
+        mention = f"<@{discord_id}> "
+        if len(current) + len(mention) > MAX_MESSAGE_LENGTH:
+            messages.append(current.rstrip())
+            current = FALLBACK_MESSAGE_HEADER
+        current += mention
+    if current != FALLBACK_MESSAGE_HEADER:
+        messages.append(current.rstrip())
+    return messages
+
+
+def flush_dm_fallbacks():
+    """Post one mention digest per guild for users that could not be DMed.
+
+    Returns the number of users mentioned.
+    """
+    pending = DMDeliveryStatus.objects.filter(fallback_pending=True).exclude(guild_id=None)
+    rows = list(pending.order_by('guild_id', 'id').values_list('id', 'guild_id', 'discord_id'))
+    if not rows:
+        return 0
+
+    from aadiscordbot import tasks as discord_tasks
+
+    by_guild = {}
+    for row_id, guild_id, discord_id in rows:
+        by_guild.setdefault(guild_id, []).append((row_id, discord_id))
+
+    handled_ids = []
+    for guild_id, entries in by_guild.items():
+        channel_id = get_welcome_channel_id(guild_id)
+        if channel_id:
+            for message in build_fallback_messages([discord_id for _, discord_id in entries]):
+                discord_tasks.send_channel_message_by_discord_id.delay(channel_id, message)
+        else:
+            logger.warning(f"No welcome channel configured for guild {guild_id}, dropping DM fallbacks")
+        handled_ids.extend(row_id for row_id, _ in entries)
+
+    DMDeliveryStatus.objects.filter(id__in=handled_ids).update(fallback_pending=False)
+    logger.info(f"Posted DM fallback mentions for {len(handled_ids)} users in {len(by_guild)} guilds")
+    return len(handled_ids)
@@ -0,0 +1,343 @@
+"""Embed templates for Discord Onboarding messages.
+
+All embeds sent by the cog, the Celery tasks and the bot tasks are described
+here once as plain ``discord.Embed.to_dict()`` style dicts whose strings may
+contain ``str.format`` placeholders.  Templates are compiled when the module is
+imported; the parts that only depend on the guild (``{guild_name}``) are
+rendered once per guild and cached, so building a payload for a single user
+only formats the handful of strings that carry per-user values.
+
+Templates can be overridden globally with ``DISCORD_ONBOARDING_EMBED_TEMPLATES``
+or per guild with ``DISCORD_ONBOARDING_GUILD_EMBED_TEMPLATES``.  Overrides are
+merged key by key over the defaults, so ``{'reminder': {'color': 0x3498DB}}``
+only changes the colour of the reminder embed.  Literal braces in overridden
+text must be doubled (``{{`` and ``}}``).
+"""
+
+import copy
+import string
+from functools import lru_cache
+
+from .app_settings import (
+    DISCORD_ONBOARDING_EMBED_TEMPLATES,
+    DISCORD_ONBOARDING_GUILD_EMBED_TEMPLATES
+)
+
+DEFAULT_GUILD_NAME = "the Discord server"
+
+# Placeholders that are resolved once per guild and cached
+GUILD_CONTEXT_KEYS = frozenset({'guild_name'})
+
+DEFAULT_EMBED_TEMPLATES = {
+    'welcome': {
+        "title": "Welcome to {guild_name}",
+        "description": (
+            "**AUTHENTICATION REQUIRED**\n\n"
+            "To gain access to all channels and features in **{guild_name}**, you need to link "
+            "your Discord account with our Alliance Auth system.\n\n"
+        ),
+        "color": 0xF1C40F,  # Gold
+        "fields": [
+            {
+                "name": "**CLICK THE LINK BELOW TO GET STARTED**",
+                "value": "\n\n[**START AUTHENTICATION NOW**]({onboarding_url})\n\n",
+                "inline": False
+            },
+            {
+                "name": "What happens next?",
+                "value": (
+                    "• You'll be redirected to EVE Online SSO to verify your identity\n"
+                    "• **No Private EVE Data is gathered, only public data**\n"
+                    "• Your Discord account will be linked to your EVE character\n"
+                    "• You'll automatically receive appropriate roles and access"
+                ),
+                "inline": False
+            },
+            {
+                "name": "Need Help?",
+                "value": (
+                    "If you have any issues with {guild_name} authentication, please contact an administrator "
+                    "or use the `/bind` command to get a new authentication link."
+                ),
+                "inline": False
+            }
+        ],
+        "footer": {
+            "text": "This link will expire in 1 hour for security reasons."
+        }
+    },
+    'bind': {
+        "title": "Your Personal Authentication Link",
+        "description": "**AUTHENTICATION LINK READY**\n\n",
+        "color": 0x2ECC71,  # Green
+        "fields": [
+            {
+                "name": "**CLICK THE LINK BELOW TO AUTHENTICATE**",
+                "value": "[**CLICK HERE TO AUTHENTICATE**]({onboarding_url})\n\n",
+                "inline": False
+            }
+        ],
+        "footer": {
+            "text": "This link will expire in 1 hour. Only you can see this message."
+        }
+    },
+    'auth_request': {
+        "title": "{guild_name} Admin Authentication Request",
+        "description": (
+            "**AUTHENTICATION REQUIRED**\n\n"
+            "An administrator ({admin_mention}) from **{guild_name}** has sent you an authentication "
+            "link to link your Discord account with Alliance Auth.\n\n"
+        ),
+        "color": 0xE67E22,  # Orange
+        "fields": [
+            {
+                "name": "**CLICK THE LINK BELOW TO GET STARTED**",
+                "value": (
+                    "[**CLICK HERE TO AUTHENTICATE**]({onboarding_url})\n\n"
+                    "**Click the blue link above to get started**"
+                ),
+                "inline": False
+            }
+        ],
+        "footer": {
+            "text": "This link will expire in 1 hour."
+        }
+    },
+    'reminder': {
+        "title": "{guild_name} Authentication Reminder #{reminder_number}",
+        "description": (
+            "# **ACTION REQUIRED**\n\n"
+            "You still need to authenticate your Discord account to maintain access to **{guild_name}**.\n\n"
+            "**Time remaining:** You have until **{kick_time}** "
+            "to complete authentication, or you will be automatically removed from the server.\n\n"
+        ),
+        "color": 0xFF6B35,  # Orange color for warning
+        "fields": [
+            {
+                "name": "**CLICK THE LINK BELOW TO AUTHENTICATE NOW**",
+                "value": "[**AUTHENTICATE NOW**]({onboarding_url})\n\n",
+                "inline": False
+            },
+            {
+                "name": "What happens if I don't authenticate?",
+                "value": (
+                    "• You will be automatically removed from **{guild_name}**\n"
+                    "• You can rejoin anytime and authenticate then\n"
+                    "• No penalties - just complete the process when ready"
+                ),
+                "inline": False
+            }
+        ],
+        "footer": {
+            "text": "This is reminder #{reminder_number}. Link expires in 1 hour."
+        }
+    },
+    'goodbye': {
+        "title": "Goodbye from {guild_name}",
+        "description": "{goodbye_message}",
+        "color": 0xFF0000,  # Red color
+        "footer": {
+            "text": "You're welcome to rejoin {guild_name} anytime and complete authentication then!"
+        }
+    },
+    'kick_log': {
+        "title": "Auto-Kick Event",
+        "description": "User **{discord_username}** was automatically removed from the server",
+        "color": 0x808080,  # Gray color
+        "fields": [
+            {
+                "name": "Discord ID",
+                "value": "{discord_id}",
+                "inline": True
+            },
+            {
+                "name": "Joined At",
+                "value": "{joined_at}",
+                "inline": True
+            },
+            {
+                "name": "Reminders Sent",
+                "value": "{reminder_count}",
+                "inline": True
+            },
+            {
+                "name": "Reason",
+                "value": "Failed to authenticate within required timeframe",
+                "inline": False
+            }
+        ],
+        "timestamp": "{timestamp}"
+    },
+    'auth_success_log': {
+        "title": "Successful Authentication",
+        "description": "User **{discord_username}** successfully linked their Discord account",
+        "color": 0x00FF00,  # Green color
+        "fields": [
+            {
+                "name": "Discord User",
+                "value": "{discord_username}",
+                "inline": True
+            },
+            {
+                "name": "Discord ID",
+                "value": "{discord_id}",
+                "inline": True
+            },
+            {
+                "name": "Auth User",
+                "value": "{auth_username}",
+                "inline": True
+            },
+            {
+                "name": "Main Character",
+                "value": "{main_character_name}",
+                "inline": True
+            },
+            {
+                "name": "Authenticated At",
+                "value": "{authenticated_at}",
+                "inline": True
+            },
+            {
+                "name": "Status",
+                "value": "Successfully Linked",
+                "inline": True
+            }
+        ],
+        "footer": {
+            "text": "Discord Onboarding - Authentication Success"
+        },
+        "timestamp": "{timestamp}"
+    },
+    'log_digest_summary': {
+        "title": "Onboarding Activity Digest",
+        "description": "**{event_count}** onboarding events between {first_at} and {last_at}",
+        "color": 0x808080,  # Gray color
+        "footer": {
+            "text": "Discord Onboarding - Activity Digest"
+        },
+        "timestamp": "{timestamp}"
+    },
+}
+
+_formatter = string.Formatter()
+
+
+def _placeholders(text):
+    """Return the top-level placeholder names used in a format string."""
+    names = set()
+    for _, field_name, _, _ in _formatter.parse(text):
+        if field_name:
+            names.add(field_name.split('.')[0].split('[')[0])
+    return frozenset(names)
+
+
+class _Text:
+    """A template string that still needs formatting."""
+
+    __slots__ = ('text', 'keys')
+
+    def __init__(self, text, keys):
+        self.text = text
+        self.keys = keys
+
+    def is_guild_static(self):
+        return self.keys <= GUILD_CONTEXT_KEYS
+
+
+def _compile(node):
+    """Turn a template dict into a tree with literal leaves and ``_Text`` leaves."""
+    if isinstance(node, dict):
+        return {key: _compile(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_compile(value) for value in node]
+    if isinstance(node, str):
+        keys = _placeholders(node)
+        if not keys:
+            # Unescape doubled braces so the literal matches what format() would produce
+            return node.format()
+        return _Text(node, keys)
+    return node
+
+
+def _resolve(node, context, guild_only):
+    if isinstance(node, _Text):
+        if guild_only and not node.is_guild_static():
+            return node
+        return node.text.format(**context)
+    if isinstance(node, dict):
+        return {key: _resolve(value, context, guild_only) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_resolve(value, context, guild_only) for value in node]
+    return node
+
+
+def _merge(base, override):
+    merged = copy.deepcopy(base)
+    merged.update(copy.deepcopy(override))
+    return merged
+
+
+class EmbedRegistry:
+    """Compiled embed templates with per-guild overrides and caching."""
+
+    def __init__(self, templates, overrides=None, guild_overrides=None):
+        templates = dict(templates)
+        for name, override in (overrides or {}).items():
+            templates[name] = _merge(templates.get(name, {}), override)
+
+        self._templates = {name: _compile(template) for name, template in templates.items()}
+        self._guild_templates = {}
+        for guild_id, guild_templates in (guild_overrides or {}).items():
+            for name, override in guild_templates.items():
+                self._guild_templates[(int(guild_id), name)] = _compile(
+                    _merge(templates.get(name, {}), override)
+                )
+
+        self._guild_static = lru_cache(maxsize=1024)(self._build_guild_static)
+
+    def names(self):
+        return sorted(self._templates)
+
+    def _template_for(self, name, guild_id):
+        if guild_id is not None:
+            template = self._guild_templates.get((int(guild_id), name))
+            if template is not None:
+                return template
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Unknown embed template '{name}'") from None
+
+    def _build_guild_static(self, name, guild_id, guild_name):
+        template = self._template_for(name, guild_id)
+        return _resolve(template, {'guild_name': guild_name}, guild_only=True)
+
+    def render(self, name, context=None, guild_id=None, guild_name=None):
+        """Render the named template into an embed dict.
+
+        ``context`` holds the per-user values; ``guild_name`` is cached together
+        with ``guild_id`` so repeated renders for one guild only format the
+        per-user strings.
+        """
+        guild_name = guild_name or DEFAULT_GUILD_NAME
+        partial = self._guild_static(name, guild_id, guild_name)
+        full_context = {'guild_name': guild_name}
+        if context:
+            full_context.update(context)
+        return _resolve(partial, full_context, guild_only=False)
+
+    def clear_cache(self):
+        self._guild_static.cache_clear()
+
+
+embed_registry = EmbedRegistry(
+    DEFAULT_EMBED_TEMPLATES,
+    overrides=DISCORD_ONBOARDING_EMBED_TEMPLATES,
+    guild_overrides=DISCORD_ONBOARDING_GUILD_EMBED_TEMPLATES,
+)
+
+
+def render_embed(name, context=None, guild_id=None, guild_name=None):
+    """Render an embed dict from the shared template registry."""
+    return embed_registry.render(name, context, guild_id=guild_id, guild_name=guild_name)
@@ -0,0 +1,74 @@
+"""Streaming CSV/NDJSON export of onboarding tokens and auto-kick schedules.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` and written out
+one at a time, so memory use stays flat whatever the size of the export and
+the first bytes go out before the query has been fully read. Used by the
+admin export actions and the ``export_onboarding`` management command.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import AutoKickSchedule, OnboardingToken
+
+# Rows fetched from the database per round trip
+CHUNK_SIZE = 2000
+
+# Exported columns. Token values are deliberately left out, they are live credentials.
+EXPORT_FIELDS = {
+    OnboardingToken: (
+        'id', 'discord_id', 'discord_username', 'user__username', 'created_at', 'expires_at', 'used',
+    ),
+    AutoKickSchedule: (
+        'id', 'discord_id', 'discord_username', 'guild_id', 'joined_at', 'kick_scheduled_at',
+        'last_reminder_sent', 'reminder_count', 'is_active', 'deactivated_at', 'outcome',
+    ),
+}
+
+
+class _Echo:
+    """File-like object for ``csv.writer`` that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    fields = EXPORT_FIELDS[queryset.model]
+    return fields, queryset.values_list(*fields).order_by('id').iterator(chunk_size=CHUNK_SIZE)
+
+
+def csv_lines(queryset):
+    """Yield the export of ``queryset`` as CSV lines, header first."""
+    fields, rows = _rows(queryset)
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(queryset):
+    """Yield the export of ``queryset`` as one JSON object per line."""
+    fields, rows = _rows(queryset)
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+# Export format: (line generator, content type, file extension)
+FORMATS = {
+    'csv': (csv_lines, 'text/csv', 'csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson', 'ndjson'),
+}
+
+
+def streaming_response(queryset, export_format):
+    """``StreamingHttpResponse`` downloading the export of ``queryset``."""
+    lines, content_type, extension = FORMATS[export_format]
+    filename = f"{queryset.model._meta.model_name}_{timezone.now():%Y%m%d_%H%M%S}.{extension}"
+    response = StreamingHttpResponse(lines(queryset), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
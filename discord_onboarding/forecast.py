@@ -0,0 +1,91 @@
+"""Forecast of reminder and kick volume per hour and guild.
+
+Everything is aggregated in SQL from ``joined_at``, ``last_reminder_sent``
+and ``kick_scheduled_at`` of the active schedules; only the per hour and
+guild counts are returned to Python.
+
+A kick is expected at ``kick_scheduled_at``, overdue ones in the current
+hour. A schedule's next reminder is due one reminder interval after its last
+reminder (or after joining), again no earlier than now, and every interval
+after that until the kick. Hours where a guild's expected Discord actions
+(one per reminder, ``BOT_TASKS_PER_KICK`` per kick) exceed
+``DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET`` are flagged.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce, Greatest, TruncHour
+from django.utils import timezone
+
+from .app_settings import (
+    DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET,
+    DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS,
+    DISCORD_ONBOARDING_REMINDERS_ENABLED
+)
+from .models import AutoKickSchedule
+from .tasks import BOT_TASKS_PER_KICK
+
+# Default forecast window
+FORECAST_HOURS = 7 * 24
+
+
+def _hour_counts(schedules, at):
+    """``{(hour, guild_id): count}`` of ``schedules`` bucketed by the hour of expression ``at``."""
+    rows = schedules.annotate(
+        hour=TruncHour(at, output_field=DateTimeField())
+    ).values('hour', 'guild_id').annotate(count=Count('id')).order_by()
+    return {(row['hour'], row['guild_id']): row['count'] for row in rows}
+
+
+def _kick_counts(now, end):
+    schedules = AutoKickSchedule.objects.filter(is_active=True, kick_scheduled_at__lt=end)
+    return _hour_counts(schedules, Greatest('kick_scheduled_at', Value(now, output_field=DateTimeField())))
+
+
+def _reminder_counts(now, end):
+    interval = timedelta(hours=DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS)
+    first_due = Greatest(
+        ExpressionWrapper(Coalesce('last_reminder_sent', 'joined_at') + interval, output_field=DateTimeField()),
+        Value(now, output_field=DateTimeField()),
+    )
+    counts = defaultdict(int)
+    # One aggregate per upcoming reminder number, as many as fit into the window
+    for number in range(int((end - now) / interval) + 1):
+        schedules = AutoKickSchedule.objects.filter(is_active=True).annotate(
+            reminder_at=ExpressionWrapper(first_due + interval * number, output_field=DateTimeField())
+        ).filter(reminder_at__lt=end).filter(reminder_at__lt=F('kick_scheduled_at'))
+        for key, count in _hour_counts(schedules, F('reminder_at')).items():
+            counts[key] += count
+    return counts
+
+
+def forecast(hours=FORECAST_HOURS, now=None, budget=None):
+    """Expected reminders and kicks per hour and guild over the next ``hours``.
+
+    Returns dicts with ``hour``, ``guild_id``, ``reminders``, ``kicks``,
+    ``actions`` and ``over_budget``, ordered by hour and guild. Hours without
+    any expected work are left out.
+    """
+    now = now or timezone.now()
+    end = now + timedelta(hours=hours)
+    budget = DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET if budget is None else budget
+
+    kicks = _kick_counts(now, end)
+    reminders = _reminder_counts(now, end) if DISCORD_ONBOARDING_REMINDERS_ENABLED else {}
+
+    result = []
+    for hour, guild_id in sorted(set(kicks) | set(reminders)):
+        reminder_count = reminders.get((hour, guild_id), 0)
+        kick_count = kicks.get((hour, guild_id), 0)
+        actions = reminder_count + kick_count * BOT_TASKS_PER_KICK
+        result.append({
+            'hour': hour,
+            'guild_id': guild_id,
+            'reminders': reminder_count,
+            'kicks': kick_count,
+            'actions': actions,
+            'over_budget': bool(budget) and actions > budget,
+        })
+    return result
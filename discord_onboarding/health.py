@@ -0,0 +1,203 @@
+"""Heartbeats of the periodic tasks and auto-kick scheduling lag.
+
+Each periodic task is decorated with ``records_heartbeat``, which keeps its
+last run (start and end time, duration, and the rows scanned and work
+enqueued it reported with ``record_work()``) in the cache, like the admin job
+progress. ``report()`` puts those together with the
+scheduling lag, how far the oldest due reminder or kick is behind now, and
+lists warnings for stale tasks, slow runs and lag over the thresholds. It is
+served as JSON by the ``health`` view and shown in the schedule admin; the
+``check_onboarding_health`` task logs the warnings.
+"""
+
+import contextvars
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from . import metrics
+from .models import AutoKickSchedule
+from .app_settings import (
+    DISCORD_ONBOARDING_AUTO_KICK_ENABLED,
+    DISCORD_ONBOARDING_LAG_WARNING_MINUTES,
+    DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL,
+    DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS,
+    DISCORD_ONBOARDING_REMINDERS_ENABLED,
+    DISCORD_ONBOARDING_TICK_WARNING_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY = 'discord_onboarding_heartbeat_{}'
+
+# Periodic tasks and the seconds between their runs (see CELERYBEAT_SCHEDULE).
+# A task counts as stopped once it missed two runs.
+PERIODIC_TASKS = {
+    'process_auto_kick_schedules': 15 * 60,
+    'cleanup_expired_tokens': 24 * 60 * 60,
+    'compact_schedules': 24 * 60 * 60,
+    'send_dm_fallback_digest': 5 * 60,
+    'flush_log_digest': DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL,
+}
+MISSED_RUNS = 2
+
+_current_run = contextvars.ContextVar('discord_onboarding_heartbeat_run', default=None)
+
+
+def _required_tasks():
+    if DISCORD_ONBOARDING_AUTO_KICK_ENABLED:
+        return ('cleanup_expired_tokens', 'process_auto_kick_schedules')
+    return ('cleanup_expired_tokens',)
+
+
+def get_heartbeat(name):
+    return cache.get(HEARTBEAT_KEY.format(name))
+
+
+@contextmanager
+def heartbeat(name):
+    """Record a run of periodic task ``name``.
+
+    A run taking longer than ``DISCORD_ONBOARDING_TICK_WARNING_SECONDS`` logs a warning.
+    """
+    run = SimpleNamespace(scanned=0, enqueued=0)
+    key = HEARTBEAT_KEY.format(name)
+    started_at = timezone.now()
+    started = time.monotonic()
+    try:
+        cache.set(key, {**(cache.get(key) or {}), 'running_since': started_at}, timeout=None)
+    except Exception as e:
+        logger.debug(f"Unable to record start of {name}: {e}")
+
+    reset_token = _current_run.set(run)
+    error = None
+    try:
+        yield run
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _current_run.reset(reset_token)
+        duration = time.monotonic() - started
+        try:
+            cache.set(key, {
+                'started_at': started_at,
+                'finished_at': timezone.now(),
+                'duration': duration,
+                'scanned': run.scanned,
+                'enqueued': run.enqueued,
+                'error': error,
+                'running_since': None,
+            }, timeout=None)
+        except Exception as e:
+            logger.debug(f"Unable to record end of {name}: {e}")
+        if DISCORD_ONBOARDING_TICK_WARNING_SECONDS and duration > DISCORD_ONBOARDING_TICK_WARNING_SECONDS:
+            logger.warning(
+                f"{name} took {duration:.0f}s, over the {DISCORD_ONBOARDING_TICK_WARNING_SECONDS}s threshold"
+            )
+
+
+def records_heartbeat(func):
+    """Decorate a periodic task so each run is recorded as its heartbeat."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with heartbeat(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_work(scanned=0, enqueued=0):
+    """Add to the rows scanned and work enqueued by the periodic task running now."""
+    run = _current_run.get()
+    if run is not None:
+        run.scanned += scanned
+        run.enqueued += enqueued
+
+
+def scheduling_lag(now=None):
+    """Oldest due reminder or kick time and how many seconds it is behind ``now``.
+
+    Returns ``(None, 0)`` when nothing is due or auto-kick is disabled.
+    """
+    if not DISCORD_ONBOARDING_AUTO_KICK_ENABLED:
+        return None, 0
+    now = now or timezone.now()
+    active = AutoKickSchedule.objects.filter(is_active=True)
+
+    due = [active.filter(kick_scheduled_at__lte=now).aggregate(due=Min('kick_scheduled_at'))['due']]
+    if DISCORD_ONBOARDING_REMINDERS_ENABLED:
+        interval = timedelta(hours=DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS)
+        pending = active.filter(kick_scheduled_at__gt=now)
+        # One aggregate per partial index rather than a MIN over COALESCE of both columns
+        last_reminder = pending.filter(last_reminder_sent__lte=now - interval).aggregate(
+            due=Min('last_reminder_sent')
+        )['due']
+        joined = pending.filter(last_reminder_sent__isnull=True, joined_at__lte=now - interval).aggregate(
+            due=Min('joined_at')
+        )['due']
+        due += [value + interval for value in (last_reminder, joined) if value]
+
+    due = [value for value in due if value]
+    if not due:
+        return None, 0
+    oldest = min(due)
+    return oldest, max((now - oldest).total_seconds(), 0)
+
+
+def report(now=None):
+    """Heartbeats, scheduling lag and warnings, as a dict for ``JsonResponse``."""
+    now = now or timezone.now()
+    warnings = []
+
+    tasks = {}
+    for name, interval in PERIODIC_TASKS.items():
+        beat = get_heartbeat(name)
+        last_seen = beat and (beat.get('running_since') or beat.get('started_at'))
+        stale = last_seen is None or (now - last_seen).total_seconds() > interval * MISSED_RUNS
+        tasks[name] = {**(beat or {}), 'interval': interval, 'stale': stale}
+        # Optional tasks a site may leave out of its beat schedule are only watched once they ran
+        if stale and (beat or name in _required_tasks()):
+            warnings.append({
+                'check': 'stale_task', 'task': name,
+                'message': f"{name} has not run in the last {interval * MISSED_RUNS}s",
+            })
+        elif (DISCORD_ONBOARDING_TICK_WARNING_SECONDS
+              and (tasks[name].get('duration') or 0) > DISCORD_ONBOARDING_TICK_WARNING_SECONDS):
+            warnings.append({
+                'check': 'tick_duration', 'task': name,
+                'message': f"{name} last run took {beat['duration']:.0f}s",
+            })
+
+    oldest_due, lag = scheduling_lag(now)
+    if DISCORD_ONBOARDING_LAG_WARNING_MINUTES and lag > DISCORD_ONBOARDING_LAG_WARNING_MINUTES * 60:
+        warnings.append({
+            'check': 'scheduling_lag',
+            'message': f"Oldest due reminder or kick is {lag / 60:.0f} minutes behind",
+        })
+
+    return {
+        'status': 'warning' if warnings else 'ok',
+        'checked_at': now,
+        'scheduling_lag_seconds': lag,
+        'oldest_due_at': oldest_due,
+        'tasks': tasks,
+        'warnings': warnings,
+    }
+
+
+def log_warnings(now=None):
+    """Log the warnings of ``report()`` and count them, returns the report."""
+    result = report(now)
+    for warning in result['warnings']:
+        metrics.HEALTH_WARNINGS.inc(check=warning['check'])
+        logger.warning(f"Discord onboarding health: {warning['message']}")
+    return result
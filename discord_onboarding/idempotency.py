@@ -0,0 +1,59 @@
+"""Idempotency keys for Discord Onboarding side effects.
+
+Celery delivers tasks at least once, so a retried or redelivered reminder or
+kick task can queue the same DM, kick or log event twice.  Every such side
+effect gets a deterministic key, e.g. ``reminder:<schedule id>:<number>`` or
+``kick:<schedule id>``, which is claimed in ``ProcessedSideEffect`` right
+before the side effect happens.  Whoever fails to claim it skips the work.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import ProcessedSideEffect
+
+logger = logging.getLogger(__name__)
+
+# Keys only have to outlive redeliveries and deferrals, not the whole auto-kick window
+KEY_RETENTION = timedelta(days=2)
+
+
+def side_effect_key(schedule_id, action, *parts):
+    """Deterministic key for ``action`` on a schedule, e.g. ``side_effect_key(5, 'reminder', 2)``."""
+    return ':'.join(str(part) for part in (action, schedule_id) + parts)
+
+
+def is_processed(key):
+    return key is not None and ProcessedSideEffect.objects.filter(key=key).exists()
+
+
+def claim_side_effect(key):
+    """Claim ``key`` before performing its side effect.
+
+    Returns False if it was already claimed, in which case the side effect must
+    be skipped. A ``None`` key is always claimable.
+    """
+    if key is None:
+        return True
+    try:
+        _, created = ProcessedSideEffect.objects.get_or_create(key=key)
+    except IntegrityError:
+        created = False
+    if not created:
+        logger.info(f"Side effect {key} already processed, skipping")
+    return created
+
+
+def release_side_effect(key):
+    """Give up a claim whose side effect did not happen and will be retried."""
+    if key is not None:
+        ProcessedSideEffect.objects.filter(key=key).delete()
+
+
+def cleanup_processed_side_effects():
+    """Delete keys past their retention, returns the number deleted."""
+    deleted, _ = ProcessedSideEffect.objects.filter(created_at__lt=timezone.now() - KEY_RETENTION).delete()
+    return deleted
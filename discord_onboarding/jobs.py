@@ -0,0 +1,55 @@
+"""Progress of admin actions that run as background tasks.
+
+Admin actions on large selections hand their work to a Celery task instead
+of blocking the request. The job's progress lives in the cache under its ID
+(``total``, ``done`` and, once finished, ``result``) and is shown on the
+schedule admin's job progress page.
+"""
+
+import logging
+import secrets
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = 'discord_onboarding_admin_job_{}'
+
+# Finished jobs stay visible for a day
+JOB_TIMEOUT = 24 * 60 * 60
+
+# Selections larger than this are handled by a background job
+BACKGROUND_THRESHOLD = 500
+
+
+def start_job(description, total):
+    """Register a job and return its ID."""
+    job_id = secrets.token_hex(8)
+    cache.set(JOB_KEY.format(job_id), {
+        'description': description, 'total': total, 'done': 0, 'result': None,
+    }, timeout=JOB_TIMEOUT)
+    return job_id
+
+
+def get_job(job_id):
+    return cache.get(JOB_KEY.format(job_id))
+
+
+def _update(job_id, **fields):
+    if job_id is None:
+        return
+    job = get_job(job_id)
+    if job is None:
+        logger.debug(f"Admin job {job_id} expired, not recording progress")
+        return
+    job.update(fields)
+    cache.set(JOB_KEY.format(job_id), job, timeout=JOB_TIMEOUT)
+
+
+def update_job(job_id, done):
+    _update(job_id, done=done)
+
+
+def finish_job(job_id, result):
+    job = get_job(job_id) if job_id else None
+    _update(job_id, done=job['total'] if job else 0, result=result)
@@ -0,0 +1,52 @@
+"""Cache based leases for Discord Onboarding periodic work.
+
+A lease is a cache key holding a random owner token, created with
+``cache.add`` so only one worker can hold it.  The owner extends it with
+``heartbeat()`` while it works; if a worker dies the lease simply expires.
+"""
+
+import logging
+import secrets
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheLease:
+    """Exclusive, expiring ownership of ``key``."""
+
+    def __init__(self, key, ttl):
+        self.key = key
+        self.ttl = ttl
+        self.token = secrets.token_hex(8)
+        self.held = False
+
+    def acquire(self):
+        """Take the lease, returns False if someone else holds it."""
+        self.held = cache.add(self.key, self.token, timeout=self.ttl)
+        return self.held
+
+    def heartbeat(self):
+        """Extend the lease, returns False if it expired and was lost."""
+        if not self.held or cache.get(self.key) != self.token:
+            if self.held:
+                logger.warning(f"Lost lease {self.key}")
+            self.held = False
+            return False
+        cache.touch(self.key, self.ttl)
+        return True
+
+    def release(self, linger=0):
+        """Give up the lease.
+
+        With ``linger`` the lease is kept for that many more seconds instead of
+        deleted, so a duplicate trigger arriving right after the work finished
+        is still turned away.
+        """
+        if self.held and cache.get(self.key) == self.token:
+            if linger:
+                cache.touch(self.key, linger)
+            else:
+                cache.delete(self.key)
+        self.held = False
@@ -0,0 +1,152 @@
+"""Digest posting for the Discord Onboarding log channel.
+
+Auto-kick and authentication events are stored as ``PendingLogEvent`` rows and
+posted in batches instead of one channel message per event.  Up to
+``MAX_EMBEDS_PER_MESSAGE`` embeds are packed into a single message; once more
+than ``DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD`` events are waiting
+they are collapsed into one summarising embed.  When the log channel has been
+quiet for a full interval a new event triggers an immediate flush, so single
+events still show up promptly.
+
+Digests go out through the webhook transport when
+``DISCORD_ONBOARDING_LOG_WEBHOOK_URL`` is set and through the bot's task queue
+otherwise.
+"""
+
+import logging
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .app_settings import (
+    DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID,
+    DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL,
+    DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD,
+    DISCORD_ONBOARDING_LOG_WEBHOOK_URL
+)
+from .backpressure import enqueue_bot_task
+from .embeds import render_embed
+from .models import PendingLogEvent
+from .webhook import get_webhook_transport
+
+logger = logging.getLogger(__name__)
+
+# Discord allows at most 10 embeds per message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# Upper bound on events folded into a single summary embed per flush
+MAX_SUMMARY_EVENTS = 5000
+
+# Number of names listed per event type in a summary embed
+SUMMARY_SAMPLE_SIZE = 15
+
+RECENT_FLUSH_KEY = 'discord_onboarding_log_digest_recent_flush'
+FLUSH_LOCK_KEY = 'discord_onboarding_log_digest_lock'
+
+
+def is_log_output_configured():
+    """Whether log events have anywhere to go."""
+    return bool(DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID or DISCORD_ONBOARDING_LOG_WEBHOOK_URL)
+
+
+def queue_log_event(event_type, subject, embed):
+    """Store an event for the log channel and flush straight away if traffic is low."""
+
+    PendingLogEvent.objects.create(event_type=event_type, subject=subject[:100], embed=embed)
+
+    # Only the first event in a quiet interval triggers an immediate flush, the
+    # rest are picked up by the periodic flush_log_digest task.
+    if cache.add(RECENT_FLUSH_KEY, True, timeout=DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL):
+        from .tasks import flush_log_digest
+        transaction.on_commit(flush_log_digest.delay)
+
+
+def build_summary_embed(events):
+    """Build one embed summarising a list of pending events."""
+
+    type_labels = dict(PendingLogEvent.EVENT_TYPE_CHOICES)
+    counts = Counter(event.event_type for event in events)
+    samples = OrderedDict()
+    for event in events:
+        names = samples.setdefault(event.event_type, [])
+        if len(names) < SUMMARY_SAMPLE_SIZE:
+            names.append(event.subject)
+
+    embed = render_embed('log_digest_summary', {
+        'event_count': len(events),
+        'first_at': events[0].created_at.strftime('%Y-%m-%d %H:%M UTC'),
+        'last_at': events[-1].created_at.strftime('%Y-%m-%d %H:%M UTC'),
+        'timestamp': events[-1].created_at.isoformat(),
+    })
+
+    embed['fields'] = []
+    for event_type, names in samples.items():
+        remaining = counts[event_type] - len(names)
+        value = ", ".join(names)
+        if remaining > 0:
+            value += f" and {remaining} more"
+        embed['fields'].append({
+            "name": f"{type_labels.get(event_type, event_type)} ({counts[event_type]})",
+            "value": value[:1024],
+            "inline": False
+        })
+
+    return embed
+
+
+def send_log_embeds(embeds):
+    """Send up to ``MAX_EMBEDS_PER_MESSAGE`` embeds as one log channel message.
+
+    Returns False if the webhook did not accept the message, bot deliveries are
+    queued and always count as sent.
+    """
+
+    transport = get_webhook_transport()
+    if transport is not None:
+        return transport.send_embeds(embeds) == len(embeds)
+
+    enqueue_bot_task('send_channel_embeds', [DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID, embeds])
+    return True
+
+
+def flush_pending_events():
+    """Post all pending log events, returns the number of events flushed."""
+
+    if not is_log_output_configured():
+        return 0
+
+    # Only one flush at a time, the lock expires on its own if a worker dies
+    if not cache.add(FLUSH_LOCK_KEY, True, timeout=max(DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL, 60)):
+        logger.debug("Log digest flush already running")
+        return 0
+
+    try:
+        pending = PendingLogEvent.objects.order_by('id')
+        events = list(pending[:DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD + 1])
+        if not events:
+            return 0
+
+        # Events up to and including this one have been delivered
+        delivered = []
+        if len(events) > DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD:
+            events = list(pending.only('id', 'event_type', 'subject', 'created_at')[:MAX_SUMMARY_EVENTS])
+            if send_log_embeds([build_summary_embed(events)]):
+                delivered = events
+        else:
+            for start in range(0, len(events), MAX_EMBEDS_PER_MESSAGE):
+                batch = events[start:start + MAX_EMBEDS_PER_MESSAGE]
+                if not send_log_embeds([event.embed for event in batch]):
+                    logger.warning("Log digest delivery failed, remaining events will be retried")
+                    break
+                delivered.extend(batch)
+
+        if delivered:
+            PendingLogEvent.objects.filter(id__lte=delivered[-1].id).delete()
+        cache.set(RECENT_FLUSH_KEY, True, timeout=DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL)
+
+        logger.info(f"Flushed {len(delivered)} of {len(events)} pending log events")
+        return len(delivered)
+
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
@@ -4,6 +4,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 
+from discord_onboarding import counters
 from discord_onboarding.models import OnboardingToken
 
 
@@ -31,11 +32,12 @@ class Command(BaseCommand):
 
         tokens_to_delete = OnboardingToken.objects.filter(
             created_at__lt=cutoff_date
+        ).exclude(
+            reminder_schedules__is_active=True
         )
 
-        count = tokens_to_delete.count()
-
         if dry_run:
+            count = tokens_to_delete.count()
             self.stdout.write(
                 self.style.WARNING(
                     f'DRY RUN: Would delete {count} onboarding tokens older than {days} days'
@@ -46,7 +48,7 @@ class Command(BaseCommand):
             if count > 10:
                 self.stdout.write(f'  ... and {count - 10} more')
         else:
-            tokens_to_delete.delete()
+            count = counters.delete_counted(tokens_to_delete)
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Successfully deleted {count} onboarding tokens older than {days} days'
@@ -0,0 +1,90 @@
+"""Management command to export onboarding tokens or auto-kick schedules."""
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from discord_onboarding.export import FORMATS
+from discord_onboarding.models import AutoKickSchedule, OnboardingToken
+
+MODELS = {
+    'tokens': (OnboardingToken, 'created_at', ('pending', 'expired', 'used')),
+    'schedules': (AutoKickSchedule, 'joined_at', ('scheduled', 'due_for_reminder', 'due_for_kick', 'inactive')),
+}
+
+
+def _parse_date(value):
+    try:
+        return timezone.make_aware(datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time.min))
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = 'Export onboarding tokens or auto-kick schedules as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MODELS), help='What to export')
+        parser.add_argument(
+            '--format',
+            choices=sorted(FORMATS),
+            default='csv',
+            help='Output format (default: csv)',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to (default: standard output)',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only rows created (tokens) or joined (schedules) on or after this date, YYYY-MM-DD',
+        )
+        parser.add_argument(
+            '--until',
+            help='Only rows created (tokens) or joined (schedules) before this date, YYYY-MM-DD',
+        )
+        parser.add_argument(
+            '--status',
+            help='Tokens: pending, expired or used. Schedules: scheduled, due_for_reminder, due_for_kick or inactive',
+        )
+        parser.add_argument(
+            '--guild-id',
+            type=int,
+            help='Only schedules for this Discord guild',
+        )
+
+    def handle(self, *args, **options):
+        model, date_field, statuses = MODELS[options['model']]
+        queryset = model.objects.all()
+
+        if options['since']:
+            queryset = queryset.filter(**{f'{date_field}__gte': _parse_date(options['since'])})
+        if options['until']:
+            queryset = queryset.filter(**{f'{date_field}__lt': _parse_date(options['until'])})
+        if options['guild_id'] is not None:
+            if model is not AutoKickSchedule:
+                raise CommandError('--guild-id only applies to schedules')
+            queryset = queryset.filter(guild_id=options['guild_id'])
+
+        status = options['status']
+        if status:
+            if status not in statuses:
+                raise CommandError(f"Invalid status '{status}', choose from {', '.join(statuses)}")
+            if status == 'inactive':
+                queryset = queryset.filter(is_active=False)
+            else:
+                queryset = getattr(queryset, status)()
+
+        lines = FORMATS[options['format']][0]
+        if not options['output']:
+            for line in lines(queryset):
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1 if options['format'] == 'csv' else 0  # CSV starts with a header line
+        with open(options['output'], 'w', newline='') as output:
+            for line in lines(queryset):
+                output.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} {options['model']} to {options['output']}"))
@@ -0,0 +1,63 @@
+"""Management command to forecast reminder and kick volume per hour and guild."""
+
+from django.core.management.base import BaseCommand
+
+from discord_onboarding.app_settings import DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET
+from discord_onboarding.forecast import FORECAST_HOURS, forecast
+
+
+class Command(BaseCommand):
+    help = 'Forecast auto-kick reminders and kicks per hour and guild, flagging hours over the rate budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=FORECAST_HOURS,
+            help=f'Hours to forecast (default: {FORECAST_HOURS})',
+        )
+        parser.add_argument(
+            '--guild-id',
+            type=int,
+            help='Only show this Discord guild',
+        )
+        parser.add_argument(
+            '--budget',
+            type=int,
+            default=DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET,
+            help='Discord actions per guild and hour to flag above (default: '
+                 'DISCORD_ONBOARDING_FORECAST_GUILD_HOURLY_BUDGET)',
+        )
+        parser.add_argument(
+            '--over-budget',
+            action='store_true',
+            help='Only show hours over the budget',
+        )
+
+    def handle(self, *args, **options):
+        rows = forecast(hours=options['hours'], budget=options['budget'])
+        if options['guild_id'] is not None:
+            rows = [row for row in rows if row['guild_id'] == options['guild_id']]
+
+        flagged = sum(1 for row in rows if row['over_budget'])
+        if options['over_budget']:
+            rows = [row for row in rows if row['over_budget']]
+
+        self.stdout.write(f"{'Hour (UTC)':<17} {'Guild':>20} {'Reminders':>10} {'Kicks':>8} {'Actions':>8}")
+        for row in rows:
+            line = (
+                f"{row['hour']:%Y-%m-%d %H:%M} {row['guild_id']:>20} {row['reminders']:>10} "
+                f"{row['kicks']:>8} {row['actions']:>8}"
+            )
+            if row['over_budget']:
+                self.stdout.write(self.style.WARNING(f"{line}  OVER BUDGET"))
+            else:
+                self.stdout.write(line)
+
+        total_reminders = sum(row['reminders'] for row in rows)
+        total_kicks = sum(row['kicks'] for row in rows)
+        summary = (
+            f"{total_reminders} reminders and {total_kicks} kicks over the next {options['hours']} hours, "
+            f"{flagged} hour(s) over the budget of {options['budget']} actions per guild"
+        )
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
@@ -0,0 +1,189 @@
+"""Management command to bulk import auto-kick schedules from a CSV or NDJSON file."""
+
+import csv
+import json
+import os
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from allianceauth.services.modules.discord.models import DiscordUser
+
+from discord_onboarding import counters
+from discord_onboarding.app_settings import DISCORD_ONBOARDING_AUTO_KICK_TIMEOUT_HOURS
+from discord_onboarding.models import AutoKickSchedule
+
+# Invalid rows reported individually before the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+def _read_rows(path, file_format):
+    """Yield the rows of the file as dicts, one at a time."""
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def _snowflake(value):
+    value = int(value)
+    if not 0 < value < 2 ** 63:
+        raise ValueError(value)
+    return value
+
+
+def _parse_row(row):
+    """Validate a row, returns (guild_id, discord_id, username, joined_at) or raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError('not a JSON object')
+    guild_id = _snowflake(row.get('guild_id'))
+    discord_id = _snowflake(row.get('discord_id'))
+    # discord_username is accepted too, so files written by export_onboarding can be loaded back
+    username = str(row.get('username') or row.get('discord_username') or '').strip()
+    if not username or len(username) > 100:
+        raise ValueError(f"invalid username '{username}'")
+    joined_at = parse_datetime(str(row.get('joined_at') or ''))
+    if joined_at is None:
+        raise ValueError(f"invalid joined_at '{row.get('joined_at')}'")
+    if timezone.is_naive(joined_at):
+        joined_at = timezone.make_aware(joined_at)
+    return guild_id, discord_id, username, joined_at
+
+
+class Command(BaseCommand):
+    help = 'Bulk import auto-kick schedules from a CSV or NDJSON file of guild_id, discord_id, username, joined_at'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or NDJSON file to import')
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'ndjson'),
+            help='File format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows validated and inserted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue from the offset recorded by an interrupted import of the same file',
+        )
+        parser.add_argument(
+            '--kick-from-joined',
+            action='store_true',
+            help='Schedule kicks from each joined_at instead of giving every imported user the full timeout from now',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without importing anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File '{path}' does not exist")
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl', '.json')) else 'csv')
+        offset_path = f"{path}.offset"
+        dry_run = options['dry_run']
+
+        offset = 0
+        if options['resume'] and os.path.exists(offset_path):
+            with open(offset_path) as offset_file:
+                offset = int(offset_file.read().strip() or 0)
+            self.stdout.write(f"Resuming after row {offset}")
+
+        rows = islice(_read_rows(path, file_format), offset, None)
+        kick_time = timezone.now() + timedelta(hours=DISCORD_ONBOARDING_AUTO_KICK_TIMEOUT_HOURS)
+        totals = {'created': 0, 'linked': 0, 'existing': 0, 'duplicate': 0, 'invalid': 0}
+        started = time.monotonic()
+        processed = 0
+
+        while True:
+            chunk = list(islice(rows, options['chunk_size']))
+            if not chunk:
+                break
+
+            # Validate the whole chunk first, then check it against the database with one lookup each
+            valid = {}
+            for index, row in enumerate(chunk, start=offset + processed + 1):
+                try:
+                    guild_id, discord_id, username, joined_at = _parse_row(row)
+                except (TypeError, ValueError) as e:
+                    totals['invalid'] += 1
+                    if totals['invalid'] <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"Row {index}: {e}")
+                    continue
+                # The first row for a user wins, like a schedule imported by an earlier chunk
+                if discord_id in valid:
+                    totals['duplicate'] += 1
+                    continue
+                valid[discord_id] = AutoKickSchedule(
+                    discord_id=discord_id,
+                    discord_username=username,
+                    guild_id=guild_id,
+                    joined_at=joined_at,
+                    kick_scheduled_at=(
+                        joined_at + timedelta(hours=DISCORD_ONBOARDING_AUTO_KICK_TIMEOUT_HOURS)
+                        if options['kick_from_joined'] else kick_time
+                    ),
+                )
+
+            linked = set(DiscordUser.objects.filter(uid__in=valid).values_list('uid', flat=True))
+            existing = set(AutoKickSchedule.objects.filter(discord_id__in=valid).values_list('discord_id', flat=True))
+            schedules = [
+                schedule for discord_id, schedule in valid.items()
+                if discord_id not in linked and discord_id not in existing
+            ]
+            totals['linked'] += len(linked)
+            totals['existing'] += len(existing - linked)
+
+            created = len(schedules)
+            if not dry_run:
+                with transaction.atomic():
+                    # Conflicts are schedules created since the lookup above, e.g. by the bot. The
+                    # conflict clause drops those rows silently, so count what was actually inserted.
+                    batch = AutoKickSchedule.objects.filter(discord_id__in=[s.discord_id for s in schedules])
+                    before = batch.count()
+                    AutoKickSchedule.objects.bulk_create(schedules, ignore_conflicts=True)
+                    created = batch.count() - before
+                    counters.adjust(counters.ACTIVE_SCHEDULES, created)
+                with open(offset_path, 'w') as offset_file:
+                    offset_file.write(str(offset + processed + len(chunk)))
+            totals['created'] += created
+            totals['existing'] += len(schedules) - created
+            processed += len(chunk)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{offset + processed} rows done, {totals['created']} schedules "
+                f"{'valid' if dry_run else 'created'} ({processed / elapsed if elapsed else processed:.0f} rows/s)"
+            )
+
+        if not dry_run and os.path.exists(offset_path):
+            os.remove(offset_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{'DRY RUN: would create' if dry_run else 'Created'} {totals['created']} auto-kick schedules from "
+            f"{processed} rows in {elapsed:.1f}s ({processed / elapsed if elapsed else processed:.0f} rows/s). "
+            f"Skipped {totals['linked']} linked users, {totals['existing']} with an existing schedule, "
+            f"{totals['duplicate']} duplicate rows and {totals['invalid']} invalid rows."
+        ))
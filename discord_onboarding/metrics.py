@@ -0,0 +1,246 @@
+"""Metrics for the onboarding pipeline.
+
+Counters and histograms record into a registry in the current process, which
+is just a dict update under a lock and cheap enough for hot paths such as
+``on_member_join``. At most every ``FLUSH_INTERVAL`` seconds a process adds
+what it recorded since its last flush to running totals in the Django cache
+(``cache.incr``, like the bot queue backpressure counter), so the web, Celery
+and bot processes all add up to one set of numbers. Processes that go idle
+would sit on their last batch, so it is also flushed when a Celery task
+finishes (``signals.py``) and when the process exits. The bot only flushes on
+the interval and at exit, since a flush blocks its event loop on the cache.
+The ``metrics`` view
+renders those totals in the Prometheus text format; ``render(local=True)``
+shows only what the current process, e.g. the bot, has recorded itself.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between pushes of a process' metrics to the shared totals
+FLUSH_INTERVAL = 10
+
+SERIES_KEY = 'discord_onboarding_metrics_series'
+VALUE_KEY = 'discord_onboarding_metrics:{}:{}:{}'
+
+# Histogram sums are kept as integers in the cache, in millionths
+SUM_SCALE = 1000000
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+SLOW_LATENCY_BUCKETS = (10, 30, 60, 300, 900, 1800, 3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600)
+SIZE_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Registry:
+    """Metrics recorded by this process, and what is still to be flushed."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.totals = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def record(self, metric, labels, amounts):
+        """Add ``{value index: amount}`` to a series of ``metric``."""
+        with self.lock:
+            for values in (self.totals, self.pending):
+                series = values.setdefault((metric.name, labels), [0] * metric.size)
+                for index, amount in amounts.items():
+                    series[index] += amount
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Add everything recorded since the last flush to the shared totals."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            known = set(self.totals)
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            for (name, labels), values in pending.items():
+                for index, amount in enumerate(values):
+                    if amount:
+                        key = VALUE_KEY.format(name, '|'.join(labels), index)
+                        cache.add(key, 0, timeout=None)
+                        cache.incr(key, amount)
+            series = cache.get(SERIES_KEY) or set()
+            if not known <= series:
+                cache.set(SERIES_KEY, series | known, timeout=None)
+        except Exception as e:
+            logger.debug(f"Unable to flush metrics: {e}")
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _labels(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    size = 1
+
+    def inc(self, amount=1, **labels):
+        REGISTRY.record(self, self._labels(labels), {0: amount})
+
+
+class Histogram(_Metric):
+    """Histogram with fixed buckets, stored as a count per bucket, the +Inf count and the sum."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.size = len(self.buckets) + 2
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        REGISTRY.record(self, self._labels(labels), {index: 1, self.size - 1: int(value * SUM_SCALE)})
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+
+JOIN_TO_DM_SECONDS = Histogram(
+    'discord_onboarding_join_to_dm_seconds',
+    'Time from a member joining the guild to the onboarding DM being sent',
+)
+DM_FAILURES = Counter(
+    'discord_onboarding_dm_failures_total',
+    'Onboarding, reminder and goodbye DMs that could not be delivered',
+    ('reason',),
+)
+TOKENS_ISSUED = Counter('discord_onboarding_tokens_issued_total', 'Onboarding tokens created')
+TOKENS_REDEEMED = Counter('discord_onboarding_tokens_redeemed_total', 'Onboarding tokens used to link an account')
+START_TO_CALLBACK_SECONDS = Histogram(
+    'discord_onboarding_start_to_callback_seconds',
+    'Time from opening an onboarding link to completing the SSO callback',
+    buckets=SLOW_LATENCY_BUCKETS,
+)
+PROCESSOR_SCHEDULES = Histogram(
+    'discord_onboarding_processor_schedules',
+    'Schedules queued per auto-kick processor run (or shard), by action',
+    ('action',),
+    buckets=SIZE_BUCKETS,
+)
+PROCESSOR_TICK_SECONDS = Histogram(
+    'discord_onboarding_processor_tick_seconds',
+    'Duration of an auto-kick processor run (or shard)',
+)
+BOT_TASK_SECONDS = Histogram(
+    'discord_onboarding_bot_task_seconds',
+    'Duration of onboarding bot tasks',
+    ('task',),
+)
+VIEW_SECONDS = Histogram(
+    'discord_onboarding_view_seconds',
+    'Wall time of profiled onboarding view requests',
+    ('view',),
+)
+VIEW_DB_SECONDS = Histogram(
+    'discord_onboarding_view_db_seconds',
+    'Database time of profiled onboarding view requests',
+    ('view',),
+)
+VIEW_QUERIES = Histogram(
+    'discord_onboarding_view_queries',
+    'Database queries per profiled onboarding view request',
+    ('view',),
+    buckets=QUERY_BUCKETS,
+)
+HEALTH_WARNINGS = Counter(
+    'discord_onboarding_health_warnings_total',
+    'Health check warnings for stopped or slow periodic tasks and scheduling lag, by check',
+    ('check',),
+)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _shared_totals():
+    series = sorted(cache.get(SERIES_KEY) or ())
+    keys = {}
+    for name, labels in series:
+        metric = REGISTRY.metrics.get(name)
+        if metric is not None:
+            for index in range(metric.size):
+                keys[VALUE_KEY.format(name, '|'.join(labels), index)] = (name, labels, index)
+    found = cache.get_many(list(keys))
+    totals = {}
+    for key, (name, labels, index) in keys.items():
+        totals.setdefault((name, labels), [0] * REGISTRY.metrics[name].size)[index] = found.get(key, 0)
+    return totals
+
+
+def render(local=False):
+    """Metrics in the Prometheus text exposition format.
+
+    By default the totals of all processes are read from the cache, after
+    flushing this one's. With ``local`` only this process' own are shown.
+    """
+    if local:
+        with REGISTRY.lock:
+            totals = {key: list(values) for key, values in REGISTRY.totals.items()}
+    else:
+        REGISTRY.flush()
+        totals = _shared_totals()
+
+    lines = []
+    for name, metric in sorted(REGISTRY.metrics.items()):
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for (series_name, labels), values in sorted(totals.items()):
+            if series_name != name:
+                continue
+            if metric.kind == 'counter':
+                lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {values[0]}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), values):
+                cumulative += count
+                bucket_labels = _format_labels(metric.labelnames, labels, [('le', bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(metric.labelnames, labels)} {values[-1] / SUM_SCALE}")
+            lines.append(f"{name}_count{_format_labels(metric.labelnames, labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,28 @@
+# Generated migration for PendingLogEvent model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0002_add_autokickschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingLogEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('auto_kick', 'Auto-kick'), ('authenticated', 'Successful authentication')], max_length=32)),
+                ('subject', models.CharField(help_text='Discord username the event is about', max_length=100)),
+                ('embed', models.JSONField(help_text='Rendered embed for the event')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Pending Log Event',
+                'verbose_name_plural': 'Pending Log Events',
+                'default_permissions': (),
+            },
+        ),
+    ]
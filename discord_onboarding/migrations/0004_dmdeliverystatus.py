@@ -0,0 +1,31 @@
+# Generated migration for DMDeliveryStatus model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0003_pendinglogevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DMDeliveryStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discord_id', models.BigIntegerField(help_text='Discord user ID', unique=True)),
+                ('guild_id', models.BigIntegerField(blank=True, help_text='Guild to post the fallback mention in', null=True)),
+                ('last_failure_reason', models.CharField(choices=[('forbidden', 'DMs disabled'), ('cannot_send', 'Cannot send'), ('http_error', 'HTTP error')], max_length=32)),
+                ('last_failure_at', models.DateTimeField(help_text='When the last DM attempt failed')),
+                ('failure_count', models.IntegerField(default=0, help_text='Number of failed DM attempts')),
+                ('fallback_pending', models.BooleanField(default=False, help_text='Whether the user is waiting for a fallback mention')),
+            ],
+            options={
+                'verbose_name': 'DM Delivery Status',
+                'verbose_name_plural': 'DM Delivery Statuses',
+                'default_permissions': (),
+                'indexes': [models.Index(fields=['fallback_pending', 'guild_id'], name='discord_onb_fallbac_1d0e4f_idx')],
+            },
+        ),
+    ]
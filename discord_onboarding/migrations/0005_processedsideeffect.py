@@ -0,0 +1,26 @@
+# Generated migration for ProcessedSideEffect model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0004_dmdeliverystatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedSideEffect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='e.g. reminder:<schedule id>:<number>', max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Processed Side Effect',
+                'verbose_name_plural': 'Processed Side Effects',
+                'default_permissions': (),
+            },
+        ),
+    ]
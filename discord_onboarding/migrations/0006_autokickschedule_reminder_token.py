@@ -0,0 +1,19 @@
+# Generated migration for AutoKickSchedule.reminder_token
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0005_processedsideeffect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autokickschedule',
+            name='reminder_token',
+            field=models.ForeignKey(blank=True, help_text='Onboarding token reused by every reminder, its expiry slides forward with each one', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminder_schedules', to='discord_onboarding.onboardingtoken'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated migration for schedule retention and daily summaries
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_deactivated_at(apps, schema_editor):
+    """Start the retention period of already inactive schedules now."""
+    AutoKickSchedule = apps.get_model('discord_onboarding', 'AutoKickSchedule')
+    AutoKickSchedule.objects.filter(is_active=False, deactivated_at=None).update(deactivated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0006_autokickschedule_reminder_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autokickschedule',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, help_text='When the schedule was deactivated', null=True),
+        ),
+        migrations.AddField(
+            model_name='autokickschedule',
+            name='outcome',
+            field=models.CharField(blank=True, choices=[('authenticated', 'Authenticated'), ('kicked', 'Kicked'), ('cancelled', 'Cancelled')], help_text='Why the schedule was deactivated', max_length=16),
+        ),
+        migrations.CreateModel(
+            name='AutoKickDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day the schedules were deactivated')),
+                ('guild_id', models.BigIntegerField(help_text='Discord guild ID')),
+                ('authenticated', models.IntegerField(default=0, help_text='Users who authenticated')),
+                ('kicked', models.IntegerField(default=0, help_text='Users who were kicked')),
+                ('cancelled', models.IntegerField(default=0, help_text='Schedules cancelled for any other reason')),
+                ('reminders_sent', models.IntegerField(default=0, help_text='Reminders sent to these users')),
+            ],
+            options={
+                'verbose_name': 'Auto-Kick Daily Summary',
+                'verbose_name_plural': 'Auto-Kick Daily Summaries',
+                'default_permissions': (),
+                'constraints': [models.UniqueConstraint(fields=('date', 'guild_id'), name='discord_onboarding_summary_day_guild')],
+            },
+        ),
+        migrations.RunPython(backfill_deactivated_at, migrations.RunPython.noop),
+    ]
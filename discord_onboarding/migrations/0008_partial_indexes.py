@@ -0,0 +1,34 @@
+# Generated migration for partial indexes on active schedules and unused tokens
+
+from django.db import migrations, models
+
+from ._operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('discord_onboarding', '0007_schedule_retention'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='autokickschedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['kick_scheduled_at'], name='discord_onb_active_kick_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='autokickschedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['last_reminder_sent'], name='discord_onb_active_remind_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='autokickschedule',
+            index=models.Index(condition=models.Q(('is_active', True), ('last_reminder_sent__isnull', True)), fields=['joined_at'], name='discord_onb_first_remind_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='onboardingtoken',
+            index=models.Index(condition=models.Q(('used', False)), fields=['discord_id', '-created_at'], name='discord_onb_unused_token_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated migration for OnboardingCounter model
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    AutoKickSchedule = apps.get_model('discord_onboarding', 'AutoKickSchedule')
+    OnboardingToken = apps.get_model('discord_onboarding', 'OnboardingToken')
+    OnboardingCounter = apps.get_model('discord_onboarding', 'OnboardingCounter')
+    OnboardingCounter.objects.bulk_create([
+        OnboardingCounter(name='active_schedules', value=AutoKickSchedule.objects.filter(is_active=True).count()),
+        OnboardingCounter(name='inactive_schedules', value=AutoKickSchedule.objects.filter(is_active=False).count()),
+        OnboardingCounter(name='pending_tokens', value=OnboardingToken.objects.filter(used=False).count()),
+        OnboardingCounter(name='used_tokens', value=OnboardingToken.objects.filter(used=True).count()),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0008_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnboardingCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('active_schedules', 'Active auto-kick schedules'), ('inactive_schedules', 'Inactive auto-kick schedules'), ('pending_tokens', 'Unused onboarding tokens'), ('used_tokens', 'Used onboarding tokens')], max_length=32, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Onboarding Counter',
+                'verbose_name_plural': 'Onboarding Counters',
+                'default_permissions': (),
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
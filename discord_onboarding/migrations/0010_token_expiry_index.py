@@ -0,0 +1,22 @@
+# Generated migration for the unused token expiry index
+
+from django.db import migrations, models
+
+from ._operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('discord_onboarding', '0009_onboardingcounter'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='onboardingtoken',
+            index=models.Index(condition=models.Q(('used', False)), fields=['expires_at'], name='discord_onb_unused_expiry_idx'),
+        ),
+    ]
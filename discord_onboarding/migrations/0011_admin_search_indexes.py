@@ -0,0 +1,26 @@
+# Generated migration for exact-match admin search indexes
+
+from django.db import migrations, models
+
+from ._operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('discord_onboarding', '0010_token_expiry_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='autokickschedule',
+            index=models.Index(fields=['guild_id'], name='discord_onb_sched_guild_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='onboardingtoken',
+            index=models.Index(fields=['discord_id'], name='discord_onb_token_user_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated migration for onboarding correlation IDs and stage events
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discord_onboarding', '0011_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onboardingtoken',
+            name='correlation_id',
+            field=models.CharField(blank=True, help_text='Ties together the log lines and stage events of this onboarding', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='OnboardingStageEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('correlation_id', models.CharField(db_index=True, max_length=32)),
+                ('discord_id', models.BigIntegerField(help_text='Discord user ID')),
+                ('stage', models.CharField(choices=[('issued', 'Token issued'), ('dm_sent', 'Onboarding DM sent'), ('started', 'Onboarding link opened'), ('redeemed', 'SSO callback completed'), ('sync_queued', 'Discord sync queued'), ('roles_synced', 'Discord roles synced')], max_length=16)),
+                ('at', models.DateTimeField(help_text='When the stage was reached')),
+                ('seconds', models.FloatField(help_text='Seconds since the token was issued')),
+            ],
+            options={
+                'verbose_name': 'Onboarding Stage Event',
+                'verbose_name_plural': 'Onboarding Stage Events',
+                'default_permissions': (),
+                'indexes': [models.Index(fields=['stage', 'at'], name='discord_onb_stage_at_idx'), models.Index(fields=['discord_id', 'at'], name='discord_onb_stage_user_idx')],
+            },
+        ),
+    ]
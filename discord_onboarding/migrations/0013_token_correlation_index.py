@@ -0,0 +1,22 @@
+# Generated migration for the token correlation ID index
+
+from django.db import migrations, models
+
+from ._operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('discord_onboarding', '0012_onboarding_tracing'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='onboardingtoken',
+            index=models.Index(fields=['correlation_id'], name='discord_onb_token_corr_idx'),
+        ),
+    ]
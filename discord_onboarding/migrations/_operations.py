@@ -0,0 +1,22 @@
+"""Custom migration operations shared by the discord_onboarding migrations.
+
+The leading underscore keeps the migration loader from treating this module
+as a migration.
+"""
+
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex that doesn't lock the table on PostgreSQL.
+
+    Uses CREATE INDEX CONCURRENTLY on PostgreSQL. Other databases fall back to a
+    plain AddIndex; MySQL/MariaDB skip conditional indexes altogether.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
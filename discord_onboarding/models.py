@@ -1,10 +1,13 @@
 """Models for Discord Onboarding."""
 
 import secrets
+import uuid
 from datetime import timedelta
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from .app_settings import (
@@ -26,6 +29,33 @@ class General(models.Model):
         )
 
 
+class OnboardingTokenQuerySet(models.QuerySet):
+    """SQL equivalents of ``is_expired`` and ``is_valid``."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_EXPIRED = 'expired'
+    STATUS_USED = 'used'
+
+    def pending(self, now=None):
+        return self.filter(used=False, expires_at__gte=now or timezone.now())
+
+    def expired(self, now=None):
+        return self.filter(used=False, expires_at__lt=now or timezone.now())
+
+    def used(self):
+        return self.filter(used=True)
+
+    def with_status(self, now=None):
+        """Annotate ``status`` as one of the ``STATUS_*`` values."""
+        now = now or timezone.now()
+        return self.annotate(status=Case(
+            When(used=True, then=Value(self.STATUS_USED)),
+            When(expires_at__lt=now, then=Value(self.STATUS_EXPIRED)),
+            default=Value(self.STATUS_PENDING),
+            output_field=models.CharField(),
+        ))
+
+
 class OnboardingToken(models.Model):
     """Temporary tokens for Discord onboarding process."""
 
@@ -41,14 +71,45 @@ class OnboardingToken(models.Model):
         User, null=True, blank=True, on_delete=models.CASCADE,
         help_text="Linked Alliance Auth user (after successful auth)"
     )
+    correlation_id = models.CharField(
+        max_length=32, blank=True,
+        help_text="Ties together the log lines and stage events of this onboarding"
+    )
+
+    objects = OnboardingTokenQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Onboarding Token"
         verbose_name_plural = "Onboarding Tokens"
+        indexes = [
+            # /bind and auth lookups only ever want a user's unused tokens
+            models.Index(
+                fields=['discord_id', '-created_at'], condition=models.Q(used=False),
+                name='discord_onb_unused_token_idx'
+            ),
+            # Pending/expired admin filters
+            models.Index(
+                fields=['expires_at'], condition=models.Q(used=False),
+                name='discord_onb_unused_expiry_idx'
+            ),
+            # Exact Discord ID search in the admin, used tokens included
+            models.Index(fields=['discord_id'], name='discord_onb_token_user_idx'),
+            # Exact correlation ID search in the admin
+            models.Index(fields=['correlation_id'], name='discord_onb_token_corr_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so counters can tell whether a save changed it
+        instance._loaded_used = dict(zip(field_names, values)).get('used')
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.token:
             self.token = secrets.token_urlsafe(48)
+        if not self.correlation_id:
+            self.correlation_id = uuid.uuid4().hex
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(
                 seconds=DISCORD_ONBOARDING_TOKEN_EXPIRY
@@ -66,9 +127,83 @@ class OnboardingToken(models.Model):
         return f"Token for {self.discord_username} ({status})"
 
 
+class AutoKickScheduleQuerySet(models.QuerySet):
+    """SQL equivalents of ``is_due_for_reminder`` and ``is_due_for_kick``."""
+
+    STATUS_INACTIVE = 'inactive'
+    STATUS_DUE_FOR_KICK = 'due_for_kick'
+    STATUS_DUE_FOR_REMINDER = 'due_for_reminder'
+    STATUS_SCHEDULED = 'scheduled'
+
+    @staticmethod
+    def _reminder_due(now):
+        cutoff = now - timedelta(hours=DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS)
+        return Q(last_reminder_sent__isnull=True, joined_at__lte=cutoff) | Q(last_reminder_sent__lte=cutoff)
+
+    def due_for_kick(self, now=None):
+        now = now or timezone.now()
+        return self.filter(is_active=True, kick_scheduled_at__lte=now).order_by('kick_scheduled_at')
+
+    def due_for_reminder(self, now=None):
+        """Active schedules due a reminder, oldest first, excluding those already due a kick."""
+        now = now or timezone.now()
+        return self.filter(
+            self._reminder_due(now),
+            is_active=True,
+            kick_scheduled_at__gt=now,
+        ).order_by(Coalesce('last_reminder_sent', 'joined_at'))
+
+    def deactivate(self, outcome=None):
+        """Deactivate all active schedules in one UPDATE, returns the number deactivated."""
+        from . import counters
+
+        count = self.filter(is_active=True).update(
+            is_active=False, deactivated_at=timezone.now(), outcome=outcome or self.model.OUTCOME_CANCELLED
+        )
+        # update() skips the signals that keep the counters current
+        with counters.batched():
+            counters.adjust(counters.ACTIVE_SCHEDULES, -count)
+            counters.adjust(counters.INACTIVE_SCHEDULES, count)
+        return count
+
+    def scheduled(self, now=None):
+        """Active schedules that are due neither a reminder nor a kick."""
+        now = now or timezone.now()
+        return self.filter(is_active=True, kick_scheduled_at__gt=now).exclude(self._reminder_due(now))
+
+    def with_status(self, now=None):
+        """Annotate ``status`` as one of the ``STATUS_*`` values and ``time_left`` until the kick."""
+        now = now or timezone.now()
+        return self.annotate(
+            status=Case(
+                When(is_active=False, then=Value(self.STATUS_INACTIVE)),
+                When(kick_scheduled_at__lte=now, then=Value(self.STATUS_DUE_FOR_KICK)),
+                When(self._reminder_due(now), then=Value(self.STATUS_DUE_FOR_REMINDER)),
+                default=Value(self.STATUS_SCHEDULED),
+                output_field=models.CharField(),
+            ),
+            time_left=Case(
+                When(is_active=True, then=ExpressionWrapper(
+                    F('kick_scheduled_at') - Value(now, output_field=DateTimeField()),
+                    output_field=DurationField(),
+                )),
+                output_field=DurationField(),
+            ),
+        )
+
+
 class AutoKickSchedule(models.Model):
     """Schedule for auto-kicking unauthenticated Discord users."""
 
+    OUTCOME_AUTHENTICATED = 'authenticated'
+    OUTCOME_KICKED = 'kicked'
+    OUTCOME_CANCELLED = 'cancelled'
+    OUTCOME_CHOICES = (
+        (OUTCOME_AUTHENTICATED, 'Authenticated'),
+        (OUTCOME_KICKED, 'Kicked'),
+        (OUTCOME_CANCELLED, 'Cancelled'),
+    )
+
     discord_id = models.BigIntegerField(unique=True, help_text="Discord user ID")
     discord_username = models.CharField(
         max_length=100, help_text="Discord username for reference"
@@ -79,15 +214,48 @@ class AutoKickSchedule(models.Model):
     kick_scheduled_at = models.DateTimeField(help_text="When the user should be kicked")
     is_active = models.BooleanField(default=True, help_text="Whether the schedule is active")
     reminder_count = models.IntegerField(default=0, help_text="Number of reminders sent")
+    reminder_token = models.ForeignKey(
+        OnboardingToken, null=True, blank=True, on_delete=models.SET_NULL, related_name='reminder_schedules',
+        help_text="Onboarding token reused by every reminder, its expiry slides forward with each one"
+    )
+    deactivated_at = models.DateTimeField(null=True, blank=True, help_text="When the schedule was deactivated")
+    outcome = models.CharField(
+        max_length=16, blank=True, choices=OUTCOME_CHOICES, help_text="Why the schedule was deactivated"
+    )
+
+    objects = AutoKickScheduleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Auto-Kick Schedule"
         verbose_name_plural = "Auto-Kick Schedules"
         indexes = [
-            models.Index(fields=['kick_scheduled_at', 'is_active']),
-            models.Index(fields=['last_reminder_sent', 'is_active']),
+            models.Index(fields=['kick_scheduled_at', 'is_active'], name='discord_onb_kick_sc_74c7ea_idx'),
+            models.Index(fields=['last_reminder_sent', 'is_active'], name='discord_onb_last_re_4b5c9a_idx'),
+            # Partial indexes over active schedules only, used by due_for_kick() and due_for_reminder()
+            # on databases that support them. MySQL/MariaDB don't and keep using the indexes above.
+            models.Index(
+                fields=['kick_scheduled_at'], condition=models.Q(is_active=True),
+                name='discord_onb_active_kick_idx'
+            ),
+            models.Index(
+                fields=['last_reminder_sent'], condition=models.Q(is_active=True),
+                name='discord_onb_active_remind_idx'
+            ),
+            models.Index(
+                fields=['joined_at'], condition=models.Q(is_active=True, last_reminder_sent__isnull=True),
+                name='discord_onb_first_remind_idx'
+            ),
+            # Exact guild ID search in the admin
+            models.Index(fields=['guild_id'], name='discord_onb_sched_guild_idx'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so counters can tell whether a save changed it
+        instance._loaded_is_active = dict(zip(field_names, values)).get('is_active')
+        return instance
+
     def save(self, *args, **kwargs):
         # Set kick_scheduled_at if not already set
         if not self.kick_scheduled_at and self.joined_at:
@@ -116,17 +284,206 @@ class AutoKickSchedule(models.Model):
         """Check if user is due to be kicked."""
         return self.is_active and timezone.now() >= self.kick_scheduled_at
 
+    def refresh_reminder_token(self):
+        """Return the reminder token with its expiry slid forward, minting one if there is none left.
+
+        A reused token is reissued under a new correlation ID, so each reminder is
+        traced and timed as an onboarding of its own.
+        """
+        from . import tracing
+
+        expires_at = timezone.now() + timedelta(seconds=DISCORD_ONBOARDING_TOKEN_EXPIRY)
+        correlation_id = uuid.uuid4().hex
+        if self.reminder_token_id and OnboardingToken.objects.filter(
+            id=self.reminder_token_id, used=False
+        ).update(expires_at=expires_at, correlation_id=correlation_id):
+            self.reminder_token.expires_at = expires_at
+            self.reminder_token.correlation_id = correlation_id
+            tracing.record_stage(self.reminder_token, OnboardingStageEvent.STAGE_ISSUED)
+            return self.reminder_token
+
+        # Redeemed or cleaned up, start over with a fresh token
+        self.reminder_token = OnboardingToken.objects.create(
+            discord_id=self.discord_id,
+            discord_username=self.discord_username,
+            expires_at=expires_at
+        )
+        AutoKickSchedule.objects.filter(id=self.id).update(reminder_token=self.reminder_token)
+        return self.reminder_token
+
     def mark_reminder_sent(self):
         """Mark that a reminder was sent."""
         self.last_reminder_sent = timezone.now()
         self.reminder_count += 1
         self.save()
 
-    def deactivate(self):
+    def deactivate(self, outcome=OUTCOME_CANCELLED):
         """Deactivate the schedule (user authenticated or was kicked)."""
         self.is_active = False
+        self.deactivated_at = timezone.now()
+        self.outcome = outcome
         self.save()
 
     def __str__(self):
         status = "active" if self.is_active else "inactive"
         return f"AutoKick for {self.discord_username} ({status})"
+
+
+class PendingLogEvent(models.Model):
+    """Log channel event waiting to be posted as part of a digest."""
+
+    EVENT_AUTO_KICK = 'auto_kick'
+    EVENT_AUTHENTICATED = 'authenticated'
+    EVENT_TYPE_CHOICES = (
+        (EVENT_AUTO_KICK, 'Auto-kick'),
+        (EVENT_AUTHENTICATED, 'Successful authentication'),
+    )
+
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPE_CHOICES)
+    subject = models.CharField(max_length=100, help_text="Discord username the event is about")
+    embed = models.JSONField(help_text="Rendered embed for the event")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pending Log Event"
+        verbose_name_plural = "Pending Log Events"
+        default_permissions = ()
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} for {self.subject}"
+
+
+class DMDeliveryStatus(models.Model):
+    """Last DM delivery failure for a Discord user, used to skip undeliverable DMs."""
+
+    REASON_FORBIDDEN = 'forbidden'
+    REASON_CANNOT_SEND = 'cannot_send'
+    REASON_HTTP_ERROR = 'http_error'
+    REASON_CHOICES = (
+        (REASON_FORBIDDEN, 'DMs disabled'),
+        (REASON_CANNOT_SEND, 'Cannot send'),
+        (REASON_HTTP_ERROR, 'HTTP error'),
+    )
+
+    discord_id = models.BigIntegerField(unique=True, help_text="Discord user ID")
+    guild_id = models.BigIntegerField(
+        null=True, blank=True, help_text="Guild to post the fallback mention in"
+    )
+    last_failure_reason = models.CharField(max_length=32, choices=REASON_CHOICES)
+    last_failure_at = models.DateTimeField(help_text="When the last DM attempt failed")
+    failure_count = models.IntegerField(default=0, help_text="Number of failed DM attempts")
+    fallback_pending = models.BooleanField(
+        default=False, help_text="Whether the user is waiting for a fallback mention"
+    )
+
+    class Meta:
+        verbose_name = "DM Delivery Status"
+        verbose_name_plural = "DM Delivery Statuses"
+        default_permissions = ()
+        indexes = [
+            models.Index(fields=['fallback_pending', 'guild_id'], name='discord_onb_fallbac_1d0e4f_idx'),
+        ]
+
+    def __str__(self):
+        return f"DM status for {self.discord_id} ({self.get_last_failure_reason_display()})"
+
+
+class ProcessedSideEffect(models.Model):
+    """Idempotency key of a reminder, goodbye, kick or log side effect that already happened."""
+
+    key = models.CharField(max_length=64, unique=True, help_text="e.g. reminder:<schedule id>:<number>")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Processed Side Effect"
+        verbose_name_plural = "Processed Side Effects"
+        default_permissions = ()
+
+    def __str__(self):
+        return self.key
+
+
+class AutoKickDailySummary(models.Model):
+    """Daily counts of finished auto-kick schedules, kept after the schedules are compacted away."""
+
+    date = models.DateField(help_text="Day the schedules were deactivated")
+    guild_id = models.BigIntegerField(help_text="Discord guild ID")
+    authenticated = models.IntegerField(default=0, help_text="Users who authenticated")
+    kicked = models.IntegerField(default=0, help_text="Users who were kicked")
+    cancelled = models.IntegerField(default=0, help_text="Schedules cancelled for any other reason")
+    reminders_sent = models.IntegerField(default=0, help_text="Reminders sent to these users")
+
+    class Meta:
+        verbose_name = "Auto-Kick Daily Summary"
+        verbose_name_plural = "Auto-Kick Daily Summaries"
+        default_permissions = ()
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'guild_id'], name='discord_onboarding_summary_day_guild'),
+        ]
+
+    def __str__(self):
+        return f"Auto-kick summary for {self.date} (guild {self.guild_id})"
+
+
+class OnboardingCounter(models.Model):
+    """Running row counts, so admin pages and commands don't have to COUNT(*) large tables."""
+
+    ACTIVE_SCHEDULES = 'active_schedules'
+    INACTIVE_SCHEDULES = 'inactive_schedules'
+    PENDING_TOKENS = 'pending_tokens'
+    USED_TOKENS = 'used_tokens'
+    NAME_CHOICES = (
+        (ACTIVE_SCHEDULES, 'Active auto-kick schedules'),
+        (INACTIVE_SCHEDULES, 'Inactive auto-kick schedules'),
+        (PENDING_TOKENS, 'Unused onboarding tokens'),
+        (USED_TOKENS, 'Used onboarding tokens'),
+    )
+
+    name = models.CharField(max_length=32, unique=True, choices=NAME_CHOICES)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Onboarding Counter"
+        verbose_name_plural = "Onboarding Counters"
+        default_permissions = ()
+
+    def __str__(self):
+        return f"{self.get_name_display()}: {self.value}"
+
+
+class OnboardingStageEvent(models.Model):
+    """Time an onboarding reached one of its stages, relative to when its token was issued."""
+
+    STAGE_ISSUED = 'issued'
+    STAGE_DM_SENT = 'dm_sent'
+    STAGE_STARTED = 'started'
+    STAGE_REDEEMED = 'redeemed'
+    STAGE_SYNC_QUEUED = 'sync_queued'
+    STAGE_ROLES_SYNCED = 'roles_synced'
+    STAGE_CHOICES = (
+        (STAGE_ISSUED, 'Token issued'),
+        (STAGE_DM_SENT, 'Onboarding DM sent'),
+        (STAGE_STARTED, 'Onboarding link opened'),
+        (STAGE_REDEEMED, 'SSO callback completed'),
+        (STAGE_SYNC_QUEUED, 'Discord sync queued'),
+        (STAGE_ROLES_SYNCED, 'Discord roles synced'),
+    )
+
+    correlation_id = models.CharField(max_length=32, db_index=True)
+    discord_id = models.BigIntegerField(help_text="Discord user ID")
+    stage = models.CharField(max_length=16, choices=STAGE_CHOICES)
+    at = models.DateTimeField(help_text="When the stage was reached")
+    seconds = models.FloatField(help_text="Seconds since the token was issued")
+
+    class Meta:
+        verbose_name = "Onboarding Stage Event"
+        verbose_name_plural = "Onboarding Stage Events"
+        default_permissions = ()
+        indexes = [
+            # Stage latency percentiles over a recent window
+            models.Index(fields=['stage', 'at'], name='discord_onb_stage_at_idx'),
+            models.Index(fields=['discord_id', 'at'], name='discord_onb_stage_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_stage_display()} after {self.seconds:.1f}s ({self.correlation_id})"
@@ -0,0 +1,93 @@
+"""Opt-in query and latency profiling for the onboarding views.
+
+Views decorated with ``profiled`` are profiled for a sample of requests,
+``DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE`` (0 turns profiling off, 1 profiles
+every request). A profiled request counts the database queries it runs and
+the time spent in them through a ``connection.execute_wrapper``, which works
+without ``DEBUG``, and reports them with the wall time as a structured log
+record and as metrics.
+"""
+
+import functools
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from django.db import connections
+
+from . import metrics
+from .app_settings import DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Profile:
+    """Database queries and time of one profiled block."""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+
+@contextmanager
+def capture():
+    """Count the queries run and time spent inside the block, on every database connection."""
+    profile = Profile()
+
+    def count_query(execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.queries += 1
+            profile.db_seconds += time.monotonic() - started
+
+    started = time.monotonic()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            yield profile
+    finally:
+        profile.wall_seconds = time.monotonic() - started
+
+
+def record(view_name, profile, status_code=None):
+    """Log and count the profile of one request to ``view_name``."""
+    metrics.VIEW_SECONDS.observe(profile.wall_seconds, view=view_name)
+    metrics.VIEW_DB_SECONDS.observe(profile.db_seconds, view=view_name)
+    metrics.VIEW_QUERIES.observe(profile.queries, view=view_name)
+    logger.info(
+        f"Profiled {view_name}: {profile.queries} queries, {profile.db_seconds * 1000:.1f}ms in the database, "
+        f"{profile.wall_seconds * 1000:.1f}ms total",
+        extra={
+            'view': view_name,
+            'status_code': status_code,
+            'queries': profile.queries,
+            'db_ms': round(profile.db_seconds * 1000, 3),
+            'wall_ms': round(profile.wall_seconds * 1000, 3),
+        }
+    )
+
+
+def profiled(view):
+    """Decorate a view so a sample of its requests is profiled."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if random.random() >= DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE:
+            return view(request, *args, **kwargs)
+        response = profile = None
+        try:
+            with capture() as profile:
+                response = view(request, *args, **kwargs)
+        finally:
+            # capture() itself can fail before binding the profile
+            if profile is not None:
+                record(view.__name__, profile, getattr(response, 'status_code', None))
+        return response
+
+    return wrapper
@@ -0,0 +1,200 @@
+"""Adaptive Discord rate limiter and circuit breaker for onboarding bot tasks.
+
+Runs inside the bot process.  Every Discord call made by ``bot_tasks`` goes
+through ``discord_limiter.call(route, coro_factory)``, which
+
+* learns bucket limits from the ``X-RateLimit-*`` headers of responses and
+  holds calls back while a bucket is exhausted,
+* opens a circuit after ``DISCORD_ONBOARDING_CIRCUIT_FAILURE_THRESHOLD``
+  consecutive 5xx/429 responses and keeps it open for
+  ``DISCORD_ONBOARDING_CIRCUIT_OPEN_SECONDS`` before letting a single probe
+  call through.
+
+While a bucket or the circuit is closed to traffic callers get ``DEFERRED``
+back immediately instead of an exception, so the bot task can reschedule its
+work rather than spin on a failing API.  The circuit state is also published
+to the cache so the Celery processor stops enqueueing new work while it is
+open.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.core.cache import cache
+
+from .app_settings import (
+    DISCORD_ONBOARDING_CIRCUIT_FAILURE_THRESHOLD,
+    DISCORD_ONBOARDING_CIRCUIT_OPEN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Returned instead of a result when a call was not attempted
+DEFERRED = 'deferred'
+
+# Longest an exhausted bucket is waited on inline before deferring instead
+MAX_INLINE_WAIT = 5.0
+
+CIRCUIT_CACHE_KEY = 'discord_onboarding_circuit_open_until'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_circuit_open():
+    """Whether the bot process has reported the Discord circuit as open."""
+    open_until = cache.get(CIRCUIT_CACHE_KEY)
+    return bool(open_until and open_until > time.time())
+
+
+class _Bucket:
+    __slots__ = ('limit', 'remaining', 'reset_at')
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+
+
+class DiscordRateLimiter:
+    """Per-route bucket tracking plus a circuit breaker shared by all routes."""
+
+    def __init__(self, failure_threshold=DISCORD_ONBOARDING_CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds=DISCORD_ONBOARDING_CIRCUIT_OPEN_SECONDS,
+                 clock=time.monotonic, sleep=asyncio.sleep, publish=True):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._publish = publish
+        self._buckets = {}
+        self._route_buckets = {}
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    # Bucket tracking
+
+    def _bucket_for(self, route):
+        bucket_id = self._route_buckets.get(route, route)
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self._buckets[bucket_id] = _Bucket()
+        return bucket
+
+    def observe_headers(self, route, headers):
+        """Learn the bucket for a route from Discord's rate limit headers."""
+        if not headers:
+            return
+        bucket_id = headers.get('X-RateLimit-Bucket')
+        if bucket_id:
+            self._route_buckets[route] = bucket_id
+        bucket = self._bucket_for(route)
+        try:
+            if headers.get('X-RateLimit-Limit') is not None:
+                bucket.limit = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Remaining') is not None:
+                bucket.remaining = int(headers['X-RateLimit-Remaining'])
+            reset_after = headers.get('X-RateLimit-Reset-After') or headers.get('Retry-After')
+            if reset_after is not None:
+                bucket.reset_at = self._clock() + float(reset_after)
+        except ValueError:
+            logger.debug(f"Ignoring malformed rate limit headers for {route}: {headers}")
+
+    def retry_after(self, route=None):
+        """Seconds until a deferred call for ``route`` is worth retrying."""
+        now = self._clock()
+        waits = [0.0]
+        if self.state == OPEN:
+            waits.append(self.opened_at + self.open_seconds - now)
+        if route is not None:
+            bucket = self._bucket_for(route)
+            if bucket.remaining == 0:
+                waits.append(bucket.reset_at - now)
+        return max(waits)
+
+    # Circuit breaker
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        logger.warning(f"Discord circuit {self.state} -> {state}")
+        self.state = state
+        if not self._publish:
+            return
+        try:
+            if state == OPEN:
+                cache.set(CIRCUIT_CACHE_KEY, time.time() + self.open_seconds, timeout=self.open_seconds)
+            elif state == CLOSED:
+                cache.delete(CIRCUIT_CACHE_KEY)
+        except Exception as e:
+            logger.error(f"Unable to publish circuit state: {e}")
+
+    def _allow_request(self):
+        if self.state == OPEN:
+            if self._clock() - self.opened_at < self.open_seconds:
+                return False
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+            self._set_state(OPEN)
+
+    # Calls
+
+    async def call(self, route, coro_factory):
+        """Run ``coro_factory()`` for ``route`` or return ``DEFERRED``.
+
+        5xx and 429 responses count towards opening the circuit and are
+        returned as ``DEFERRED``; any other exception is re-raised for the
+        caller to handle.
+        """
+        bucket = self._bucket_for(route)
+        if bucket.remaining == 0:
+            wait = bucket.reset_at - self._clock()
+            if wait > MAX_INLINE_WAIT:
+                return DEFERRED
+            if wait > 0:
+                await self._sleep(wait)
+            bucket.remaining = None
+
+        if not self._allow_request():
+            return DEFERRED
+
+        try:
+            result = await coro_factory()
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            response = getattr(e, 'response', None)
+            self.observe_headers(route, getattr(response, 'headers', None))
+            if status is not None and (status == 429 or status >= 500):
+                logger.warning(f"Discord returned {status} for {route}: {e}")
+                self.record_failure()
+                return DEFERRED
+            # Client errors (403, 404, ...) say nothing about Discord's health
+            self._probe_in_flight = False
+            raise
+
+        self.record_success()
+        if bucket.remaining:
+            bucket.remaining -= 1
+        return result
+
+
+discord_limiter = DiscordRateLimiter()
@@ -0,0 +1,78 @@
+"""Retention for finished auto-kick schedules.
+
+Deactivated schedules are only history. Once they are older than
+``DISCORD_ONBOARDING_SCHEDULE_RETENTION_DAYS`` they are folded into
+``AutoKickDailySummary`` counts per day and guild and deleted, so the live
+table and its indexes only hold schedules the processor still cares about.
+Work is done in chunks, each in its own transaction.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import counters
+from .app_settings import DISCORD_ONBOARDING_SCHEDULE_RETENTION_DAYS
+from .models import AutoKickDailySummary, AutoKickSchedule
+
+logger = logging.getLogger(__name__)
+
+# Schedules compacted per transaction
+CHUNK_SIZE = 1000
+
+# Chunks per run, anything left over is compacted by the next run
+MAX_CHUNKS = 50
+
+
+def _summarise(schedules):
+    """Add the given schedules to the daily summaries."""
+    rows = schedules.annotate(
+        date=TruncDate('deactivated_at')
+    ).values('date', 'guild_id').annotate(
+        authenticated_count=Count('id', filter=Q(outcome=AutoKickSchedule.OUTCOME_AUTHENTICATED)),
+        kicked_count=Count('id', filter=Q(outcome=AutoKickSchedule.OUTCOME_KICKED)),
+        total=Count('id'),
+        reminders=Sum('reminder_count'),
+    ).order_by()
+
+    for row in rows:
+        counts = {
+            'authenticated': row['authenticated_count'],
+            'kicked': row['kicked_count'],
+            'cancelled': row['total'] - row['authenticated_count'] - row['kicked_count'],
+            'reminders_sent': row['reminders'] or 0,
+        }
+        summary, created = AutoKickDailySummary.objects.select_for_update().get_or_create(
+            date=row['date'], guild_id=row['guild_id'], defaults=counts
+        )
+        if not created:
+            AutoKickDailySummary.objects.filter(id=summary.id).update(
+                **{field: F(field) + value for field, value in counts.items()}
+            )
+
+
+def compact_inactive_schedules(chunk_size=CHUNK_SIZE, max_chunks=MAX_CHUNKS):
+    """Summarise and delete inactive schedules past retention, returns the number compacted."""
+
+    cutoff = timezone.now() - timedelta(days=DISCORD_ONBOARDING_SCHEDULE_RETENTION_DAYS)
+    expired = AutoKickSchedule.objects.filter(is_active=False, deactivated_at__lt=cutoff)
+
+    compacted = 0
+    for _ in range(max_chunks):
+        ids = list(expired.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            chunk = AutoKickSchedule.objects.filter(id__in=ids, is_active=False)
+            _summarise(chunk)
+            counters.delete_counted(chunk)
+        compacted += len(ids)
+
+    if compacted:
+        logger.info(f"Compacted {compacted} inactive auto-kick schedules into daily summaries")
+    return compacted
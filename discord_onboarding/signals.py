@@ -2,11 +2,14 @@
 
 import logging
 
+from celery.signals import task_postrun, worker_process_shutdown
 from django.contrib.auth.models import User
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from .models import OnboardingToken
+from . import counters, metrics, tracing
+from .models import AutoKickSchedule, OnboardingStageEvent, OnboardingToken
 from .tasks import process_completed_onboarding
 from .app_settings import DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION
 
@@ -37,8 +40,9 @@ def activate_discord_onboarding_user(sender, instance, created, **kwargs):
     
     # Look for recent unused onboarding tokens (within the last 10 minutes)
     recent_time = timezone.now() - timedelta(minutes=10)
+    # Reminder tokens are reused, so for those the last reminder counts as their issue time
     recent_tokens = OnboardingToken.objects.filter(
-        created_at__gte=recent_time,
+        Q(created_at__gte=recent_time) | Q(reminder_schedules__last_reminder_sent__gte=recent_time),
         used=False
     )
     
@@ -74,6 +78,9 @@ def activate_discord_onboarding_user(sender, instance, created, **kwargs):
 def onboarding_token_saved(sender, instance, created, **kwargs):
     """Handle when an onboarding token is saved."""
 
+    if created and not kwargs.get('raw'):
+        tracing.record_stage(instance, OnboardingStageEvent.STAGE_ISSUED)
+
     if not created and instance.used and instance.user:
         # Token was just marked as used and linked to a user
         logger.info(
@@ -82,4 +89,52 @@ def onboarding_token_saved(sender, instance, created, **kwargs):
         )
 
         # Queue the Discord sync task
-        process_completed_onboarding.delay(instance.id)
+        process_completed_onboarding.delay(instance.id, correlation_id=instance.correlation_id)
+
+
+def _count_transition(instance, created, previous, current, true_counter, false_counter):
+    """Move a row between two counters when its flag changed (or count it when created)."""
+    if created:
+        counters.adjust(true_counter if current else false_counter, 1)
+    elif previous is not None and previous != current:
+        counters.adjust(true_counter if current else false_counter, 1)
+        counters.adjust(false_counter if current else true_counter, -1)
+
+
+@receiver(post_save, sender=AutoKickSchedule)
+def count_saved_schedule(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _count_transition(
+        instance, created, getattr(instance, '_loaded_is_active', None), instance.is_active,
+        counters.ACTIVE_SCHEDULES, counters.INACTIVE_SCHEDULES
+    )
+    instance._loaded_is_active = instance.is_active
+
+
+@receiver(post_save, sender=OnboardingToken)
+def count_saved_token(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_used', None)
+    if created:
+        metrics.TOKENS_ISSUED.inc()
+    if instance.used and (created or previous is False):
+        metrics.TOKENS_REDEEMED.inc()
+    # Tokens are counted as used/pending, so the "true" counter is USED_TOKENS
+    _count_transition(
+        instance, created, previous, instance.used,
+        counters.USED_TOKENS, counters.PENDING_TOKENS
+    )
+    instance._loaded_used = instance.used
+
+
+@task_postrun.connect
+def flush_metrics_after_task(**kwargs):
+    metrics.REGISTRY.flush()
+
+
+# Prefork pool children leave with os._exit(), which skips atexit
+@worker_process_shutdown.connect
+def flush_metrics_on_worker_shutdown(**kwargs):
+    metrics.REGISTRY.flush()
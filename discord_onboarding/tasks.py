@@ -1,62 +1,140 @@
 """Celery tasks for Discord Onboarding."""
 
 import logging
+import time
 
 from celery import shared_task
 from celery.schedules import crontab
 
+from django.db.models.functions import Mod
+
 from allianceauth.services.modules.discord.models import DiscordUser
 from allianceauth.services.modules.discord.tasks import update_groups, update_nickname
 
-from .models import OnboardingToken, AutoKickSchedule
+from . import metrics, tracing
+from .backpressure import available_bot_capacity, enqueue_bot_task
+from .counters import ACTIVE_SCHEDULES, delete_counted, get_count, recount
+from .delivery import cleanup_delivery_statuses, flush_dm_fallbacks, is_dm_undeliverable, queue_dm_fallback
+from .embeds import render_embed
+from .health import log_warnings, record_work, records_heartbeat
+from .idempotency import (
+    claim_side_effect, cleanup_processed_side_effects, is_processed, side_effect_key
+)
+from .jobs import finish_job, update_job
+from .lease import CacheLease
+from .log_digest import flush_pending_events, is_log_output_configured, queue_log_event
+from .models import OnboardingToken, OnboardingStageEvent, AutoKickSchedule, PendingLogEvent
+from .ratelimit import is_circuit_open
+from .retention import compact_inactive_schedules
 from .app_settings import (
     DISCORD_ONBOARDING_AUTO_KICK_ENABLED,
     DISCORD_ONBOARDING_REMINDERS_ENABLED,
-    DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID,
     DISCORD_ONBOARDING_KICK_GOODBYE_MESSAGE,
-    DISCORD_ONBOARDING_BASE_URL
+    DISCORD_ONBOARDING_BASE_URL,
+    DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL,
+    DISCORD_ONBOARDING_PROCESSOR_SHARDS,
+    DISCORD_ONBOARDING_STAGE_EVENT_RETENTION_DAYS,
+    DISCORD_ONBOARDING_TASK_QUEUES
 )
 
 from aadiscordbot.app_settings import get_site_url
 
 logger = logging.getLogger(__name__)
 
+# Bot tasks queued by one auto-kick (goodbye DM and kick)
+BOT_TASKS_PER_KICK = 2
+
+# Auto-kick processor lease: one run at a time (and one worker per shard)
+PROCESSOR_LEASE_KEY = 'discord_onboarding_processor_lease'
+PROCESSOR_LEASE_SECONDS = 5 * 60
+# Seconds a finished run keeps the lease, so duplicate triggers are ignored
+PROCESSOR_LEASE_LINGER = 60
+# Extend the lease after this many queued tasks
+PROCESSOR_HEARTBEAT_EVERY = 200
+
+# Tokens deleted per query by the daily cleanup
+CLEANUP_CHUNK_SIZE = 5000
+
+# Task lanes: completion and role sync, bulk reminders and kicks, logging and cleanup.
+# Priorities follow Alliance Auth's broker setup (0 highest, 9 lowest); the dedicated
+# queues are only used with DISCORD_ONBOARDING_TASK_QUEUES enabled.
+HIGH = 'high'
+BULK = 'bulk'
+LOW = 'low'
+
+TASK_PRIORITIES = {HIGH: 1, BULK: 6, LOW: 8}
+
+TASK_QUEUES = {
+    HIGH: 'discord_onboarding_high',
+    BULK: 'discord_onboarding_bulk',
+    LOW: 'discord_onboarding_low',
+}
 
-@shared_task
-def process_completed_onboarding(token_id):
-    """Process a completed onboarding by updating Discord roles and nickname."""
-
-    try:
-        token = OnboardingToken.objects.get(id=token_id)
-
-        if not token.used or not token.user:
-            logger.warning(f"Token {token_id} is not properly completed")
-            return
-
-        # Check if Discord user exists
-        try:
-            DiscordUser.objects.get(user=token.user)
 
-            # Update groups (roles) for the user
-            update_groups.delay(token.user.pk)
-            logger.info(f"Queued group update for user {token.user}")
+def _task_options(lane):
+    """``shared_task`` options routing a task to its lane."""
+    return {
+        'priority': TASK_PRIORITIES[lane],
+        'queue': TASK_QUEUES[lane] if DISCORD_ONBOARDING_TASK_QUEUES else None,
+    }
 
-            # Update nickname for the user
-            update_nickname.delay(token.user.pk)
-            logger.info(f"Queued nickname update for user {token.user}")
 
-        except DiscordUser.DoesNotExist:
-            logger.error(
-                f"DiscordUser not found for user {token.user} after onboarding completion"
-            )
+@shared_task(**_task_options(HIGH))
+def process_completed_onboarding(token_id, correlation_id=None):
+    """Process a completed onboarding by updating Discord roles and nickname."""
 
-    except OnboardingToken.DoesNotExist:
-        logger.error(f"OnboardingToken {token_id} not found")
-    except Exception as e:
-        logger.error(f"Error processing completed onboarding for token {token_id}: {e}")
+    with tracing.correlation(correlation_id):
+        try:
+            token = OnboardingToken.objects.get(id=token_id)
+
+            if not token.used or not token.user:
+                logger.warning(f"Token {token_id} is not properly completed")
+                return
+
+            # Check if Discord user exists
+            try:
+                DiscordUser.objects.get(user=token.user)
+
+                # Update groups (roles) for the user, recording when the sync finished
+                update_groups.apply_async(
+                    args=[token.user.pk], priority=TASK_PRIORITIES[HIGH],
+                    link=record_onboarding_stage.si(
+                        token.id, OnboardingStageEvent.STAGE_ROLES_SYNCED, correlation_id=token.correlation_id
+                    )
+                )
+                tracing.record_stage(token, OnboardingStageEvent.STAGE_SYNC_QUEUED)
+                logger.info(f"Queued group update for user {token.user}")
+
+                # Update nickname for the user
+                update_nickname.apply_async(args=[token.user.pk], priority=TASK_PRIORITIES[HIGH])
+                logger.info(f"Queued nickname update for user {token.user}")
+
+            except DiscordUser.DoesNotExist:
+                logger.error(
+                    f"DiscordUser not found for user {token.user} after onboarding completion"
+                )
+
+        except OnboardingToken.DoesNotExist:
+            logger.error(f"OnboardingToken {token_id} not found")
+        except Exception as e:
+            logger.error(f"Error processing completed onboarding for token {token_id}: {e}")
+
+
+@shared_task(**_task_options(LOW))
+def record_onboarding_stage(token_id, stage, correlation_id=None):
+    """Record a stage of an onboarding reached outside this app, e.g. the Discord role sync."""
+
+    with tracing.correlation(correlation_id):
+        token = OnboardingToken.objects.filter(id=token_id).first()
+        if token is None:
+            logger.debug(f"OnboardingToken {token_id} gone before recording stage {stage}")
+            return
+        tracing.record_stage(token, stage)
+        logger.info(f"Onboarding of {token.discord_username} reached stage {stage}")
 
 
-@shared_task
+@shared_task(**_task_options(LOW))
+@records_heartbeat
 def cleanup_expired_tokens():
     """Clean up expired and old onboarding tokens."""
 
@@ -66,19 +144,43 @@ def cleanup_expired_tokens():
     # Delete tokens older than 24 hours
     cutoff_date = timezone.now() - timedelta(hours=24)
 
-    expired_count = OnboardingToken.objects.filter(
+    # Reminder tokens of active schedules are reused, their expiry slides forward
+    expired_tokens = OnboardingToken.objects.filter(
         created_at__lt=cutoff_date
-    ).count()
+    ).exclude(
+        reminder_schedules__is_active=True
+    )
 
-    OnboardingToken.objects.filter(
-        created_at__lt=cutoff_date
-    ).delete()
+    # Delete in chunks: a single delete() sets reminder_token to NULL on schedules with one
+    # UPDATE listing every deleted ID, which SQLite refuses past its variable limit
+    expired_count = 0
+    while True:
+        chunk = list(expired_tokens.values_list('id', flat=True)[:CLEANUP_CHUNK_SIZE])
+        if not chunk:
+            break
+        expired_count += delete_counted(OnboardingToken.objects.filter(id__in=chunk))
 
     logger.info(f"Cleaned up {expired_count} expired onboarding tokens")
+
+    cleanup_processed_side_effects()
+
+    status_count = cleanup_delivery_statuses()
+    if status_count:
+        logger.info(f"Cleaned up {status_count} expired DM delivery statuses")
+
+    stage_count = tracing.cleanup_stage_events(DISCORD_ONBOARDING_STAGE_EVENT_RETENTION_DAYS)
+    if stage_count:
+        logger.info(f"Cleaned up {stage_count} old onboarding stage events")
+
+    record_work(scanned=expired_count + status_count + stage_count)
+
+    # Correct any drift in the running counts
+    recount()
+
     return expired_count
 
 
-@shared_task
+@shared_task(**_task_options(BULK))
 def send_onboarding_reminder(schedule_id):
     """Send a reminder DM with a fresh auth link to an unauthenticated user."""
 
@@ -87,7 +189,7 @@ def send_onboarding_reminder(schedule_id):
         return
 
     try:
-        schedule = AutoKickSchedule.objects.get(id=schedule_id, is_active=True)
+        schedule = AutoKickSchedule.objects.select_related('reminder_token').get(id=schedule_id, is_active=True)
     except AutoKickSchedule.DoesNotExist:
         logger.warning(f"AutoKickSchedule {schedule_id} not found or inactive")
         return
@@ -95,69 +197,47 @@ def send_onboarding_reminder(schedule_id):
     # Check if user has authenticated since schedule was created
     if OnboardingToken.objects.filter(discord_id=schedule.discord_id, used=True).exists():
         logger.info(f"User {schedule.discord_username} has authenticated, deactivating schedule")
-        schedule.deactivate()
+        schedule.deactivate(AutoKickSchedule.OUTCOME_AUTHENTICATED)
         return
     
     # Also check if user is now linked to Alliance Auth (in case they authenticated via other means)
     if DiscordUser.objects.filter(uid=schedule.discord_id).exists():
         logger.info(f"User {schedule.discord_username} is now linked to Alliance Auth, deactivating schedule")
-        schedule.deactivate()
+        schedule.deactivate(AutoKickSchedule.OUTCOME_AUTHENTICATED)
+        return
+
+    reminder_number = schedule.reminder_count + 1
+    reminder_key = side_effect_key(schedule.id, 'reminder', reminder_number)
+
+    # A redelivery of a reminder the bot already sent only has to catch up on the bookkeeping
+    if is_processed(reminder_key):
+        schedule.mark_reminder_sent()
+        logger.info(f"Reminder #{reminder_number} to {schedule.discord_username} was already sent")
         return
 
-    # Create a fresh onboarding token
+    # Don't spend a DM on users whose DMs recently failed, mention them instead
+    if is_dm_undeliverable(schedule.discord_id):
+        # The fallback mention stands in for the DM, so it takes the reminder's key
+        if not claim_side_effect(reminder_key):
+            return
+        queue_dm_fallback(schedule.discord_id, schedule.guild_id)
+        schedule.mark_reminder_sent()
+        logger.info(f"Skipped reminder DM to {schedule.discord_username} - DMs recently undeliverable")
+        return
+
+    # Reuse the schedule's onboarding token, sliding its expiry forward
     try:
-        token = OnboardingToken.objects.create(
-            discord_id=schedule.discord_id,
-            discord_username=schedule.discord_username
-        )
+        token = schedule.refresh_reminder_token()
 
         # Create onboarding URL
         base_url = DISCORD_ONBOARDING_BASE_URL or get_site_url()
         onboarding_url = f"{base_url}/discord-onboarding/start/{token.token}/"
 
-        # Create reminder message  
-        reminder_number = schedule.reminder_count + 1
-        message = f"**Authentication Reminder #{reminder_number}**"
-        
-        # Get guild name for better context (we'll need to use a bot task for this)
-        guild_name = "the Discord server"  # Fallback if we can't get the guild name
-        
-        embed_data = {
-            "title": f"Authentication Reminder #{reminder_number}",
-            "description": (
-                f"**ACTION REQUIRED**\n\n"
-                f"You still need to authenticate your Discord account to maintain access to **{guild_name}**.\n\n"
-                f"**Time remaining:** You have until **{schedule.kick_scheduled_at.strftime('%Y-%m-%d %H:%M UTC')}** "
-                f"to complete authentication, or you will be automatically removed from the server.\n\n"
-            ),
-            "color": 0xFF6B35,  # Orange color for warning
-            "fields": [
-                {
-                    "name": "**CLICK THE LINK BELOW TO AUTHENTICATE NOW**",
-                    "value": f"[**AUTHENTICATE NOW**]({onboarding_url})\n\n",
-                    "inline": False
-                },
-                {
-                    "name": "What happens if I don't authenticate?",
-                    "value": (
-                        "• You will be automatically removed from the server\n"
-                        "• You can rejoin anytime and authenticate then\n"
-                        "• No penalties - just complete the process when ready"
-                    ),
-                    "inline": False
-                }
-            ],
-            "footer": {
-                "text": f"This is reminder #{reminder_number}. Link expires in 1 hour."
-            }
-        }
-
         # Send DM via Discord bot task system with guild context
-        from aadiscordbot import tasks as discord_tasks
-        discord_tasks.run_task_function.delay(
-            function='discord_onboarding.bot_tasks.send_reminder_with_guild_context',
-            task_args=[schedule.id, onboarding_url, reminder_number, schedule.kick_scheduled_at.strftime('%Y-%m-%d %H:%M UTC')],
-            task_kwargs={}
+        enqueue_bot_task(
+            'send_reminder_with_guild_context',
+            [schedule.id, onboarding_url, reminder_number, schedule.kick_scheduled_at.strftime('%Y-%m-%d %H:%M UTC')],
+            {'idempotency_key': reminder_key}
         )
 
         # Mark reminder as sent
@@ -169,7 +249,7 @@ def send_onboarding_reminder(schedule_id):
         logger.error(f"Error sending reminder to {schedule.discord_username}: {e}")
 
 
-@shared_task
+@shared_task(**_task_options(BULK))
 def auto_kick_unauthenticated_user(schedule_id):
     """Auto-kick an unauthenticated user after the timeout period."""
 
@@ -186,44 +266,36 @@ def auto_kick_unauthenticated_user(schedule_id):
     # Final check if user has authenticated  
     if OnboardingToken.objects.filter(discord_id=schedule.discord_id, used=True).exists():
         logger.info(f"User {schedule.discord_username} authenticated before kick, deactivating schedule")
-        schedule.deactivate()
+        schedule.deactivate(AutoKickSchedule.OUTCOME_AUTHENTICATED)
         return
     
     # Also check if user is now linked to Alliance Auth (in case they authenticated via other means)
     if DiscordUser.objects.filter(uid=schedule.discord_id).exists():
         logger.info(f"User {schedule.discord_username} is now linked to Alliance Auth, deactivating schedule")
-        schedule.deactivate()
+        schedule.deactivate(AutoKickSchedule.OUTCOME_AUTHENTICATED)
         return
 
     try:
         # Send goodbye DM first
-        guild_name = "the Discord server"  # Fallback if we can't get guild name
-        
-        goodbye_embed = {
-            "title": f"Goodbye from {guild_name}",
-            "description": DISCORD_ONBOARDING_KICK_GOODBYE_MESSAGE,
-            "color": 0xFF0000,  # Red color
-            "footer": {
-                "text": f"You're welcome to rejoin {guild_name} anytime and complete authentication then!"
-            }
-        }
-
-        from aadiscordbot import tasks as discord_tasks
-        discord_tasks.run_task_function.delay(
-            function='discord_onboarding.bot_tasks.send_goodbye_with_guild_context',
-            task_args=[schedule.id, DISCORD_ONBOARDING_KICK_GOODBYE_MESSAGE],
-            task_kwargs={}
-        )
+        if not is_dm_undeliverable(schedule.discord_id):
+            enqueue_bot_task(
+                'send_goodbye_with_guild_context',
+                [schedule.id, DISCORD_ONBOARDING_KICK_GOODBYE_MESSAGE],
+                {'idempotency_key': side_effect_key(schedule.id, 'goodbye')}
+            )
 
         # Kick user from guild
-        kick_user_from_guild.delay(schedule.guild_id, schedule.discord_id, "Failed to authenticate within required timeframe")
+        kick_user_from_guild.delay(
+            schedule.guild_id, schedule.discord_id, "Failed to authenticate within required timeframe",
+            idempotency_key=side_effect_key(schedule.id, 'kick')
+        )
 
         # Log the kick if channel is configured
-        if DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID:
+        if is_log_output_configured():
             log_auto_kick.delay(schedule_id)
 
         # Deactivate the schedule
-        schedule.deactivate()
+        schedule.deactivate(AutoKickSchedule.OUTCOME_KICKED)
 
         logger.info(f"Auto-kicked user {schedule.discord_username} (ID: {schedule.discord_id}) from guild {schedule.guild_id}")
 
@@ -231,29 +303,27 @@ def auto_kick_unauthenticated_user(schedule_id):
         logger.error(f"Error auto-kicking user {schedule.discord_username}: {e}")
 
 
-@shared_task 
-def kick_user_from_guild(guild_id, user_id, reason):
+@shared_task(**_task_options(BULK))
+def kick_user_from_guild(guild_id, user_id, reason, idempotency_key=None):
     """Kick a user from a Discord guild."""
-    
+
+    if is_processed(idempotency_key):
+        logger.info(f"Kick {idempotency_key} already processed, skipping")
+        return
+
     try:
-        from aadiscordbot import tasks as discord_tasks
-        
         # Use the bot's task system to kick the user
-        discord_tasks.run_task_function.delay(
-            function='discord_onboarding.bot_tasks.kick_user_from_guild',
-            task_args=[guild_id, user_id, reason],
-            task_kwargs={}
-        )
-        
+        enqueue_bot_task('kick_user_from_guild', [guild_id, user_id, reason], {'idempotency_key': idempotency_key})
+
     except Exception as e:
         logger.error(f"Error queuing kick for user {user_id} from guild {guild_id}: {e}")
 
 
-@shared_task
+@shared_task(**_task_options(LOW))
 def log_auto_kick(schedule_id):
     """Log an auto-kick event to the configured channel."""
 
-    if not DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID:
+    if not is_log_output_configured():
         return
 
     try:
@@ -262,54 +332,31 @@ def log_auto_kick(schedule_id):
         logger.warning(f"AutoKickSchedule {schedule_id} not found for logging")
         return
 
+    if not claim_side_effect(side_effect_key(schedule_id, 'kick_log')):
+        return
+
     try:
-        log_embed = {
-            "title": "Auto-Kick Event",
-            "description": f"User **{schedule.discord_username}** was automatically removed from the server",
-            "color": 0x808080,  # Gray color
-            "fields": [
-                {
-                    "name": "Discord ID",
-                    "value": str(schedule.discord_id),
-                    "inline": True
-                },
-                {
-                    "name": "Joined At", 
-                    "value": schedule.joined_at.strftime('%Y-%m-%d %H:%M UTC'),
-                    "inline": True
-                },
-                {
-                    "name": "Reminders Sent",
-                    "value": str(schedule.reminder_count),
-                    "inline": True
-                },
-                {
-                    "name": "Reason",
-                    "value": "Failed to authenticate within required timeframe",
-                    "inline": False
-                }
-            ],
-            "timestamp": schedule.kick_scheduled_at.isoformat()
-        }
-
-        from aadiscordbot import tasks as discord_tasks
-        discord_tasks.send_channel_message_by_discord_id.delay(
-            DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID,  # channel_id as positional  
-            "",  # message as positional (empty since embed has content)
-            embed=log_embed  # embed as keyword
-        )
+        log_embed = render_embed('kick_log', {
+            'discord_username': schedule.discord_username,
+            'discord_id': schedule.discord_id,
+            'joined_at': schedule.joined_at.strftime('%Y-%m-%d %H:%M UTC'),
+            'reminder_count': schedule.reminder_count,
+            'timestamp': schedule.kick_scheduled_at.isoformat(),
+        }, guild_id=schedule.guild_id)
+
+        queue_log_event(PendingLogEvent.EVENT_AUTO_KICK, schedule.discord_username, log_embed)
 
-        logger.info(f"Logged auto-kick event for {schedule.discord_username} to channel {DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID}")
+        logger.info(f"Queued auto-kick log event for {schedule.discord_username}")
 
     except Exception as e:
         logger.error(f"Error logging auto-kick event: {e}")
 
 
-@shared_task
+@shared_task(**_task_options(LOW))
 def log_successful_authentication(token_id):
     """Log a successful authentication event to the configured channel."""
 
-    if not DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID:
+    if not is_log_output_configured():
         return
 
     try:
@@ -328,105 +375,206 @@ def log_successful_authentication(token_id):
         if hasattr(token.user, 'profile') and token.user.profile.main_character:
             main_character_name = token.user.profile.main_character.character_name
 
-        success_embed = {
-            "title": "Successful Authentication",
-            "description": f"User **{token.discord_username}** successfully linked their Discord account",
-            "color": 0x00FF00,  # Green color
-            "fields": [
-                {
-                    "name": "Discord User",
-                    "value": token.discord_username,
-                    "inline": True
-                },
-                {
-                    "name": "Discord ID",
-                    "value": str(token.discord_id),
-                    "inline": True
-                },
-                {
-                    "name": "Auth User",
-                    "value": token.user.username,
-                    "inline": True
-                },
-                {
-                    "name": "Main Character",
-                    "value": main_character_name,
-                    "inline": True
-                },
-                {
-                    "name": "Authenticated At",
-                    "value": token.created_at.strftime('%Y-%m-%d %H:%M UTC'),
-                    "inline": True
-                },
-                {
-                    "name": "Status",
-                    "value": "Successfully Linked",
-                    "inline": True
-                }
-            ],
-            "footer": {
-                "text": "Discord Onboarding - Authentication Success"
-            },
-            "timestamp": token.created_at.isoformat()
-        }
-
-        from aadiscordbot import tasks as discord_tasks
-        discord_tasks.send_channel_message_by_discord_id.delay(
-            DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID,  # channel_id as positional  
-            "",  # message as positional (empty since embed has content)
-            embed=success_embed  # embed as keyword
-        )
+        success_embed = render_embed('auth_success_log', {
+            'discord_username': token.discord_username,
+            'discord_id': token.discord_id,
+            'auth_username': token.user.username,
+            'main_character_name': main_character_name,
+            'authenticated_at': token.created_at.strftime('%Y-%m-%d %H:%M UTC'),
+            'timestamp': token.created_at.isoformat(),
+        })
+
+        queue_log_event(PendingLogEvent.EVENT_AUTHENTICATED, token.discord_username, success_embed)
 
-        logger.info(f"Logged successful authentication for {token.discord_username} to channel {DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID}")
+        logger.info(f"Queued successful authentication log event for {token.discord_username}")
 
     except Exception as e:
         logger.error(f"Error logging successful authentication: {e}")
 
 
+@shared_task(**_task_options(LOW))
+@records_heartbeat
+def flush_log_digest():
+    """Post pending log channel events as digest messages."""
 
-@shared_task
-def process_auto_kick_schedules():
-    """Process all active auto-kick schedules for reminders and kicks."""
+    try:
+        handled = flush_pending_events()
+        record_work(scanned=handled)
+        return handled
+    except Exception as e:
+        logger.error(f"Error flushing log digest: {e}")
+
+
+@shared_task(**_task_options(LOW))
+@records_heartbeat
+def compact_schedules():
+    """Fold old inactive auto-kick schedules into daily summaries."""
+
+    try:
+        handled = compact_inactive_schedules()
+        record_work(scanned=handled)
+        return handled
+    except Exception as e:
+        logger.error(f"Error compacting inactive auto-kick schedules: {e}")
+
+
+@shared_task(**_task_options(LOW))
+@records_heartbeat
+def send_dm_fallback_digest():
+    """Mention users who could not be DMed in the configured welcome channel."""
+
+    try:
+        handled = flush_dm_fallbacks()
+        record_work(scanned=handled)
+        return handled
+    except Exception as e:
+        logger.error(f"Error sending DM fallback digest: {e}")
 
-    if not DISCORD_ONBOARDING_AUTO_KICK_ENABLED:
-        return
+
+def _queue_with_heartbeat(task, schedule_ids, lease):
+    """Queue ``task`` for each schedule while the lease is still ours, returns the number queued."""
+    queued = 0
+    for schedule_id in schedule_ids:
+        if queued % PROCESSOR_HEARTBEAT_EVERY == 0 and not lease.heartbeat():
+            logger.warning("Auto-kick processor lease lost, stopping")
+            break
+        task.delay(schedule_id)
+        queued += 1
+    return queued
+
+
+def _in_shard(schedules, shard, shards):
+    """Narrow due ``schedules`` to those with ``id % shards == shard``.
+
+    The modulo only filters rows the partial due indexes already found, so
+    every shard reads the due schedules through the index instead of scanning
+    the whole active set.
+    """
+    if shards <= 1:
+        return schedules
+    return schedules.alias(shard=Mod('id', shards)).filter(shard=shard)
+
+
+def _queue_due_schedules(capacity, lease, shard=0, shards=1):
+    """Queue due kicks, then due reminders, of one shard up to ``capacity`` bot tasks.
+
+    Returns a (reminders, kicks) tuple of the number queued.
+    """
 
     from django.utils import timezone
 
+    started = time.monotonic()
+    now = timezone.now()
+
+    # Process users due for kicks. Any free capacity allows at least one kick, even
+    # when it is less than a kick's bot tasks, so light steady load can't starve kicks.
+    kick_limit = max(capacity // BOT_TASKS_PER_KICK, 1) if capacity > 0 else 0
+    due_kicks = _in_shard(AutoKickSchedule.objects.due_for_kick(now), shard, shards)
+    kick_ids = list(due_kicks.values_list('id', flat=True)[:kick_limit])
+    kick_count = _queue_with_heartbeat(auto_kick_unauthenticated_user, kick_ids, lease)
+    record_work(scanned=len(kick_ids), enqueued=kick_count)
+    capacity = max(capacity - kick_count * BOT_TASKS_PER_KICK, 0)
+
+    if kick_count > 0:
+        logger.info(f"Queued {kick_count} auto-kick actions")
+
     # Process users due for reminders
+    reminder_count = 0
     if DISCORD_ONBOARDING_REMINDERS_ENABLED:
-        reminder_schedules = AutoKickSchedule.objects.filter(
-            is_active=True
-        ).select_related()
-
-        reminder_count = 0
-        for schedule in reminder_schedules:
-            if schedule.is_due_for_reminder():
-                send_onboarding_reminder.delay(schedule.id)
-                reminder_count += 1
+        due_reminders = _in_shard(AutoKickSchedule.objects.due_for_reminder(now), shard, shards)
+        reminder_ids = list(due_reminders.values_list('id', flat=True)[:capacity])
+        reminder_count = _queue_with_heartbeat(send_onboarding_reminder, reminder_ids, lease)
+        record_work(scanned=len(reminder_ids), enqueued=reminder_count)
 
         if reminder_count > 0:
             logger.info(f"Queued {reminder_count} reminder messages")
 
-    # Process users due for kicks
-    kick_schedules = AutoKickSchedule.objects.filter(
-        is_active=True,
-        kick_scheduled_at__lte=timezone.now()
-    )
+    if capacity - reminder_count <= 0:
+        logger.info("Discord bot queue is at its target depth, any remaining work waits for the next run")
 
-    kick_count = 0
-    for schedule in kick_schedules:
-        if schedule.is_due_for_kick():
-            auto_kick_unauthenticated_user.delay(schedule.id)
-            kick_count += 1
+    metrics.PROCESSOR_TICK_SECONDS.observe(time.monotonic() - started)
+    metrics.PROCESSOR_SCHEDULES.observe(kick_count, action='kick')
+    metrics.PROCESSOR_SCHEDULES.observe(reminder_count, action='reminder')
+    return reminder_count, kick_count
 
-    if kick_count > 0:
-        logger.info(f"Queued {kick_count} auto-kick actions")
 
-    return f"Processed {reminder_count} reminders and {kick_count} kicks"
+@shared_task(**_task_options(BULK))
+@records_heartbeat
+def process_auto_kick_schedules():
+    """Process active auto-kick schedules for reminders and kicks.
+
+    Only as much work as fits under ``DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH``
+    is queued per run, kicks first. The rest is left for the next run. A cache
+    lease makes sure only one run is in progress at a time; with
+    ``DISCORD_ONBOARDING_PROCESSOR_SHARDS`` above 1 the run is split into one
+    ``process_auto_kick_shard`` task per shard.
+    """
+
+    if not DISCORD_ONBOARDING_AUTO_KICK_ENABLED:
+        return
+
+    # Don't pile more work onto the bot while Discord is failing
+    if is_circuit_open():
+        logger.warning("Discord circuit is open, leaving reminders and kicks for the next run")
+        return "Discord circuit open, skipped"
 
+    lease = CacheLease(PROCESSOR_LEASE_KEY, PROCESSOR_LEASE_SECONDS)
+    if not lease.acquire():
+        logger.info("Auto-kick processor is already running, skipping this run")
+        return "Already running, skipped"
+
+    try:
+        capacity = available_bot_capacity()
 
-@shared_task
+        shards = DISCORD_ONBOARDING_PROCESSOR_SHARDS
+        if shards > 1:
+            for shard in range(shards):
+                shard_capacity = capacity // shards + (1 if shard < capacity % shards else 0)
+                process_auto_kick_shard.delay(shard, shards, shard_capacity)
+            record_work(enqueued=shards)
+            return f"Dispatched {shards} shards"
+
+        reminder_count, kick_count = _queue_due_schedules(capacity, lease)
+        return f"Processed {reminder_count} reminders and {kick_count} kicks"
+
+    finally:
+        # Keep turning away duplicate triggers (e.g. a second beat) for a little while
+        lease.release(linger=PROCESSOR_LEASE_LINGER)
+
+
+@shared_task(**_task_options(BULK))
+def process_auto_kick_shard(shard, shards, capacity):
+    """Process the auto-kick schedules with ``id % shards == shard``."""
+
+    # The circuit may have opened since the shards were dispatched
+    if is_circuit_open():
+        logger.warning(f"Discord circuit is open, leaving shard {shard}/{shards} for the next run")
+        return "Discord circuit open, skipped"
+
+    lease = CacheLease(f"{PROCESSOR_LEASE_KEY}_{shard}_of_{shards}", PROCESSOR_LEASE_SECONDS)
+    if not lease.acquire():
+        logger.info(f"Auto-kick shard {shard}/{shards} is still running, skipping this run")
+        return "Already running, skipped"
+
+    try:
+        reminder_count, kick_count = _queue_due_schedules(capacity, lease, shard, shards)
+        return f"Shard {shard}/{shards}: processed {reminder_count} reminders and {kick_count} kicks"
+
+    finally:
+        lease.release()
+
+
+@shared_task(**_task_options(LOW))
+def check_onboarding_health():
+    """Log warnings for stopped or slow periodic tasks and auto-kick scheduling lag."""
+
+    try:
+        return log_warnings()['status']
+    except Exception as e:
+        logger.error(f"Error checking onboarding health: {e}")
+
+
+@shared_task(**_task_options(BULK))
 def add_orphaned_users_admin_task(guild_ids):
     """Admin task to add orphaned Discord users from specified guilds to auto-kick timeline."""
     
@@ -450,7 +598,7 @@ def add_orphaned_users_admin_task(guild_ids):
     
     try:
         # Count existing schedules for reporting
-        active_schedules = AutoKickSchedule.objects.filter(is_active=True).count()
+        active_schedules = get_count(ACTIVE_SCHEDULES)
         logger.info(f"Admin add orphans task: {active_schedules} active schedules exist")
         
         return (f"Admin task completed. Note: Discord bot integration required for member scanning. "
@@ -462,14 +610,68 @@ def add_orphaned_users_admin_task(guild_ids):
         return f"Error: {e}"
 
 
+# Schedules handled per chunk (and progress update) by the admin bulk tasks
+ADMIN_BULK_CHUNK_SIZE = 500
+
+
+@shared_task(**_task_options(BULK))
+def send_onboarding_reminders(schedule_ids, job_id=None):
+    """Send reminders to many schedules from a single task, e.g. the admin "Send reminder now" action."""
+
+    sent = 0
+    for index, schedule_id in enumerate(schedule_ids, start=1):
+        try:
+            send_onboarding_reminder(schedule_id)
+            sent += 1
+        except Exception as e:
+            logger.error(f"Error sending reminder for schedule {schedule_id}: {e}")
+        if index % ADMIN_BULK_CHUNK_SIZE == 0:
+            update_job(job_id, index)
+
+    result = f"Processed reminders for {sent} of {len(schedule_ids)} schedules"
+    finish_job(job_id, result)
+    return result
+
+
+@shared_task(**_task_options(BULK))
+def deactivate_schedules(schedule_ids, job_id=None):
+    """Deactivate schedules in chunks of single UPDATEs, for admin actions on large selections."""
+
+    deactivated = 0
+    for start in range(0, len(schedule_ids), ADMIN_BULK_CHUNK_SIZE):
+        chunk = schedule_ids[start:start + ADMIN_BULK_CHUNK_SIZE]
+        deactivated += AutoKickSchedule.objects.filter(id__in=chunk).deactivate()
+        update_job(job_id, start + len(chunk))
+
+    result = f"Deactivated {deactivated} auto-kick schedules"
+    finish_job(job_id, result)
+    return result
+
+
 # Periodic task configuration (add to CELERYBEAT_SCHEDULE in settings)
 CELERYBEAT_SCHEDULE = {
     'discord_onboarding_cleanup': {
         'task': 'discord_onboarding.tasks.cleanup_expired_tokens',
         'schedule': crontab(hour=2, minute=0),  # Run daily at 2 AM
     },
+    'discord_onboarding_schedule_compaction': {
+        'task': 'discord_onboarding.tasks.compact_schedules',
+        'schedule': crontab(hour=3, minute=0),  # Run daily at 3 AM
+    },
     'discord_onboarding_auto_kick_processor': {
         'task': 'discord_onboarding.tasks.process_auto_kick_schedules',
         'schedule': crontab(minute='*/15'),  # Run every 15 minutes
     },
+    'discord_onboarding_dm_fallback_digest': {
+        'task': 'discord_onboarding.tasks.send_dm_fallback_digest',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
+    'discord_onboarding_health_check': {
+        'task': 'discord_onboarding.tasks.check_onboarding_health',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
+    'discord_onboarding_log_digest': {
+        'task': 'discord_onboarding.tasks.flush_log_digest',
+        'schedule': DISCORD_ONBOARDING_LOG_DIGEST_INTERVAL,  # Seconds between digest posts
+    },
 }
@@ -0,0 +1,25 @@
+"""Query budgets for the onboarding views, and a test case mixin asserting them."""
+
+from ..profiling import capture
+
+# Most queries each view may run for a request, keyed by view and case
+QUERY_BUDGETS = {
+    'onboarding_start': 3,
+    'onboarding_callback': 9,
+    'discord_onboarding_registration:get': 1,
+    'discord_onboarding_registration:post': 11,
+}
+
+
+class QueryBudgetMixin:
+    """Adds ``assertQueryBudget`` to a ``TestCase``."""
+
+    def assertQueryBudget(self, budget, view, request, *args, **kwargs):
+        """Call ``view`` and fail if it ran more queries than ``QUERY_BUDGETS[budget]``, returns the response."""
+        with capture() as profile:
+            response = view(request, *args, **kwargs)
+        self.assertLessEqual(
+            profile.queries, QUERY_BUDGETS[budget],
+            f"{budget} ran {profile.queries} queries, over its budget of {QUERY_BUDGETS[budget]}"
+        )
+        return response
@@ -0,0 +1,132 @@
+"""Tests for the Discord Onboarding admin."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from .. import counters, jobs, tasks
+from ..models import AutoKickSchedule, DMDeliveryStatus, OnboardingToken
+
+
+class AdminSearchTestCase(TestCase):
+    """Test cases for exact-match admin search."""
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.schedule = AutoKickSchedule.objects.create(
+            discord_id=123456789012345678, discord_username="pilot", guild_id=42,
+            joined_at=timezone.now() - timedelta(days=1)
+        )
+        self.token = OnboardingToken.objects.create(discord_id=123456789012345678, discord_username="pilot")
+
+    def _search(self, model, term):
+        model_admin = site._registry[model]
+        queryset, _ = model_admin.get_search_results(
+            self.request, model.objects.all(), term
+        )
+        return queryset
+
+    def test_numeric_search_is_exact(self):
+        """Test that a Discord or guild ID is matched exactly instead of with LIKE."""
+        queryset = self._search(AutoKickSchedule, " 123456789012345678 ")
+        self.assertEqual(list(queryset), [self.schedule])
+        self.assertNotIn('LIKE', str(queryset.query))
+
+        self.assertEqual(list(self._search(AutoKickSchedule, "42")), [self.schedule])
+        self.assertFalse(self._search(AutoKickSchedule, "4").exists())
+
+    def test_token_search_uses_unique_lookup(self):
+        """Test that token-shaped input is looked up by the token itself."""
+        queryset = self._search(OnboardingToken, self.token.token)
+        self.assertEqual(list(queryset), [self.token])
+        self.assertNotIn('LIKE', str(queryset.query))
+
+    def test_username_fallback(self):
+        """Test that other input still searches usernames."""
+        self.assertEqual(list(self._search(AutoKickSchedule, "pil")), [self.schedule])
+        self.assertEqual(list(self._search(OnboardingToken, "pil")), [self.token])
+        self.assertFalse(self._search(AutoKickSchedule, "99999999999999999999").exists())
+
+    def test_numeric_username_fallback(self):
+        """Test that an all-digit username is still found when no ID matches it exactly."""
+        numeric = AutoKickSchedule.objects.create(
+            discord_id=1, discord_username="@1337", guild_id=42, joined_at=timezone.now()
+        )
+        self.assertEqual(list(self._search(AutoKickSchedule, "1337")), [numeric])
+
+    def test_id_only_search(self):
+        """Test that admins without text columns only match IDs exactly and keep their search box."""
+        status = DMDeliveryStatus.objects.create(
+            discord_id=123456789012345678, guild_id=42, last_failure_reason=DMDeliveryStatus.REASON_FORBIDDEN,
+            last_failure_at=timezone.now()
+        )
+
+        queryset = self._search(DMDeliveryStatus, "123456789012345678")
+        self.assertEqual(list(queryset), [status])
+        self.assertNotIn('LIKE', str(queryset.query))
+        self.assertFalse(self._search(DMDeliveryStatus, "1234").exists())
+        self.assertFalse(self._search(DMDeliveryStatus, "pilot").exists())
+        self.assertEqual(list(self._search(DMDeliveryStatus, "")), [status])
+        self.assertEqual(site._registry[DMDeliveryStatus].get_search_fields(self.request), ('discord_id',))
+
+
+class AdminBulkActionsTestCase(TestCase):
+    """Test cases for bulk schedule admin actions."""
+
+    def setUp(self):
+        self.model_admin = site._registry[AutoKickSchedule]
+        self.request = RequestFactory().get('/')
+        self.request.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        AutoKickSchedule.objects.bulk_create([
+            AutoKickSchedule(
+                discord_id=i, discord_username=f"user{i}", guild_id=1, joined_at=timezone.now(),
+                kick_scheduled_at=timezone.now() + timedelta(days=7)
+            )
+            for i in range(6)
+        ])
+        counters.recount()
+
+    def test_deactivate_is_one_update(self):
+        """Test that deactivating a selection is a single UPDATE and keeps the counters right."""
+        queryset = AutoKickSchedule.objects.filter(discord_id__lt=4)
+
+        with patch.object(self.model_admin, 'message_user'), self.assertNumQueries(4):
+            self.model_admin.deactivate_schedules(self.request, queryset)
+
+        self.assertEqual(AutoKickSchedule.objects.filter(is_active=False, outcome='cancelled').count(), 4)
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 2)
+        self.assertEqual(counters.get_count(counters.INACTIVE_SCHEDULES), 4)
+
+    @patch.object(jobs, 'BACKGROUND_THRESHOLD', 3)
+    @patch('discord_onboarding.admin.BACKGROUND_THRESHOLD', 3)
+    @patch.object(tasks, 'ADMIN_BULK_CHUNK_SIZE', 4)
+    def test_large_selection_runs_as_job(self):
+        """Test that a large selection is handed to a background job that records its progress."""
+        with patch.object(self.model_admin, 'message_user') as message_user, \
+                patch.object(tasks.deactivate_schedules, 'delay') as delay, \
+                patch('discord_onboarding.admin.reverse', return_value='/job/'):
+            self.model_admin.deactivate_schedules(self.request, AutoKickSchedule.objects.all())
+
+        schedule_ids, job_id = delay.call_args.args[0], delay.call_args.kwargs['job_id']
+        self.assertEqual(len(schedule_ids), 6)
+        self.assertIn('View progress', message_user.call_args.args[1])
+        self.assertEqual(AutoKickSchedule.objects.filter(is_active=True).count(), 6)
+
+        tasks.deactivate_schedules(schedule_ids, job_id=job_id)
+
+        job = jobs.get_job(job_id)
+        self.assertEqual((job['done'], job['total']), (6, 6))
+        self.assertEqual(job['result'], "Deactivated 6 auto-kick schedules")
+
+    def test_send_reminder_now_queues_one_task(self):
+        """Test that reminders for a selection go out through one Celery task."""
+        with patch.object(self.model_admin, 'message_user'), \
+                patch.object(tasks.send_onboarding_reminders, 'delay') as delay:
+            self.model_admin.send_reminder_now(self.request, AutoKickSchedule.objects.all())
+
+        delay.assert_called_once()
+        self.assertEqual(len(delay.call_args.args[0]), 6)
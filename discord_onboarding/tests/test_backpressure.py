@@ -0,0 +1,95 @@
+"""Tests for Discord Onboarding bot queue backpressure."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import backpressure, tasks
+from ..models import AutoKickSchedule
+
+
+class BackpressureTestCase(TestCase):
+    """Test cases for the outstanding bot task counter and the capped processor."""
+
+    def setUp(self):
+        cache.delete(backpressure.OUTSTANDING_KEY)
+        cache.delete(tasks.PROCESSOR_LEASE_KEY)
+        patcher = patch.object(backpressure, 'broker_queue_depth', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _schedule(self, discord_id, joined_hours_ago, kick_in_hours):
+        now = timezone.now()
+        return AutoKickSchedule.objects.create(
+            discord_id=discord_id,
+            discord_username=f"user{discord_id}",
+            guild_id=1,
+            joined_at=now - timedelta(hours=joined_hours_ago),
+            kick_scheduled_at=now + timedelta(hours=kick_in_hours),
+        )
+
+    @patch('aadiscordbot.tasks.run_task_function.delay')
+    def test_counter_tracks_outstanding_tasks(self, delay):
+        """Test that enqueued bot tasks count as outstanding until they finish."""
+        backpressure.enqueue_bot_task('send_channel_embeds', [1, []])
+        backpressure.enqueue_bot_task('send_channel_embeds', [1, []])
+
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(backpressure.outstanding_bot_tasks(), 2)
+
+        @backpressure.tracks_outstanding
+        async def bot_task(bot):
+            return "done"
+
+        self.assertEqual(asyncio.run(bot_task(None)), "done")
+        self.assertEqual(backpressure.outstanding_bot_tasks(), 1)
+
+        # Never goes negative, even if the counter was lost in between
+        cache.delete(backpressure.OUTSTANDING_KEY)
+        asyncio.run(bot_task(None))
+        backpressure.task_finished()
+        self.assertEqual(backpressure.outstanding_bot_tasks(), 0)
+
+    @patch.object(tasks, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True)
+    @patch.object(tasks, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+    @patch.object(tasks.send_onboarding_reminder, 'delay')
+    @patch.object(tasks.auto_kick_unauthenticated_user, 'delay')
+    def test_processor_caps_enqueues_to_target_depth(self, kick_delay, reminder_delay):
+        """Test that the processor only queues what fits under the target depth, kicks first."""
+        for discord_id in range(1, 4):
+            self._schedule(discord_id, joined_hours_ago=60, kick_in_hours=-1)
+        for discord_id in range(10, 20):
+            self._schedule(discord_id, joined_hours_ago=60, kick_in_hours=10)
+        # Not due anything yet
+        self._schedule(99, joined_hours_ago=1, kick_in_hours=20)
+
+        cache.set(backpressure.OUTSTANDING_KEY, 492)
+        with patch.object(backpressure, 'DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH', 500):
+            tasks.process_auto_kick_schedules()
+
+        # 8 free slots: three kicks at two bot tasks each, then two reminders
+        self.assertEqual(kick_delay.call_count, 3)
+        self.assertEqual(reminder_delay.call_count, 2)
+
+        kick_delay.reset_mock()
+        reminder_delay.reset_mock()
+        cache.set(backpressure.OUTSTANDING_KEY, 500)
+        cache.delete(tasks.PROCESSOR_LEASE_KEY)
+        with patch.object(backpressure, 'DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH', 500):
+            tasks.process_auto_kick_schedules()
+
+        kick_delay.assert_not_called()
+        reminder_delay.assert_not_called()
+
+        # A single free slot, less than a kick takes, still lets one kick through instead of a reminder
+        cache.set(backpressure.OUTSTANDING_KEY, 499)
+        cache.delete(tasks.PROCESSOR_LEASE_KEY)
+        with patch.object(backpressure, 'DISCORD_ONBOARDING_BOT_QUEUE_TARGET_DEPTH', 500):
+            tasks.process_auto_kick_schedules()
+
+        self.assertEqual(kick_delay.call_count, 1)
+        reminder_delay.assert_not_called()
@@ -0,0 +1,79 @@
+"""Tests for Discord Onboarding running counters."""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import counters
+from ..models import AutoKickSchedule, OnboardingCounter, OnboardingToken
+
+
+class CountersTestCase(TestCase):
+    """Test cases for keeping counters in step with the tables."""
+
+    def _schedule(self, discord_id):
+        return AutoKickSchedule.objects.create(
+            discord_id=discord_id, discord_username=f"user{discord_id}", guild_id=1,
+            joined_at=timezone.now() - timedelta(days=1)
+        )
+
+    def test_schedule_transitions(self):
+        """Test that creating, deactivating and deleting schedules moves the counts."""
+        schedules = [self._schedule(i) for i in range(3)]
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 3)
+
+        AutoKickSchedule.objects.get(id=schedules[0].id).deactivate()
+        counters.delete_instance(schedules[1])
+
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 1)
+        self.assertEqual(counters.get_count(counters.INACTIVE_SCHEDULES), 1)
+        self.assertEqual(counters.get_model_count(AutoKickSchedule), AutoKickSchedule.objects.count())
+
+    def test_token_transitions(self):
+        """Test that redeeming a token moves it from pending to used."""
+        token = OnboardingToken.objects.create(discord_id=1, discord_username="user")
+        token.used = True
+        token.save()
+        token.save()
+
+        self.assertEqual(counters.get_count(counters.PENDING_TOKENS), 0)
+        self.assertEqual(counters.get_count(counters.USED_TOKENS), 1)
+
+    def test_batched_adjust(self):
+        """Test that batched counter changes are written once at the end."""
+        with self.assertNumQueries(0):
+            with counters.batched():
+                counters.adjust(counters.ACTIVE_SCHEDULES, -1)
+                counters.adjust(counters.ACTIVE_SCHEDULES, 1)
+
+    def test_bulk_delete(self):
+        """Test that a bulk delete adjusts each counter once, without loading rows or sending signals."""
+        schedules = [self._schedule(i) for i in range(5)]
+        AutoKickSchedule.objects.get(id=schedules[0].id).deactivate()
+
+        # Count, fast DELETE, and one UPDATE per counter
+        with self.assertNumQueries(4):
+            deleted = counters.delete_counted(AutoKickSchedule.objects.filter(discord_id__lt=3))
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 2)
+        self.assertEqual(counters.get_count(counters.INACTIVE_SCHEDULES), 0)
+
+        tokens = [OnboardingToken.objects.create(discord_id=i, discord_username=f"user{i}") for i in range(3)]
+        OnboardingToken.objects.filter(id=tokens[0].id).update(used=True)
+        counters.recount()
+
+        self.assertEqual(counters.delete_counted(OnboardingToken.objects.all()), 3)
+        self.assertEqual(counters.get_model_count(OnboardingToken), 0)
+
+    def test_recount_fixes_drift(self):
+        """Test that recount rebuilds missing or drifted counters."""
+        self._schedule(1)
+        OnboardingCounter.objects.filter(name=counters.ACTIVE_SCHEDULES).update(value=40)
+        OnboardingCounter.objects.filter(name=counters.USED_TOKENS).delete()
+
+        self.assertEqual(counters.get_model_count(OnboardingToken), 0)
+        counters.recount()
+
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 1)
@@ -0,0 +1,62 @@
+"""Tests for Discord Onboarding DM delivery tracking."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import delivery
+from ..models import DMDeliveryStatus
+
+
+class DMDeliveryTestCase(TestCase):
+    """Test cases for the undeliverable DM cache."""
+
+    def test_failure_marks_user_undeliverable(self):
+        """Test that a recorded failure is skipped until the backoff expires."""
+        self.assertFalse(delivery.is_dm_undeliverable(1001))
+
+        delivery.record_dm_failure(1001, DMDeliveryStatus.REASON_FORBIDDEN, guild_id=1)
+        delivery.record_dm_failure(1001, DMDeliveryStatus.REASON_CANNOT_SEND)
+
+        self.assertTrue(delivery.is_dm_undeliverable(1001))
+        status = DMDeliveryStatus.objects.get(discord_id=1001)
+        self.assertEqual(status.failure_count, 2)
+        self.assertEqual(status.last_failure_reason, DMDeliveryStatus.REASON_CANNOT_SEND)
+        self.assertEqual(status.guild_id, 1)
+
+        DMDeliveryStatus.objects.filter(discord_id=1001).update(
+            last_failure_at=timezone.now() - timedelta(hours=delivery.DISCORD_ONBOARDING_DM_FAILURE_BACKOFF_HOURS + 1)
+        )
+        self.assertFalse(delivery.is_dm_undeliverable(1001))
+        self.assertEqual(delivery.cleanup_delivery_statuses(), 1)
+
+    def test_fallback_messages_respect_length_limit(self):
+        """Test that mentions are split across messages at Discord's length limit."""
+        messages = delivery.build_fallback_messages(range(10 ** 17, 10 ** 17 + 200))
+
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(all(len(message) <= delivery.MAX_MESSAGE_LENGTH for message in messages))
+        self.assertEqual(sum(message.count("<@") for message in messages), 200)
+
+    @patch.object(delivery, 'DISCORD_ONBOARDING_WELCOME_CHANNEL_ID', {1: 111, 2: 222})
+    def test_flush_posts_one_digest_per_guild(self):
+        """Test that pending fallbacks are batched into one message per guild."""
+        for discord_id, guild_id in ((1, 1), (2, 1), (3, 2)):
+            delivery.record_dm_failure(discord_id, DMDeliveryStatus.REASON_FORBIDDEN)
+            self.assertTrue(delivery.queue_dm_fallback(discord_id, guild_id))
+
+        with patch('aadiscordbot.tasks.send_channel_message_by_discord_id.delay') as send:
+            self.assertEqual(delivery.flush_dm_fallbacks(), 3)
+
+        self.assertEqual(sorted(call.args[0] for call in send.call_args_list), [111, 222])
+        self.assertFalse(DMDeliveryStatus.objects.filter(fallback_pending=True).exists())
+
+    @patch.object(delivery, 'DISCORD_ONBOARDING_WELCOME_CHANNEL_ID', None)
+    def test_no_fallback_without_channel(self):
+        """Test that no fallback is queued when no welcome channel is configured."""
+        delivery.record_dm_failure(5, DMDeliveryStatus.REASON_FORBIDDEN)
+
+        self.assertFalse(delivery.queue_dm_fallback(5, 1))
+        self.assertFalse(DMDeliveryStatus.objects.filter(fallback_pending=True).exists())
@@ -0,0 +1,59 @@
+"""Tests for Discord Onboarding embed templates."""
+
+from django.test import SimpleTestCase
+
+from ..embeds import DEFAULT_EMBED_TEMPLATES, DEFAULT_GUILD_NAME, EmbedRegistry, render_embed
+
+
+class EmbedRegistryTestCase(SimpleTestCase):
+    """Test cases for the embed template registry."""
+
+    def test_render_reminder(self):
+        """Test that guild and per-user placeholders are both rendered."""
+        embed = render_embed('reminder', {
+            'onboarding_url': 'https://auth.example.com/start/abc/',
+            'reminder_number': 2,
+            'kick_time': '2024-01-01 00:00 UTC',
+        }, guild_id=1, guild_name="Test Guild")
+
+        self.assertEqual(embed['title'], "Test Guild Authentication Reminder #2")
+        self.assertIn("https://auth.example.com/start/abc/", embed['fields'][0]['value'])
+        self.assertIn("**Test Guild**", embed['fields'][1]['value'])
+        self.assertEqual(embed['footer']['text'], "This is reminder #2. Link expires in 1 hour.")
+
+    def test_default_guild_name(self):
+        """Test that a missing guild name falls back to the generic name."""
+        embed = render_embed('goodbye', {'goodbye_message': "Bye {not a placeholder}"})
+
+        self.assertEqual(embed['title'], f"Goodbye from {DEFAULT_GUILD_NAME}")
+        self.assertEqual(embed['description'], "Bye {not a placeholder}")
+
+    def test_renders_are_independent(self):
+        """Test that cached guild parts are not shared between rendered embeds."""
+        first = render_embed('bind', {'onboarding_url': 'https://one/'})
+        first['fields'].append({'name': 'extra', 'value': 'extra'})
+        second = render_embed('bind', {'onboarding_url': 'https://two/'})
+
+        self.assertEqual(len(second['fields']), 1)
+        self.assertIn('https://two/', second['fields'][0]['value'])
+
+    def test_overrides(self):
+        """Test global and per-guild overrides."""
+        registry = EmbedRegistry(
+            DEFAULT_EMBED_TEMPLATES,
+            overrides={'goodbye': {'color': 0x123456}},
+            guild_overrides={'42': {'goodbye': {'title': "See you, {guild_name}"}}},
+        )
+
+        default = registry.render('goodbye', {'goodbye_message': 'bye'}, guild_id=1, guild_name="One")
+        self.assertEqual(default['color'], 0x123456)
+        self.assertEqual(default['title'], "Goodbye from One")
+
+        overridden = registry.render('goodbye', {'goodbye_message': 'bye'}, guild_id=42, guild_name="Answer")
+        self.assertEqual(overridden['color'], 0x123456)
+        self.assertEqual(overridden['title'], "See you, Answer")
+
+    def test_unknown_template(self):
+        """Test that unknown template names raise KeyError."""
+        with self.assertRaises(KeyError):
+            render_embed('does-not-exist')
@@ -0,0 +1,58 @@
+"""Tests for Discord Onboarding exports."""
+
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..admin import export_csv, export_ndjson
+from ..models import AutoKickSchedule, OnboardingToken
+
+
+class ExportTestCase(TestCase):
+    """Test cases for streaming CSV/NDJSON exports."""
+
+    def setUp(self):
+        for i in range(3):
+            AutoKickSchedule.objects.create(
+                discord_id=i, discord_username=f"user{i}", guild_id=1 + i % 2,
+                joined_at=timezone.now() - timedelta(days=i)
+            )
+        self.token = OnboardingToken.objects.create(discord_id=1, discord_username="user1")
+
+    def test_admin_action_streams_csv(self):
+        """Test that the admin export action returns a streaming CSV download."""
+        self.assertIn(export_csv, site._registry[AutoKickSchedule].actions)
+        response = export_csv(site._registry[AutoKickSchedule], None, AutoKickSchedule.objects.all())
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['discord_username'] for row in rows], ['user0', 'user1', 'user2'])
+
+    def test_token_export_omits_token_value(self):
+        """Test that exported tokens never include the token itself."""
+        response = export_ndjson(site._registry[OnboardingToken], None, OnboardingToken.objects.all())
+
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(json.loads(content)['discord_username'], "user1")
+        self.assertNotIn(self.token.token, content)
+
+    def test_command_filters(self):
+        """Test that the export command applies its filters."""
+        out = io.StringIO()
+        call_command('export_onboarding', 'schedules', '--format', 'ndjson', '--guild-id', '2', stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['discord_id'] for row in rows], [1])
+
+        out = io.StringIO()
+        call_command('export_onboarding', 'tokens', '--status', 'used', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            'id,discord_id,discord_username,user__username,created_at,expires_at,used'
+        ])
@@ -0,0 +1,101 @@
+"""Tests for the bot cog and bot tasks against the offline fake Discord of the load tests."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from benchmarks.fake_discord import FakeBot, FakeDiscord
+
+from .. import bot_tasks
+from ..cogs import onboarding as cog_module
+from ..delivery import record_dm_failure
+from ..models import AutoKickSchedule, DMDeliveryStatus, OnboardingToken
+from ..ratelimit import DEFERRED, DiscordRateLimiter
+
+
+# aadiscordbot allows sync ORM calls from bot tasks the same way
+@patch.dict('os.environ', {'DJANGO_ALLOW_ASYNC_UNSAFE': 'true'})
+class FakeDiscordTestCase(TransactionTestCase):
+    """Test cases for joins, kicks and reminders through the fake REST layer."""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.api = FakeDiscord(latency=0, bucket_limit=2, bucket_window=10, clock=lambda: self.now)
+        self.bot = FakeBot(self.api)
+        self.guild = self.bot.add_guild(1)
+        self.limiter = DiscordRateLimiter(clock=lambda: self.now, publish=False)
+
+    def _run(self, coro):
+        with patch.object(bot_tasks, 'discord_limiter', self.limiter), \
+                patch.object(bot_tasks, 'enqueue_bot_task') as enqueue_bot_task:
+            return asyncio.run(coro), enqueue_bot_task
+
+    def test_kick_until_rate_limited(self):
+        """Test that kicks past the bucket get a 429 and are deferred until Discord's Retry-After."""
+        for member_id in (11, 12, 13):
+            self.guild.add_member(member_id)
+
+        for member_id in (11, 12):
+            result, _ = self._run(bot_tasks.kick_user_from_guild(self.bot, 1, member_id, "test"))
+            self.assertTrue(result)
+        self.now += 4
+
+        result, enqueue_bot_task = self._run(bot_tasks.kick_user_from_guild(self.bot, 1, 13, "test"))
+
+        self.assertEqual(result, DEFERRED)
+        self.assertEqual(enqueue_bot_task.call_args.kwargs['countdown'], 6)
+        self.assertEqual([member.id for member in self.guild.members], [13])
+        self.assertEqual(self.api.call_counts(), {'kick:1': {'200': 2, '429': 1}})
+
+    def test_reminder_to_closed_dms(self):
+        """Test that a reminder to a user with closed DMs gets a 403 and records the failure."""
+        self.api.forbidden_rate = 1.0
+        schedule = AutoKickSchedule.objects.create(
+            discord_id=21, discord_username="@closed", guild_id=1,
+            joined_at=timezone.now() - timedelta(days=3), kick_scheduled_at=timezone.now() + timedelta(days=4),
+        )
+
+        result, _ = self._run(bot_tasks.send_reminder_with_guild_context(
+            self.bot, schedule.id, "https://auth.example.com/", 1, "tomorrow"
+        ))
+
+        self.assertFalse(result)
+        self.assertEqual(
+            DMDeliveryStatus.objects.get(discord_id=21).last_failure_reason, DMDeliveryStatus.REASON_FORBIDDEN
+        )
+        self.assertEqual(self.api.call_counts(), {'dm': {'403': 1}, 'users': {'200': 1}})
+
+    @patch.object(cog_module, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True)
+    @patch.object(cog_module, 'queue_dm_fallback')
+    def test_join_with_undeliverable_dms(self, queue_dm_fallback):
+        """Test that a join with recently failed DMs gets a schedule and a fallback, but no token or DM."""
+        record_dm_failure(31, DMDeliveryStatus.REASON_FORBIDDEN, 1)
+        member = self.guild.add_member(31)
+
+        asyncio.run(cog_module.OnboardingCog(self.bot).on_member_join(member))
+
+        self.assertFalse(OnboardingToken.objects.filter(discord_id=31).exists())
+        self.assertTrue(AutoKickSchedule.objects.filter(discord_id=31).exists())
+        queue_dm_fallback.assert_called_once_with(31, 1)
+        self.assertEqual(self.api.call_counts(), {})
+
+    @patch.object(cog_module, 'queue_dm_fallback')
+    def test_join_dm_http_error(self, queue_dm_fallback):
+        """Test that a rate limited join DM is recorded as an HTTP error."""
+        member = self.guild.add_member(32)
+
+        async def join():
+            # Use up the DM bucket so the join DM gets a 429
+            for _ in range(self.api.bucket_limit):
+                await self.api.request('dm')
+            await cog_module.OnboardingCog(self.bot).on_member_join(member)
+
+        asyncio.run(join())
+
+        self.assertEqual(
+            DMDeliveryStatus.objects.get(discord_id=32).last_failure_reason, DMDeliveryStatus.REASON_HTTP_ERROR
+        )
+        queue_dm_fallback.assert_called_once_with(32, 1)
@@ -0,0 +1,69 @@
+"""Tests for the reminder and kick load forecast."""
+
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import forecast as forecast_module
+from ..forecast import forecast
+from ..models import AutoKickSchedule
+
+
+@patch.object(forecast_module, 'DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS', 24)
+@patch.object(forecast_module, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+class ForecastTestCase(TestCase):
+    """Test cases for forecasting reminders and kicks per hour and guild."""
+
+    def setUp(self):
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        self.hour = self.now.replace(minute=0)
+
+    def _schedule(self, discord_id, guild_id, joined_hours_ago, kick_in_hours, last_reminder_hours_ago=None):
+        return AutoKickSchedule.objects.create(
+            discord_id=discord_id, discord_username=f"user{discord_id}", guild_id=guild_id,
+            joined_at=self.now - timedelta(hours=joined_hours_ago),
+            kick_scheduled_at=self.now + timedelta(hours=kick_in_hours),
+            last_reminder_sent=(
+                self.now - timedelta(hours=last_reminder_hours_ago) if last_reminder_hours_ago is not None else None
+            ),
+        )
+
+    def test_reminders_and_kicks_per_hour(self):
+        """Test that reminders repeat every interval until the kick and overdue work lands in this hour."""
+        # Reminder overdue now, then at +24h and +48h, kicked at +60h
+        self._schedule(1, 1, joined_hours_ago=30, kick_in_hours=60)
+        # Kick overdue, so no further reminders
+        self._schedule(2, 2, joined_hours_ago=100, kick_in_hours=-1, last_reminder_hours_ago=20)
+
+        rows = {(row['hour'], row['guild_id']): row for row in forecast(hours=72, now=self.now)}
+
+        self.assertEqual(sorted((hour - self.hour, guild) for hour, guild in rows), [
+            (timedelta(0), 1), (timedelta(0), 2), (timedelta(hours=24), 1),
+            (timedelta(hours=48), 1), (timedelta(hours=60), 1),
+        ])
+        self.assertEqual(rows[(self.hour, 2)]['kicks'], 1)
+        self.assertEqual(rows[(self.hour, 2)]['reminders'], 0)
+        self.assertEqual(rows[(self.hour + timedelta(hours=60), 1)]['actions'], 2)
+
+    def test_over_budget(self):
+        """Test that hours above the per-guild budget are flagged."""
+        for discord_id in range(3):
+            self._schedule(discord_id, 1, joined_hours_ago=1, kick_in_hours=5)
+
+        rows = forecast(hours=24, now=self.now, budget=5)
+
+        self.assertEqual([(row['kicks'], row['actions'], row['over_budget']) for row in rows], [(3, 6, True)])
+
+    def test_command(self):
+        """Test that the command prints flagged hours."""
+        self._schedule(1, 1, joined_hours_ago=1, kick_in_hours=5)
+        out = io.StringIO()
+
+        call_command('forecast_autokick_load', '--budget', '1', stdout=out)
+
+        self.assertIn("OVER BUDGET", out.getvalue())
+        self.assertIn("1 hour(s) over the budget of 1", out.getvalue())
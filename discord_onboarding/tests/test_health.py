@@ -0,0 +1,107 @@
+"""Tests for periodic task heartbeats and scheduling lag."""
+
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from .. import health, tasks, views
+from ..models import AutoKickSchedule
+
+
+@patch.object(health, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True)
+@patch.object(health, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+@patch.object(health, 'DISCORD_ONBOARDING_REMINDER_INTERVAL_HOURS', 24)
+class HealthTestCase(TestCase):
+    """Test cases for heartbeats, lag and health warnings."""
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def _schedule(self, discord_id, joined_hours_ago, kick_in_hours):
+        return AutoKickSchedule.objects.create(
+            discord_id=discord_id, discord_username=f"user{discord_id}", guild_id=1,
+            joined_at=self.now - timedelta(hours=joined_hours_ago),
+            kick_scheduled_at=self.now + timedelta(hours=kick_in_hours),
+        )
+
+    def test_heartbeat_records_run(self):
+        """Test that a decorated task records its run with the work it reported."""
+        @health.records_heartbeat
+        def cleanup_expired_tokens():
+            health.record_work(scanned=10, enqueued=3)
+            health.record_work(scanned=5)
+
+        cleanup_expired_tokens()
+
+        beat = health.get_heartbeat('cleanup_expired_tokens')
+        self.assertEqual((beat['scanned'], beat['enqueued']), (15, 3))
+        self.assertIsNone(beat['running_since'])
+        self.assertIsNone(beat['error'])
+        self.assertGreaterEqual(beat['finished_at'], beat['started_at'])
+
+    def test_processor_heartbeat(self):
+        """Test that the auto-kick processor reports the due schedules it scanned and queued."""
+        self._schedule(1, joined_hours_ago=200, kick_in_hours=-1)
+        self._schedule(2, joined_hours_ago=60, kick_in_hours=100)
+
+        with patch.object(tasks, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True), \
+                patch.object(tasks, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True), \
+                patch.object(tasks, 'available_bot_capacity', return_value=100), \
+                patch.object(tasks.auto_kick_unauthenticated_user, 'delay'), \
+                patch.object(tasks.send_onboarding_reminder, 'delay'):
+            tasks.process_auto_kick_schedules()
+
+        beat = health.get_heartbeat('process_auto_kick_schedules')
+        self.assertEqual((beat['scanned'], beat['enqueued']), (2, 2))
+
+    def test_scheduling_lag(self):
+        """Test that lag is measured from the oldest due reminder or kick."""
+        self.assertEqual(health.scheduling_lag(self.now), (None, 0))
+
+        self._schedule(1, joined_hours_ago=200, kick_in_hours=-1)
+        # Reminder was due 6 hours ago, before the kick
+        self._schedule(2, joined_hours_ago=30, kick_in_hours=100)
+
+        oldest, lag = health.scheduling_lag(self.now)
+        self.assertEqual(oldest, self.now - timedelta(hours=6))
+        self.assertEqual(lag, 6 * 3600)
+
+    def test_report_warnings(self):
+        """Test warnings for stopped tasks, slow runs and lag, and that optional tasks are only watched once run."""
+        self._schedule(1, joined_hours_ago=200, kick_in_hours=-1)
+        cache.set(health.HEARTBEAT_KEY.format('cleanup_expired_tokens'), {
+            'started_at': self.now - timedelta(hours=1), 'duration': 1200, 'running_since': None,
+        })
+        cache.set(health.HEARTBEAT_KEY.format('send_dm_fallback_digest'), {
+            'started_at': self.now - timedelta(hours=1), 'duration': 1, 'running_since': None,
+        })
+
+        result = health.report(self.now)
+
+        warnings = {(warning['check'], warning.get('task')) for warning in result['warnings']}
+        self.assertEqual(warnings, {
+            ('stale_task', 'process_auto_kick_schedules'),
+            ('stale_task', 'send_dm_fallback_digest'),
+            ('tick_duration', 'cleanup_expired_tokens'),
+            ('scheduling_lag', None),
+        })
+        self.assertEqual(result['status'], 'warning')
+
+    @patch.object(views, 'DISCORD_ONBOARDING_METRICS_TOKEN', 'secret')
+    def test_endpoint(self):
+        """Test that the JSON endpoint requires the token and answers 503 while there are warnings."""
+        request = RequestFactory().get('/health/')
+        request.user = AnonymousUser()
+        self.assertEqual(views.health_endpoint(request).status_code, 403)
+
+        request = RequestFactory().get('/health/', HTTP_AUTHORIZATION='Bearer secret')
+        request.user = AnonymousUser()
+        response = views.health_endpoint(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)['tasks']['process_auto_kick_schedules']['stale'], True)
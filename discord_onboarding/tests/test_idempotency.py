@@ -0,0 +1,84 @@
+"""Tests for Discord Onboarding side effect idempotency keys."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from .. import bot_tasks, tasks
+from ..idempotency import claim_side_effect, is_processed, release_side_effect, side_effect_key
+from ..models import AutoKickSchedule
+
+
+class IdempotencyTestCase(TransactionTestCase):
+    """Test cases for claiming side effects once."""
+
+    def setUp(self):
+        self.schedule = AutoKickSchedule.objects.create(
+            discord_id=1001, discord_username="orphan", guild_id=1,
+            joined_at=timezone.now() - timedelta(days=3), kick_scheduled_at=timezone.now() + timedelta(days=4),
+        )
+
+    def test_claim_once(self):
+        """Test that a key can only be claimed again after it was released."""
+        key = side_effect_key(self.schedule.id, 'reminder', 1)
+        self.assertEqual(key, f"reminder:{self.schedule.id}:1")
+
+        self.assertTrue(claim_side_effect(key))
+        self.assertFalse(claim_side_effect(key))
+        self.assertTrue(is_processed(key))
+
+        release_side_effect(key)
+        self.assertTrue(claim_side_effect(key))
+        self.assertTrue(claim_side_effect(None))
+
+    # aadiscordbot allows sync ORM calls from bot tasks the same way
+    @patch.dict('os.environ', {'DJANGO_ALLOW_ASYNC_UNSAFE': 'true'})
+    def test_bot_task_skips_processed_key(self):
+        """Test that a duplicate kick never reaches Discord."""
+        bot = MagicMock()
+        key = side_effect_key(self.schedule.id, 'kick')
+
+        with patch.object(bot_tasks, 'enqueue_bot_task'):
+            asyncio.run(bot_tasks.kick_user_from_guild(bot, 1, 1001, "test", idempotency_key=key))
+            bot.get_guild.assert_called_once()
+
+            bot.reset_mock()
+            self.assertFalse(asyncio.run(bot_tasks.kick_user_from_guild(bot, 1, 1001, "test", idempotency_key=key)))
+            bot.get_guild.assert_not_called()
+
+    @patch.object(tasks, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+    @patch.object(tasks, 'is_dm_undeliverable', return_value=False)
+    @patch.object(tasks, 'enqueue_bot_task')
+    def test_redelivered_reminder_is_not_resent(self, enqueue_bot_task, undeliverable):
+        """Test that a reminder redelivered after the bot sent it only updates the schedule."""
+        claim_side_effect(side_effect_key(self.schedule.id, 'reminder', 1))
+
+        tasks.send_onboarding_reminder(self.schedule.id)
+
+        enqueue_bot_task.assert_not_called()
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.reminder_count, 1)
+
+        tasks.send_onboarding_reminder(self.schedule.id)
+        self.assertEqual(
+            enqueue_bot_task.call_args.args[2], {'idempotency_key': side_effect_key(self.schedule.id, 'reminder', 2)}
+        )
+
+    @patch.object(tasks, 'DISCORD_ONBOARDING_REMINDERS_ENABLED', True)
+    @patch.object(tasks, 'is_dm_undeliverable', return_value=True)
+    @patch.object(tasks, 'queue_dm_fallback')
+    def test_redelivered_fallback_is_not_requeued(self, queue_dm_fallback, undeliverable):
+        """Test that a fallback reminder redelivered before its bookkeeping is only mentioned once."""
+        with patch.object(AutoKickSchedule, 'mark_reminder_sent', side_effect=RuntimeError("worker lost")), \
+                self.assertRaises(RuntimeError):
+            tasks.send_onboarding_reminder(self.schedule.id)
+
+        tasks.send_onboarding_reminder(self.schedule.id)
+
+        queue_dm_fallback.assert_called_once_with(1001, 1)
+        self.assertTrue(is_processed(side_effect_key(self.schedule.id, 'reminder', 1)))
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.reminder_count, 1)
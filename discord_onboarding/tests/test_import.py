@@ -0,0 +1,126 @@
+"""Tests for the bulk auto-kick schedule import command."""
+
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from allianceauth.services.modules.discord.models import DiscordUser
+
+from .. import counters
+from ..management.commands import import_autokick_schedules
+from ..models import AutoKickSchedule
+
+
+class ImportSchedulesTestCase(TestCase):
+    """Test cases for import_autokick_schedules."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.joined_at = (timezone.now() - timedelta(days=30)).isoformat()
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as output:
+            output.write(content)
+        return path
+
+    def _import(self, path, *args):
+        out = io.StringIO()
+        call_command('import_autokick_schedules', path, *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_csv_import_skips_linked_existing_and_invalid(self):
+        """Test that linked users, existing schedules and invalid rows are skipped."""
+        DiscordUser.objects.create(user=User.objects.create_user('linked'), uid=2)
+        AutoKickSchedule.objects.create(discord_id=3, discord_username="old", guild_id=1, joined_at=timezone.now())
+        path = self._write('members.csv', "guild_id,discord_id,username,joined_at\n" + "".join(
+            f"1,{discord_id},user{discord_id},{self.joined_at}\n" for discord_id in (1, 2, 3, 4)
+        ) + "1,not-a-number,bad,2024-01-01\n")
+
+        output = self._import(path, '--chunk-size', '2')
+
+        self.assertIn("Created 2 auto-kick schedules from 5 rows", output)
+        self.assertIn(
+            "Skipped 1 linked users, 1 with an existing schedule, 0 duplicate rows and 1 invalid rows", output
+        )
+        self.assertEqual(sorted(AutoKickSchedule.objects.values_list('discord_id', flat=True)), [1, 3, 4])
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), 3)
+        self.assertGreater(AutoKickSchedule.objects.get(discord_id=1).kick_scheduled_at, timezone.now())
+        self.assertFalse(os.path.exists(f"{path}.offset"))
+
+    def test_duplicates_are_skipped(self):
+        """Test that a user repeated within a chunk is imported once and the rest are counted as duplicates."""
+        path = self._write('members.csv', "guild_id,discord_id,username,joined_at\n" + "".join(
+            f"1,{discord_id},user{discord_id}-{index},{self.joined_at}\n"
+            for index, discord_id in enumerate((1, 1, 2, 1, 2))
+        ))
+
+        output = self._import(path)
+
+        self.assertIn("Created 2 auto-kick schedules from 5 rows", output)
+        self.assertIn("0 with an existing schedule, 3 duplicate rows", output)
+        self.assertEqual(AutoKickSchedule.objects.get(discord_id=1).discord_username, "user1-0")
+
+    def test_conflicts_are_not_counted(self):
+        """Test that a schedule the bot created after the lookup is neither counted nor reported as created."""
+        path = self._write('members.csv', "guild_id,discord_id,username,joined_at\n" + "".join(
+            f"1,{discord_id},user{discord_id},{self.joined_at}\n" for discord_id in (1, 2)
+        ))
+
+        def bot_joins_first():
+            AutoKickSchedule.objects.create(discord_id=2, discord_username="bot", guild_id=1, joined_at=timezone.now())
+            return transaction.atomic()
+
+        with patch.object(import_autokick_schedules, 'transaction', SimpleNamespace(atomic=bot_joins_first)):
+            output = self._import(path)
+
+        self.assertIn("Created 1 auto-kick schedules from 2 rows", output)
+        self.assertIn("1 with an existing schedule", output)
+        self.assertEqual(counters.get_count(counters.ACTIVE_SCHEDULES), AutoKickSchedule.objects.count())
+
+    def test_resume_from_offset(self):
+        """Test that an interrupted import continues after the last committed chunk."""
+        path = self._write('members.ndjson', "".join(
+            json.dumps({'guild_id': 1, 'discord_id': discord_id, 'username': 'u', 'joined_at': self.joined_at}) + "\n"
+            for discord_id in range(1, 5)
+        ))
+        original = AutoKickSchedule.objects.bulk_create
+        calls = []
+
+        def fail_second_chunk(objs, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return original(objs, **kwargs)
+
+        with patch.object(AutoKickSchedule.objects, 'bulk_create', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self._import(path, '--chunk-size', '2')
+
+        with open(f"{path}.offset") as offset_file:
+            self.assertEqual(offset_file.read(), "2")
+
+        output = self._import(path, '--chunk-size', '2', '--resume')
+
+        self.assertIn("Resuming after row 2", output)
+        self.assertEqual(sorted(AutoKickSchedule.objects.values_list('discord_id', flat=True)), [1, 2, 3, 4])
+
+    def test_dry_run(self):
+        """Test that a dry run validates without creating anything."""
+        path = self._write('members.csv', f"guild_id,discord_id,username,joined_at\n1,1,user,{self.joined_at}\n")
+
+        output = self._import(path, '--dry-run')
+
+        self.assertIn("DRY RUN: would create 1", output)
+        self.assertFalse(AutoKickSchedule.objects.exists())
@@ -0,0 +1,100 @@
+"""Tests for the Discord Onboarding processor lease and sharding."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import tasks
+from ..lease import CacheLease
+from ..models import AutoKickSchedule
+
+
+@patch.object(tasks, 'DISCORD_ONBOARDING_AUTO_KICK_ENABLED', True)
+@patch.object(tasks, 'available_bot_capacity', return_value=500)
+class ProcessorLeaseTestCase(TestCase):
+    """Test cases for single ownership of processor runs."""
+
+    def setUp(self):
+        cache.delete_many([tasks.PROCESSOR_LEASE_KEY] + [f"{tasks.PROCESSOR_LEASE_KEY}_{i}_of_3" for i in range(3)])
+
+    def test_lease_is_exclusive(self, capacity):
+        """Test that a second owner can't take a held lease and a lost lease stops heartbeating."""
+        first = CacheLease('discord_onboarding_test_lease', 60)
+        second = CacheLease('discord_onboarding_test_lease', 60)
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(first.heartbeat())
+
+        cache.delete('discord_onboarding_test_lease')
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.heartbeat())
+
+        # Releasing a lost lease leaves the new owner alone
+        first.release()
+        self.assertTrue(second.heartbeat())
+        second.release()
+
+    @patch.object(tasks.auto_kick_unauthenticated_user, 'delay')
+    def test_overlapping_runs_are_skipped(self, kick_delay, capacity):
+        """Test that a run starting while another holds the lease, or right after it finished, does nothing."""
+        AutoKickSchedule.objects.create(
+            discord_id=1, discord_username="user1", guild_id=1,
+            joined_at=timezone.now() - timedelta(days=8), kick_scheduled_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(tasks.process_auto_kick_schedules(), "Processed 0 reminders and 1 kicks")
+        self.assertEqual(tasks.process_auto_kick_schedules(), "Already running, skipped")
+        self.assertEqual(kick_delay.call_count, 1)
+
+    @patch.object(tasks, 'DISCORD_ONBOARDING_PROCESSOR_SHARDS', 3)
+    @patch.object(tasks.auto_kick_unauthenticated_user, 'delay')
+    @patch.object(tasks.process_auto_kick_shard, 'delay', side_effect=tasks.process_auto_kick_shard)
+    def test_shards_cover_every_schedule_once(self, shard_delay, kick_delay, capacity):
+        """Test that sharded runs queue every due schedule exactly once."""
+        now = timezone.now()
+        for discord_id in range(1, 11):
+            AutoKickSchedule.objects.create(
+                discord_id=discord_id, discord_username=f"user{discord_id}", guild_id=1,
+                joined_at=now - timedelta(days=8), kick_scheduled_at=now - timedelta(hours=1),
+            )
+
+        self.assertEqual(tasks.process_auto_kick_schedules(), "Dispatched 3 shards")
+
+        self.assertEqual(shard_delay.call_count, 3)
+        self.assertEqual(sum(call.args[2] for call in shard_delay.call_args_list), 500)
+        queued = sorted(call.args[0] for call in kick_delay.call_args_list)
+        self.assertEqual(queued, sorted(AutoKickSchedule.objects.values_list('id', flat=True)))
+
+    @patch.object(tasks.auto_kick_unauthenticated_user, 'delay')
+    def test_shard_checks_circuit(self, kick_delay, capacity):
+        """Test that a shard dispatched before the circuit opened doesn't queue kicks."""
+        AutoKickSchedule.objects.create(
+            discord_id=1, discord_username="user1", guild_id=1,
+            joined_at=timezone.now() - timedelta(days=8), kick_scheduled_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with patch.object(tasks, 'is_circuit_open', return_value=True):
+            self.assertEqual(tasks.process_auto_kick_shard(0, 1, 500), "Discord circuit open, skipped")
+        kick_delay.assert_not_called()
+
+    def test_shard_filters_due_schedules(self, capacity):
+        """Test that the shard condition only narrows the indexed due filter."""
+        now = timezone.now()
+        schedules = [
+            AutoKickSchedule.objects.create(
+                discord_id=discord_id, discord_username=f"user{discord_id}", guild_id=1,
+                joined_at=now - timedelta(days=8), kick_scheduled_at=now - timedelta(hours=1),
+            )
+            for discord_id in range(1, 4)
+        ]
+        due = tasks._in_shard(AutoKickSchedule.objects.due_for_kick(now), 1, 3).values_list('id', flat=True)
+
+        self.assertEqual(list(due), [schedule.id for schedule in schedules if schedule.id % 3 == 1])
+        select, where = str(due.query).split(' WHERE ')
+        self.assertNotIn('MOD', select)
+        self.assertIn('kick_scheduled_at', where)
+        self.assertIn('MOD', where)
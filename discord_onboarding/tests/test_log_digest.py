@@ -0,0 +1,66 @@
+"""Tests for Discord Onboarding log channel digests."""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import log_digest
+from ..models import PendingLogEvent
+
+
+@patch.object(log_digest, 'DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID', 1234)
+@patch.object(log_digest, 'send_log_embeds')
+class LogDigestTestCase(TestCase):
+    """Test cases for flushing pending log events."""
+
+    def setUp(self):
+        cache.delete(log_digest.FLUSH_LOCK_KEY)
+        cache.delete(log_digest.RECENT_FLUSH_KEY)
+
+    def _create_events(self, count, event_type=PendingLogEvent.EVENT_AUTO_KICK):
+        PendingLogEvent.objects.bulk_create([
+            PendingLogEvent(event_type=event_type, subject=f"@user{i}", embed={'title': f"Event {i}"})
+            for i in range(count)
+        ])
+
+    def test_packs_embeds_into_messages(self, send_log_embeds):
+        """Test that small batches are posted ten embeds per message."""
+        self._create_events(13)
+
+        flushed = log_digest.flush_pending_events()
+
+        self.assertEqual(flushed, 13)
+        self.assertEqual(send_log_embeds.call_count, 2)
+        self.assertEqual(len(send_log_embeds.call_args_list[0].args[0]), 10)
+        self.assertEqual(len(send_log_embeds.call_args_list[1].args[0]), 3)
+        self.assertFalse(PendingLogEvent.objects.exists())
+
+    def test_summarises_above_threshold(self, send_log_embeds):
+        """Test that large batches collapse into a single summary embed."""
+        self._create_events(log_digest.DISCORD_ONBOARDING_LOG_DIGEST_SUMMARY_THRESHOLD + 5)
+        self._create_events(2, PendingLogEvent.EVENT_AUTHENTICATED)
+
+        log_digest.flush_pending_events()
+
+        send_log_embeds.assert_called_once()
+        embeds = send_log_embeds.call_args.args[0]
+        self.assertEqual(len(embeds), 1)
+        self.assertEqual(len(embeds[0]['fields']), 2)
+        self.assertIn("and", embeds[0]['fields'][0]['value'])
+        self.assertFalse(PendingLogEvent.objects.exists())
+
+    def test_empty_flush(self, send_log_embeds):
+        """Test that nothing is sent when there are no pending events."""
+        self.assertEqual(log_digest.flush_pending_events(), 0)
+        send_log_embeds.assert_not_called()
+
+    def test_first_event_flushes_immediately(self, send_log_embeds):
+        """Test that only the first event in a quiet interval triggers a flush."""
+        with patch('discord_onboarding.tasks.flush_log_digest.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                log_digest.queue_log_event(PendingLogEvent.EVENT_AUTO_KICK, "@first", {'title': "first"})
+                log_digest.queue_log_event(PendingLogEvent.EVENT_AUTO_KICK, "@second", {'title': "second"})
+
+        delay.assert_called_once()
+        self.assertEqual(PendingLogEvent.objects.count(), 2)
@@ -0,0 +1,91 @@
+"""Tests for Discord Onboarding metrics."""
+
+import asyncio
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from .. import backpressure, metrics, signals, views
+from ..models import OnboardingToken
+
+
+class MetricsTestCase(TestCase):
+    """Test cases for recording and exposing metrics."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.REGISTRY.totals.clear()
+        metrics.REGISTRY.pending.clear()
+
+    def test_histogram_rendering(self):
+        """Test that histograms render cumulative buckets, sum and count."""
+        metrics.BOT_TASK_SECONDS.observe(0.2, task='kick_user_from_guild')
+        metrics.BOT_TASK_SECONDS.observe(7, task='kick_user_from_guild')
+        metrics.BOT_TASK_SECONDS.observe(1000, task='kick_user_from_guild')
+
+        text = metrics.render(local=True)
+
+        prefix = 'discord_onboarding_bot_task_seconds'
+        self.assertIn(f'{prefix}_bucket{{task="kick_user_from_guild",le="0.1"}} 0', text)
+        self.assertIn(f'{prefix}_bucket{{task="kick_user_from_guild",le="0.25"}} 1', text)
+        self.assertIn(f'{prefix}_bucket{{task="kick_user_from_guild",le="10"}} 2', text)
+        self.assertIn(f'{prefix}_bucket{{task="kick_user_from_guild",le="+Inf"}} 3', text)
+        self.assertIn(f'{prefix}_sum{{task="kick_user_from_guild"}} 1007.2', text)
+        self.assertIn(f'{prefix}_count{{task="kick_user_from_guild"}} 3', text)
+
+    def test_flush_adds_up_processes(self):
+        """Test that flushed metrics are added to the shared totals rather than replacing them."""
+        metrics.DM_FAILURES.inc(reason='forbidden')
+        metrics.REGISTRY.flush()
+
+        # Another process with its own registry flushing the same series
+        other = metrics.Registry()
+        other.record(metrics.DM_FAILURES, ('forbidden',), {0: 2})
+        other.flush()
+
+        self.assertIn('discord_onboarding_dm_failures_total{reason="forbidden"} 3', metrics.render())
+
+    def test_flush_when_tasks_finish(self):
+        """Test that Celery tasks publish their metrics when they finish and bot tasks leave it to the interval."""
+        metrics.DM_FAILURES.inc(reason='forbidden')
+        signals.flush_metrics_after_task(task_id='1')
+        self.assertIn('discord_onboarding_dm_failures_total{reason="forbidden"} 1', metrics.render())
+
+        @backpressure.tracks_outstanding
+        async def bot_task(bot):
+            metrics.DM_FAILURES.inc(reason='forbidden')
+
+        asyncio.run(bot_task(None))
+        self.assertEqual(metrics.REGISTRY.pending[('discord_onboarding_dm_failures_total', ('forbidden',))], [1])
+
+        with patch.object(metrics, 'FLUSH_INTERVAL', 0):
+            asyncio.run(bot_task(None))
+        self.assertEqual(metrics.REGISTRY.pending, {})
+        self.assertIn('discord_onboarding_dm_failures_total{reason="forbidden"} 3', metrics.render())
+
+    def test_token_counters(self):
+        """Test that issuing and redeeming tokens is counted."""
+        token = OnboardingToken.objects.create(discord_id=1, discord_username="user")
+        token = OnboardingToken.objects.get(id=token.id)
+        token.used = True
+        token.save()
+        token.save()
+
+        text = metrics.render(local=True)
+        self.assertIn('discord_onboarding_tokens_issued_total 1', text)
+        self.assertIn('discord_onboarding_tokens_redeemed_total 1', text)
+
+    @patch.object(views, 'DISCORD_ONBOARDING_METRICS_TOKEN', 'secret')
+    def test_endpoint_requires_token(self):
+        """Test that the endpoint only answers to the bearer token or superusers."""
+        request = RequestFactory().get('/metrics/')
+        request.user = AnonymousUser()
+        self.assertEqual(views.metrics_endpoint(request).status_code, 403)
+
+        request = RequestFactory().get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        request.user = AnonymousUser()
+        response = views.metrics_endpoint(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE discord_onboarding_join_to_dm_seconds histogram', response.content)
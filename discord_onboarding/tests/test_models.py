@@ -5,7 +5,8 @@ from datetime import timedelta
 from django.test import TestCase
 from django.utils import timezone
 
-from ..models import OnboardingToken
+from ..models import AutoKickSchedule, OnboardingToken
+from ..tasks import cleanup_expired_tokens
 
 
 class OnboardingTokenTestCase(TestCase):
@@ -64,3 +65,89 @@ class OnboardingTokenTestCase(TestCase):
         str_repr = str(token)
         self.assertIn("testuser#1234", str_repr)
         self.assertIn("valid", str_repr)
+
+    def test_status_annotation(self):
+        """Test that the SQL status agrees with is_expired() and the status filters."""
+        pending = OnboardingToken.objects.create(discord_id=1, discord_username="pending")
+        expired = OnboardingToken.objects.create(
+            discord_id=2, discord_username="expired", expires_at=timezone.now() - timedelta(hours=1)
+        )
+        used = OnboardingToken.objects.create(discord_id=3, discord_username="used", used=True)
+
+        statuses = dict(OnboardingToken.objects.with_status().values_list('id', 'status'))
+        self.assertEqual(statuses, {pending.id: 'pending', expired.id: 'expired', used.id: 'used'})
+        self.assertEqual(list(OnboardingToken.objects.pending()), [pending])
+        self.assertEqual(list(OnboardingToken.objects.expired()), [expired])
+        self.assertEqual(list(OnboardingToken.objects.used()), [used])
+
+
+class AutoKickScheduleTestCase(TestCase):
+    """Test cases for AutoKickSchedule model."""
+
+    def setUp(self):
+        self.schedule = AutoKickSchedule.objects.create(
+            discord_id=123456789,
+            discord_username="testuser#1234",
+            guild_id=1,
+            joined_at=timezone.now() - timedelta(days=3)
+        )
+
+    def test_reminder_token_is_reused(self):
+        """Test that reminders share one token and slide its expiry forward."""
+        first = self.schedule.refresh_reminder_token()
+        OnboardingToken.objects.filter(id=first.id).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        second = AutoKickSchedule.objects.select_related('reminder_token').get(id=self.schedule.id)
+        token = second.refresh_reminder_token()
+
+        self.assertEqual(token.id, first.id)
+        self.assertTrue(OnboardingToken.objects.get(id=first.id).is_valid())
+        self.assertEqual(OnboardingToken.objects.count(), 1)
+
+    def test_redeemed_reminder_token_is_replaced(self):
+        """Test that a new token is minted once the reminder token was used."""
+        first = self.schedule.refresh_reminder_token()
+        OnboardingToken.objects.filter(id=first.id).update(used=True)
+
+        token = self.schedule.refresh_reminder_token()
+
+        self.assertNotEqual(token.id, first.id)
+        self.assertEqual(AutoKickSchedule.objects.get(id=self.schedule.id).reminder_token_id, token.id)
+
+    def test_cleanup_keeps_active_reminder_tokens(self):
+        """Test that token cleanup leaves the reminder token of an active schedule alone."""
+        token = self.schedule.refresh_reminder_token()
+        stale = OnboardingToken.objects.create(discord_id=1, discord_username="stale")
+        OnboardingToken.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(cleanup_expired_tokens(), 1)
+        self.assertTrue(OnboardingToken.objects.filter(id=token.id).exists())
+        self.assertFalse(OnboardingToken.objects.filter(id=stale.id).exists())
+
+    def test_status_annotation(self):
+        """Test that the SQL status and time left agree with the Python checks and filters."""
+        now = timezone.now()
+        scheduled = AutoKickSchedule.objects.create(
+            discord_id=2, discord_username="new", guild_id=1, joined_at=now - timedelta(hours=1)
+        )
+        kick = AutoKickSchedule.objects.create(
+            discord_id=3, discord_username="kick", guild_id=1, joined_at=now - timedelta(days=30),
+            kick_scheduled_at=now - timedelta(hours=1)
+        )
+        inactive = AutoKickSchedule.objects.create(
+            discord_id=4, discord_username="gone", guild_id=1, joined_at=now, is_active=False
+        )
+
+        rows = {row.id: row for row in AutoKickSchedule.objects.with_status(now)}
+        self.assertEqual(rows[scheduled.id].status, 'scheduled')
+        self.assertEqual(rows[self.schedule.id].status, 'due_for_reminder')
+        self.assertEqual(rows[kick.id].status, 'due_for_kick')
+        self.assertEqual(rows[inactive.id].status, 'inactive')
+        self.assertIsNone(rows[inactive.id].time_left)
+        self.assertEqual(rows[kick.id].time_left, timedelta(hours=-1))
+
+        self.assertEqual(list(AutoKickSchedule.objects.scheduled(now)), [scheduled])
+        self.assertEqual(list(AutoKickSchedule.objects.due_for_reminder(now)), [self.schedule])
+        self.assertEqual(list(AutoKickSchedule.objects.due_for_kick(now)), [kick])
+        for row in rows.values():
+            self.assertEqual(row.status == 'due_for_kick', row.is_due_for_kick())
@@ -0,0 +1,104 @@
+"""Tests for the onboarding view profiling hooks and query budgets."""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from .. import metrics, profiling, tasks, views
+from ..models import OnboardingToken
+from .query_budget import QueryBudgetMixin
+
+
+def render_template_name(request, template, context=None):
+    return HttpResponse(template)
+
+
+@patch.object(views, 'render', render_template_name)
+@patch.object(views, 'DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION', True)
+class ViewQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Test that the onboarding views stay within their query budgets."""
+
+    def setUp(self):
+        self.token = OnboardingToken.objects.create(discord_id=5, discord_username="five")
+        self.user = User.objects.create_user('pilot')
+
+    def _request(self, method='get', user=None, **session):
+        request = getattr(RequestFactory(), method)('/?next=/done/')
+        request.session = SessionStore()
+        request.session.update(session)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_onboarding_start(self):
+        """Test the onboarding link lookup."""
+        response = self.assertQueryBudget('onboarding_start', views.onboarding_start, self._request(), self.token.token)
+        self.assertEqual(response.status_code, 302)
+
+    def test_onboarding_callback(self):
+        """Test redeeming the token after SSO."""
+        request = self._request(user=self.user, onboarding_token=self.token.token)
+        with patch.object(tasks.process_completed_onboarding, 'delay'):
+            response = self.assertQueryBudget('onboarding_callback', views.onboarding_callback, request)
+        self.assertEqual(response.content, b'discord_onboarding/success.html')
+
+    def test_registration(self):
+        """Test the email bypass registration form and its submission."""
+        session = {'discord_onboarding_bypass_email': True, 'registration_uid': self.user.pk}
+        self.assertQueryBudget(
+            'discord_onboarding_registration:get', views.discord_onboarding_registration,
+            self._request(user=self.user, **session)
+        )
+        response = self.assertQueryBudget(
+            'discord_onboarding_registration:post', views.discord_onboarding_registration,
+            self._request('post', user=self.user, **session)
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+class ProfilingTestCase(TestCase):
+    """Test cases for sampling and reporting view profiles."""
+
+    def setUp(self):
+        metrics.REGISTRY.totals.clear()
+        metrics.REGISTRY.pending.clear()
+
+    def test_capture(self):
+        """Test that queries inside the block are counted and timed."""
+        with profiling.capture() as profile:
+            list(OnboardingToken.objects.all())
+            OnboardingToken.objects.count()
+
+        self.assertEqual(profile.queries, 2)
+        self.assertGreaterEqual(profile.wall_seconds, profile.db_seconds)
+
+    def test_sampling(self):
+        """Test that no request is profiled by default and every request at a rate of 1."""
+        def view(request):
+            OnboardingToken.objects.count()
+            return HttpResponse()
+
+        profiled_view = profiling.profiled(view)
+
+        profiled_view(RequestFactory().get('/'))
+        self.assertNotIn('discord_onboarding_view_queries_count{view="view"}', metrics.render(local=True))
+
+        with patch.object(profiling, 'DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE', 1), \
+                self.assertLogs(profiling.logger, 'INFO') as logs:
+            profiled_view(RequestFactory().get('/'))
+
+        self.assertEqual((logs.records[0].view, logs.records[0].queries, logs.records[0].status_code), ('view', 1, 200))
+        self.assertIn('discord_onboarding_view_queries_count{view="view"} 1', metrics.render(local=True))
+
+    @patch.object(profiling, 'DISCORD_ONBOARDING_PROFILE_SAMPLE_RATE', 1)
+    def test_capture_failure(self):
+        """Test that an error setting up the capture is raised as is and nothing is recorded."""
+        view = profiling.profiled(lambda request: HttpResponse())
+
+        with patch.object(profiling, 'capture', side_effect=RuntimeError("no connections")), \
+                self.assertRaisesMessage(RuntimeError, "no connections"):
+            view(RequestFactory().get('/'))
+
+        self.assertNotIn('discord_onboarding_view_queries_count', metrics.render(local=True))
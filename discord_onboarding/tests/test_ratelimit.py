@@ -0,0 +1,137 @@
+"""Tests for the Discord Onboarding rate limiter and circuit breaker."""
+
+import asyncio
+
+import discord
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import ratelimit
+from ..ratelimit import CLOSED, DEFERRED, HALF_OPEN, OPEN, DiscordRateLimiter
+
+
+class FakeResponse:
+    """Stand-in for the aiohttp response attached to discord.HTTPException."""
+
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.reason = "Fake"
+        self.headers = headers or {}
+
+
+class FakeDiscordAPI:
+    """Fake HTTP layer that replays a script of statuses."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def request(self):
+        self.calls += 1
+        status, headers = self.script.pop(0) if self.script else (200, {})
+        if status >= 400:
+            raise discord.HTTPException(FakeResponse(status, headers), "fake failure")
+        return "ok"
+
+
+class DiscordRateLimiterTestCase(SimpleTestCase):
+    """Test cases for the adaptive limiter."""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.sleeps = []
+        cache.delete(ratelimit.CIRCUIT_CACHE_KEY)
+
+    def _clock(self):
+        return self.now
+
+    async def _sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def _limiter(self, publish=False):
+        return DiscordRateLimiter(
+            failure_threshold=3, open_seconds=60, clock=self._clock, sleep=self._sleep, publish=publish
+        )
+
+    def _call(self, limiter, api, route='dm'):
+        return asyncio.run(limiter.call(route, api.request))
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test that repeated 5xx responses open the circuit and defer callers."""
+        limiter = self._limiter()
+        api = FakeDiscordAPI([(503, {}), (502, {}), (429, {})])
+
+        results = [self._call(limiter, api) for _ in range(3)]
+
+        self.assertEqual(results, [DEFERRED] * 3)
+        self.assertEqual(limiter.state, OPEN)
+
+        # Further calls are deferred without touching the API
+        self.assertEqual(self._call(limiter, api), DEFERRED)
+        self.assertEqual(api.calls, 3)
+        self.assertAlmostEqual(limiter.retry_after(), 60)
+
+    def test_half_open_probe_closes_circuit(self):
+        """Test that a successful probe after the open period closes the circuit."""
+        limiter = self._limiter()
+        api = FakeDiscordAPI([(500, {})] * 3)
+        for _ in range(3):
+            self._call(limiter, api)
+
+        self.now += 61
+        self.assertEqual(self._call(limiter, api), "ok")
+        self.assertEqual(limiter.state, CLOSED)
+        self.assertEqual(limiter.consecutive_failures, 0)
+
+    def test_failed_probe_reopens_circuit(self):
+        """Test that a failing probe reopens the circuit straight away."""
+        limiter = self._limiter()
+        api = FakeDiscordAPI([(500, {})] * 4)
+        for _ in range(3):
+            self._call(limiter, api)
+
+        self.now += 61
+        self.assertEqual(self._call(limiter, api), DEFERRED)
+        self.assertEqual(limiter.state, OPEN)
+        self.assertNotEqual(limiter.state, HALF_OPEN)
+
+    def test_client_errors_are_raised(self):
+        """Test that 4xx errors other than 429 reach the caller and don't trip the circuit."""
+        limiter = self._limiter()
+        api = FakeDiscordAPI([(403, {})] * 5)
+
+        for _ in range(5):
+            with self.assertRaises(discord.HTTPException):
+                self._call(limiter, api)
+
+        self.assertEqual(limiter.state, CLOSED)
+
+    def test_learns_bucket_from_headers(self):
+        """Test that an exhausted bucket is waited on or deferred based on its reset time."""
+        limiter = self._limiter()
+
+        limiter.observe_headers('dm', {
+            'X-RateLimit-Bucket': 'abc', 'X-RateLimit-Limit': '5',
+            'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '2',
+        })
+        self.assertEqual(self._call(limiter, FakeDiscordAPI([])), "ok")
+        self.assertEqual(self.sleeps, [2.0])
+
+        # Routes sharing a bucket share its state
+        limiter.observe_headers('dm-other', {'X-RateLimit-Bucket': 'abc'})
+        limiter.observe_headers('dm', {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '30'})
+        self.assertEqual(self._call(limiter, FakeDiscordAPI([]), route='dm-other'), DEFERRED)
+
+    def test_publishes_open_circuit(self):
+        """Test that an open circuit is visible to the Celery side through the cache."""
+        limiter = self._limiter(publish=True)
+        api = FakeDiscordAPI([(500, {})] * 3)
+
+        for _ in range(3):
+            self._call(limiter, api)
+        self.assertTrue(ratelimit.is_circuit_open())
+
+        self.now += 61
+        self._call(limiter, api)
+        self.assertFalse(ratelimit.is_circuit_open())
@@ -0,0 +1,54 @@
+"""Tests for Discord Onboarding schedule retention."""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import AutoKickDailySummary, AutoKickSchedule
+from ..retention import compact_inactive_schedules
+
+
+class ScheduleRetentionTestCase(TestCase):
+    """Test cases for compacting inactive schedules."""
+
+    def _schedule(self, discord_id, outcome=None, days_ago=60, guild_id=1, reminders=2):
+        schedule = AutoKickSchedule.objects.create(
+            discord_id=discord_id,
+            discord_username=f"user{discord_id}",
+            guild_id=guild_id,
+            joined_at=timezone.now() - timedelta(days=days_ago + 7),
+            reminder_count=reminders,
+        )
+        if outcome:
+            schedule.deactivate(outcome)
+            AutoKickSchedule.objects.filter(id=schedule.id).update(
+                deactivated_at=timezone.now() - timedelta(days=days_ago)
+            )
+        return schedule
+
+    def test_compacts_old_inactive_schedules(self):
+        """Test that only old inactive schedules are summarised and deleted, in chunks."""
+        self._schedule(1, AutoKickSchedule.OUTCOME_AUTHENTICATED)
+        self._schedule(2, AutoKickSchedule.OUTCOME_AUTHENTICATED)
+        self._schedule(3, AutoKickSchedule.OUTCOME_KICKED)
+        self._schedule(4, AutoKickSchedule.OUTCOME_CANCELLED, guild_id=2)
+        recent = self._schedule(5, AutoKickSchedule.OUTCOME_KICKED, days_ago=1)
+        active = self._schedule(6)
+
+        self.assertEqual(compact_inactive_schedules(chunk_size=2), 4)
+
+        self.assertEqual(set(AutoKickSchedule.objects.values_list('id', flat=True)), {recent.id, active.id})
+        summary = AutoKickDailySummary.objects.get(guild_id=1)
+        self.assertEqual((summary.authenticated, summary.kicked, summary.cancelled), (2, 1, 0))
+        self.assertEqual(summary.reminders_sent, 6)
+        self.assertEqual(AutoKickDailySummary.objects.get(guild_id=2).cancelled, 1)
+
+    def test_runs_are_bounded(self):
+        """Test that a run stops after its chunk budget and later runs add to the same summary."""
+        for discord_id in range(1, 6):
+            self._schedule(discord_id, AutoKickSchedule.OUTCOME_KICKED)
+
+        self.assertEqual(compact_inactive_schedules(chunk_size=2, max_chunks=1), 2)
+        self.assertEqual(compact_inactive_schedules(chunk_size=2), 3)
+        self.assertEqual(AutoKickDailySummary.objects.get().kicked, 5)
@@ -0,0 +1,28 @@
+"""Tests for Discord Onboarding Celery task routing."""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from .. import tasks
+
+
+class TaskRoutingTestCase(SimpleTestCase):
+    """Test cases for task lanes."""
+
+    def test_completion_outranks_bulk_work(self):
+        """Test that completion is queued ahead of reminders, kicks, logging and cleanup."""
+        high = tasks.process_completed_onboarding.priority
+        bulk = [tasks.send_onboarding_reminder, tasks.auto_kick_unauthenticated_user, tasks.process_auto_kick_schedules]
+        low = [tasks.log_auto_kick, tasks.flush_log_digest, tasks.cleanup_expired_tokens]
+
+        self.assertTrue(all(high < task.priority for task in bulk))
+        self.assertTrue(all(task.priority < low_task.priority for task in bulk for low_task in low))
+
+    def test_dedicated_queues_are_opt_in(self):
+        """Test that tasks stay on the default queue unless dedicated queues are enabled."""
+        self.assertIsNone(tasks._task_options(tasks.HIGH)['queue'])
+
+        with patch.object(tasks, 'DISCORD_ONBOARDING_TASK_QUEUES', True):
+            self.assertEqual(tasks._task_options(tasks.HIGH)['queue'], 'discord_onboarding_high')
+            self.assertEqual(tasks._task_options(tasks.LOW)['queue'], 'discord_onboarding_low')
@@ -0,0 +1,130 @@
+"""Tests for Discord Onboarding trace correlation."""
+
+import logging
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from allianceauth.services.modules.discord.models import DiscordUser
+
+from .. import tasks, tracing
+from ..models import AutoKickSchedule, OnboardingStageEvent, OnboardingToken
+
+
+class TracingTestCase(TestCase):
+    """Test cases for correlation IDs and stage events."""
+
+    def test_token_gets_correlation_id(self):
+        """Test that every token is issued with its own correlation ID and an issued stage."""
+        first = OnboardingToken.objects.create(discord_id=1, discord_username="one")
+        second = OnboardingToken.objects.create(discord_id=2, discord_username="two")
+
+        self.assertEqual(len(first.correlation_id), 32)
+        self.assertNotEqual(first.correlation_id, second.correlation_id)
+        self.assertEqual(
+            [event.stage for event in tracing.timeline(correlation_id=first.correlation_id)],
+            [OnboardingStageEvent.STAGE_ISSUED]
+        )
+
+    def test_log_records_carry_correlation_id(self):
+        """Test that the logging filter adds the current correlation ID, or '-' outside of one."""
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, 'message', None, None)
+        log_filter = tracing.CorrelationIdFilter()
+
+        with tracing.correlation('abc'):
+            log_filter.filter(record)
+            self.assertEqual(record.correlation_id, 'abc')
+        log_filter.filter(record)
+        self.assertEqual(record.correlation_id, '-')
+
+    def test_completion_propagates_correlation_id(self):
+        """Test that the completion task records the sync stages under the token's correlation ID."""
+        user = User.objects.create_user('pilot')
+        DiscordUser.objects.create(user=user, uid=3)
+        with patch.object(tasks.process_completed_onboarding, 'delay') as delay:
+            token = OnboardingToken.objects.create(discord_id=3, discord_username="three")
+            token.used = True
+            token.user = user
+            token.save()
+        delay.assert_called_once_with(token.id, correlation_id=token.correlation_id)
+
+        seen = []
+
+        def log_info(message):
+            seen.append(tracing.current_correlation_id())
+
+        with patch.object(tasks, 'update_groups') as update_groups, \
+                patch.object(tasks, 'update_nickname'), \
+                patch.object(tasks.logger, 'info', side_effect=log_info):
+            tasks.process_completed_onboarding(token.id, correlation_id=token.correlation_id)
+
+        link = update_groups.apply_async.call_args.kwargs['link']
+        self.assertEqual(link.args, (token.id, OnboardingStageEvent.STAGE_ROLES_SYNCED))
+        self.assertEqual(set(seen), {token.correlation_id})
+
+        tasks.record_onboarding_stage(*link.args, **link.kwargs)
+        self.assertEqual(
+            [event.stage for event in tracing.timeline(discord_id=3)],
+            [OnboardingStageEvent.STAGE_ISSUED, OnboardingStageEvent.STAGE_SYNC_QUEUED,
+             OnboardingStageEvent.STAGE_ROLES_SYNCED]
+        )
+
+    def test_started_is_recorded_once(self):
+        """Test that opening the link again doesn't add another started stage."""
+        token = OnboardingToken.objects.create(discord_id=4, discord_username="four")
+
+        tracing.record_stage(token, OnboardingStageEvent.STAGE_STARTED, once=True)
+        tracing.record_stage(token, OnboardingStageEvent.STAGE_STARTED, once=True)
+
+        self.assertEqual(
+            [event.stage for event in tracing.timeline(correlation_id=token.correlation_id)],
+            [OnboardingStageEvent.STAGE_ISSUED, OnboardingStageEvent.STAGE_STARTED]
+        )
+
+    def test_reminder_reissues_token(self):
+        """Test that a reused reminder token gets a new correlation ID and its stages count from the reminder."""
+        schedule = AutoKickSchedule.objects.create(
+            discord_id=5, discord_username="five", guild_id=1, joined_at=timezone.now() - timedelta(days=3)
+        )
+        first = schedule.refresh_reminder_token()
+        first_correlation_id = first.correlation_id
+        # The token was first issued two days ago
+        OnboardingToken.objects.filter(id=first.id).update(created_at=timezone.now() - timedelta(days=2))
+        OnboardingStageEvent.objects.filter(correlation_id=first_correlation_id).update(
+            at=timezone.now() - timedelta(days=2)
+        )
+
+        token = AutoKickSchedule.objects.get(id=schedule.id).refresh_reminder_token()
+        tracing.record_stage(token, OnboardingStageEvent.STAGE_STARTED, once=True)
+
+        self.assertEqual(token.id, first.id)
+        self.assertNotEqual(token.correlation_id, first_correlation_id)
+        self.assertEqual(OnboardingToken.objects.get(id=token.id).correlation_id, token.correlation_id)
+        started = tracing.timeline(correlation_id=token.correlation_id)[-1]
+        self.assertEqual(started.stage, OnboardingStageEvent.STAGE_STARTED)
+        self.assertLess(started.seconds, 60)
+
+    def test_stage_percentiles(self):
+        """Test nearest-rank percentiles of the seconds to reach a stage."""
+        now = timezone.now()
+        OnboardingStageEvent.objects.bulk_create([
+            OnboardingStageEvent(
+                correlation_id=str(i), discord_id=i, stage=OnboardingStageEvent.STAGE_REDEEMED,
+                at=now, seconds=float(i)
+            )
+            for i in range(1, 101)
+        ])
+        OnboardingStageEvent.objects.create(
+            correlation_id='old', discord_id=0, stage=OnboardingStageEvent.STAGE_REDEEMED,
+            at=now - timedelta(days=30), seconds=100000.0
+        )
+
+        self.assertEqual(
+            tracing.stage_percentiles(OnboardingStageEvent.STAGE_REDEEMED),
+            {50: 50.0, 90: 90.0, 99: 99.0}
+        )
+        self.assertEqual(tracing.stage_percentiles(OnboardingStageEvent.STAGE_ROLES_SYNCED), {})
+        self.assertEqual(tracing.cleanup_stage_events(7), 1)
@@ -0,0 +1,121 @@
+"""Tests for the Discord Onboarding webhook transport."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from ..webhook import WebhookRateLimiter, WebhookTransport
+
+
+class StubWebhookServer:
+    """Local HTTP server that records webhook requests and replays canned responses."""
+
+    def __init__(self, responses=None):
+        self.requests = []
+        self.responses = list(responses or [])
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stub.requests.append(json.loads(body))
+                status, headers, payload = stub.responses.pop(0) if stub.responses else (204, {}, None)
+                data = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/webhooks/1/token"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class WebhookTransportTestCase(SimpleTestCase):
+    """Test cases for posting embeds to a webhook."""
+
+    def _transport(self, url):
+        return WebhookTransport(url, limiter=WebhookRateLimiter(6000, burst=100))
+
+    def test_batches_embeds(self):
+        """Test that embeds are sent ten per request."""
+        embeds = [{'title': f"Event {i}"} for i in range(23)]
+
+        with StubWebhookServer() as server:
+            sent = self._transport(server.url).send_embeds(embeds)
+
+        self.assertEqual(sent, 23)
+        self.assertEqual([len(request['embeds']) for request in server.requests], [10, 10, 3])
+        self.assertEqual(server.requests[2]['embeds'][-1]['title'], "Event 22")
+
+    def test_retries_after_rate_limit(self):
+        """Test that a 429 response is retried after retry_after."""
+        responses = [(429, {}, {'retry_after': 0.05, 'global': False})]
+
+        with StubWebhookServer(responses) as server:
+            sent = self._transport(server.url).send_embeds([{'title': "Event"}])
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_stops_on_rejected_payload(self):
+        """Test that a 4xx response stops delivery of the remaining batches."""
+        responses = [(204, {}, None), (400, {}, {'message': "Invalid Form Body"})]
+        embeds = [{'title': f"Event {i}"} for i in range(25)]
+
+        with StubWebhookServer(responses) as server:
+            sent = self._transport(server.url).send_embeds(embeds)
+
+        self.assertEqual(sent, 10)
+        self.assertEqual(len(server.requests), 2)
+
+
+class WebhookRateLimiterTestCase(SimpleTestCase):
+    """Test cases for the webhook rate limiter."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def _clock(self):
+        return self.now
+
+    def _sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def test_burst_then_rate(self):
+        """Test that requests beyond the burst wait for the bucket to refill."""
+        limiter = WebhookRateLimiter(60, burst=2, clock=self._clock, sleep=self._sleep)
+
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(self.sleeps, [])
+
+        limiter.acquire()
+        self.assertAlmostEqual(sum(self.sleeps), 1.0)
+
+    def test_exhausted_bucket_header(self):
+        """Test that an exhausted bucket reported by Discord blocks until reset."""
+        limiter = WebhookRateLimiter(60, burst=5, clock=self._clock, sleep=self._sleep)
+
+        limiter.update_from_headers({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '2.5'})
+        limiter.acquire()
+
+        self.assertAlmostEqual(sum(self.sleeps), 2.5)
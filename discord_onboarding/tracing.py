@@ -0,0 +1,121 @@
+"""Correlation IDs and stage timings for onboardings.
+
+Every ``OnboardingToken`` gets a ``correlation_id`` when it is issued. The ID
+is passed along in task kwargs (``process_completed_onboarding``,
+``record_onboarding_stage``) and made current with ``correlation()`` while
+work for that onboarding runs, so ``CorrelationIdFilter`` can add it to log
+records as ``%(correlation_id)s``.
+
+Each stage an onboarding reaches (token issued, DM sent, link opened, SSO
+callback, Discord sync) is stored as an ``OnboardingStageEvent`` with the
+seconds since the token was issued. Reminder tokens are reused, so each
+reminder reissues its token under a new correlation ID (see
+``AutoKickSchedule.refresh_reminder_token``) and stages count from that
+``issued`` event rather than from when the token was first created.
+``timeline()`` returns one user's stages, ``stage_percentiles()`` the
+latency distribution of a stage.
+"""
+
+import contextvars
+import logging
+import math
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import OnboardingStageEvent
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('discord_onboarding_correlation_id', default=None)
+
+# Default window for stage latency percentiles
+PERCENTILE_WINDOW = timedelta(days=7)
+
+
+def current_correlation_id():
+    return _current.get()
+
+
+@contextmanager
+def correlation(correlation_id):
+    """Make ``correlation_id`` the current one for log records inside the block."""
+    reset_token = _current.set(correlation_id)
+    try:
+        yield
+    finally:
+        _current.reset(reset_token)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Logging filter adding ``correlation_id`` to records, ``-`` outside of an onboarding."""
+
+    def filter(self, record):
+        record.correlation_id = _current.get() or '-'
+        return True
+
+
+def record_stage(token, stage, once=False):
+    """Record that the onboarding of ``token`` reached ``stage``.
+
+    With ``once``, nothing is recorded if the onboarding already reached ``stage``.
+    """
+    if not token.correlation_id:
+        return
+    now = timezone.now()
+    try:
+        issued_at = now
+        if stage != OnboardingStageEvent.STAGE_ISSUED:
+            # Earliest event of each stage, in one lookup
+            reached = dict(
+                OnboardingStageEvent.objects.filter(
+                    correlation_id=token.correlation_id, stage__in=(OnboardingStageEvent.STAGE_ISSUED, stage)
+                ).order_by('-at').values_list('stage', 'at')
+            )
+            if once and stage in reached:
+                return
+            issued_at = reached.get(OnboardingStageEvent.STAGE_ISSUED) or token.created_at or now
+        OnboardingStageEvent.objects.create(
+            correlation_id=token.correlation_id,
+            discord_id=token.discord_id,
+            stage=stage,
+            at=now,
+            seconds=max((now - issued_at).total_seconds(), 0),
+        )
+    except Exception as e:
+        # Timings are diagnostics only, never let them break the onboarding itself
+        logger.error(f"Unable to record onboarding stage {stage} for {token.correlation_id}: {e}")
+
+
+def timeline(correlation_id=None, discord_id=None):
+    """Stage events of one onboarding, or of all onboardings of a Discord user, oldest first."""
+    events = OnboardingStageEvent.objects.all()
+    if correlation_id:
+        events = events.filter(correlation_id=correlation_id)
+    if discord_id:
+        events = events.filter(discord_id=discord_id)
+    return list(events.order_by('at'))
+
+
+def stage_percentiles(stage, percentiles=(50, 90, 99), since=None):
+    """Seconds from token issue to ``stage`` at each percentile, over events since ``since``.
+
+    Returns ``{percentile: seconds}``, empty if there are no events.
+    """
+    since = since or timezone.now() - PERCENTILE_WINDOW
+    events = OnboardingStageEvent.objects.filter(stage=stage, at__gte=since)
+    count = events.count()
+    if not count:
+        return {}
+    ordered = events.order_by('seconds').values_list('seconds', flat=True)
+    return {
+        percentile: ordered[max(math.ceil(percentile / 100 * count) - 1, 0)]
+        for percentile in percentiles
+    }
+
+
+def cleanup_stage_events(days):
+    """Delete stage events older than ``days``, returns the number deleted."""
+    deleted, _ = OnboardingStageEvent.objects.filter(at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
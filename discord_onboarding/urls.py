@@ -12,4 +12,6 @@ urlpatterns = [
     path('callback/', views.onboarding_callback, name='callback'),
     path('sso/login/', views.discord_onboarding_sso_login, name='sso_login'),
     path('registration/', views.discord_onboarding_registration, name='registration'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
+    path('health/', views.health_endpoint, name='health'),
 ]
@@ -1,9 +1,11 @@
 """Views for Discord Onboarding."""
 
+import hmac
 import logging
+import time
 
 from django.contrib.auth.decorators import login_required, permission_required
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -12,11 +14,11 @@ from django.contrib.auth import authenticate, login
 
 from allianceauth.services.modules.discord.models import DiscordUser
 
-from .models import OnboardingToken, AutoKickSchedule
-from .app_settings import (
-    DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION,
-    DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID
-)
+from . import health, metrics, tracing
+from .profiling import profiled
+from .models import OnboardingStageEvent, OnboardingToken, AutoKickSchedule
+from .app_settings import DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION, DISCORD_ONBOARDING_METRICS_TOKEN
+from .log_digest import is_log_output_configured
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,7 @@ def index(request):
     return render(request, 'discord_onboarding/index.html', context)
 
 
+@profiled
 def onboarding_start(request, token):
     """Start the onboarding process with a token."""
 
@@ -52,6 +55,9 @@ def onboarding_start(request, token):
 
     # Store the onboarding token in session for the callback
     request.session['onboarding_token'] = token
+    request.session['onboarding_started_at'] = time.time()
+    # Refreshes and link preview bots open the link again, only the first open counts
+    tracing.record_stage(onboarding_token, OnboardingStageEvent.STAGE_STARTED, once=True)
     
     # Set session flag to bypass email verification if configured
     if DISCORD_ONBOARDING_BYPASS_EMAIL_VERIFICATION:
@@ -71,6 +77,7 @@ def onboarding_start(request, token):
     return HttpResponseRedirect(f"{sso_login_url}?next={next_url}")
 
 
+@profiled
 @login_required
 def onboarding_callback(request):
     """Handle the callback after Alliance Auth SSO authentication."""
@@ -101,6 +108,13 @@ def onboarding_callback(request):
             ),
         })
 
+    with tracing.correlation(onboarding_token.correlation_id):
+        return _complete_onboarding(request, onboarding_token)
+
+
+def _complete_onboarding(request, onboarding_token):
+    """Link the Discord account of a valid onboarding token to the signed in user."""
+
     try:
         # User is already authenticated by Alliance Auth SSO
         user = request.user
@@ -136,6 +150,7 @@ def onboarding_callback(request):
         onboarding_token.used = True
         onboarding_token.user = user
         onboarding_token.save()
+        tracing.record_stage(onboarding_token, OnboardingStageEvent.STAGE_REDEEMED)
 
         # Deactivate any auto-kick schedule for this user
         try:
@@ -144,11 +159,15 @@ def onboarding_callback(request):
                 is_active=True
             ).first()
             if auto_kick_schedule:
-                auto_kick_schedule.deactivate()
+                auto_kick_schedule.deactivate(AutoKickSchedule.OUTCOME_AUTHENTICATED)
                 logger.info(f"Deactivated auto-kick schedule for authenticated user {onboarding_token.discord_username}")
         except Exception as e:
             logger.error(f"Error deactivating auto-kick schedule: {e}")
 
+        started_at = request.session.pop('onboarding_started_at', None)
+        if started_at:
+            metrics.START_TO_CALLBACK_SECONDS.observe(time.time() - started_at)
+
         # Clear the onboarding token and bypass flag from session
         del request.session['onboarding_token']
         if 'discord_onboarding_bypass_email' in request.session:
@@ -157,12 +176,12 @@ def onboarding_callback(request):
         # Trigger Discord group/role update
         try:
             from .tasks import process_completed_onboarding
-            process_completed_onboarding.delay(onboarding_token.id)
+            process_completed_onboarding.delay(onboarding_token.id, correlation_id=onboarding_token.correlation_id)
         except Exception as e:
             logger.error(f"Error triggering completed onboarding processing: {e}")
 
         # Send success notification to auto-kick log channel
-        if DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID:
+        if is_log_output_configured():
             try:
                 from .tasks import log_successful_authentication
                 log_successful_authentication.delay(onboarding_token.id)
@@ -194,6 +213,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 
 
+@profiled
 @token_required(new=True, scopes=settings.LOGIN_TOKEN_SCOPES)
 def discord_onboarding_sso_login(request, token):
     """Custom SSO login that handles email verification bypass for Discord onboarding."""
@@ -256,6 +276,7 @@ def discord_onboarding_sso_login(request, token):
         return redirect(settings.LOGIN_URL)
 
 
+@profiled
 def discord_onboarding_registration(request):
     """Custom registration view for Discord onboarding that handles email bypass."""
     from django.contrib.auth.forms import UserCreationForm
@@ -291,7 +312,7 @@ def discord_onboarding_registration(request):
             
             # Send success notification if there's an onboarding token session
             onboarding_token = request.session.get('onboarding_token')
-            if onboarding_token and DISCORD_ONBOARDING_KICK_LOG_CHANNEL_ID:
+            if onboarding_token and is_log_output_configured():
                 try:
                     from .tasks import log_successful_authentication
                     token_obj = OnboardingToken.objects.filter(token=onboarding_token).first()
@@ -312,3 +333,33 @@ def discord_onboarding_registration(request):
         
     except User.DoesNotExist:
         return HttpResponseBadRequest("Invalid registration user")
+
+
+def _scraper_allowed(request):
+    """Superusers, or a request sending ``Authorization: Bearer <DISCORD_ONBOARDING_METRICS_TOKEN>``."""
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    token_ok = bool(DISCORD_ONBOARDING_METRICS_TOKEN) and hmac.compare_digest(
+        authorization.encode(), f"Bearer {DISCORD_ONBOARDING_METRICS_TOKEN}".encode()
+    )
+    return token_ok or request.user.is_superuser
+
+
+def metrics_endpoint(request):
+    """Onboarding metrics in the Prometheus text format.
+
+    Open to superusers, and to scrapers sending ``Authorization: Bearer <DISCORD_ONBOARDING_METRICS_TOKEN>``.
+    """
+    if not _scraper_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def health_endpoint(request):
+    """Periodic task heartbeats and auto-kick scheduling lag as JSON, with status 503 while there are warnings.
+
+    Open to the same users and scrapers as the metrics.
+    """
+    if not _scraper_allowed(request):
+        return HttpResponseForbidden()
+    result = health.report()
+    return JsonResponse(result, status=503 if result['warnings'] else 200)
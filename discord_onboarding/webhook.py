@@ -0,0 +1,162 @@
+"""Webhook transport for Discord Onboarding log channel output.
+
+When ``DISCORD_ONBOARDING_LOG_WEBHOOK_URL`` is set, log digests are posted
+straight to a Discord webhook instead of going through the bot's task queue,
+so log output no longer competes with DMs and kicks for the bot's gateway and
+rate budget.  Each worker process keeps one pooled HTTP session and its own
+rate limiter for the webhook.
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .app_settings import (
+    DISCORD_ONBOARDING_LOG_WEBHOOK_RATE_LIMIT,
+    DISCORD_ONBOARDING_LOG_WEBHOOK_URL
+)
+
+logger = logging.getLogger(__name__)
+
+# Discord allows at most 10 embeds per webhook message
+MAX_EMBEDS_PER_REQUEST = 10
+
+# Requests that may be sent back to back before the per-minute rate applies
+WEBHOOK_BURST = 5
+
+# Attempts per payload when Discord answers with 429 or a 5xx
+MAX_ATTEMPTS = 3
+
+REQUEST_TIMEOUT = 10
+
+
+class WebhookRateLimiter:
+    """Token bucket that also honours Discord's rate limit response headers."""
+
+    def __init__(self, per_minute, burst=WEBHOOK_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent, returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            self._sleep(delay)
+            waited += delay
+
+    def block_for(self, seconds):
+        """Hold all requests back for ``seconds``."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def update_from_headers(self, headers):
+        """Pause until the bucket resets when Discord reports it as exhausted."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is None or reset_after is None:
+            return
+        try:
+            if int(remaining) <= 0:
+                self.block_for(float(reset_after))
+        except ValueError:
+            return
+
+
+class WebhookTransport:
+    """Posts embeds to a Discord webhook using a pooled session."""
+
+    def __init__(self, url, rate_limit=DISCORD_ONBOARDING_LOG_WEBHOOK_RATE_LIMIT, session=None, limiter=None):
+        self.url = url
+        self.session = session or self._create_session()
+        self.limiter = limiter or WebhookRateLimiter(rate_limit)
+
+    @staticmethod
+    def _create_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _post(self, payload):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.post(self.url, json=payload, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                logger.warning(f"Webhook request failed (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                continue
+
+            self.limiter.update_from_headers(response.headers)
+
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get('retry_after', 1))
+                except ValueError:
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                logger.warning(f"Webhook rate limited, retrying in {retry_after}s")
+                self.limiter.block_for(retry_after)
+                continue
+
+            if response.status_code >= 500:
+                logger.warning(f"Webhook returned {response.status_code} (attempt {attempt}/{MAX_ATTEMPTS})")
+                continue
+
+            if response.status_code >= 400:
+                logger.error(f"Webhook rejected payload with {response.status_code}: {response.text[:200]}")
+                return False
+
+            return True
+
+        return False
+
+    def send_embeds(self, embeds):
+        """Send embeds in batches of ``MAX_EMBEDS_PER_REQUEST``.
+
+        Returns the number of embeds that were delivered; batches are sent in
+        order and sending stops at the first batch that fails.
+        """
+        sent = 0
+        for start in range(0, len(embeds), MAX_EMBEDS_PER_REQUEST):
+            batch = embeds[start:start + MAX_EMBEDS_PER_REQUEST]
+            if not self._post({'embeds': batch}):
+                break
+            sent += len(batch)
+        return sent
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_webhook_transport():
+    """Return the process-wide webhook transport, or None if no webhook is configured."""
+    global _transport
+
+    if not DISCORD_ONBOARDING_LOG_WEBHOOK_URL:
+        return None
+
+    with _transport_lock:
+        if _transport is None:
+            _transport = WebhookTransport(DISCORD_ONBOARDING_LOG_WEBHOOK_URL)
+        return _transport